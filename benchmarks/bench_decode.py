@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark decode+resize of large JPEGs with and without draft-mode decoding
+
+Reports load_image latency for every resampling filter with full-resolution
+decoding and with DCT-scaled (draft) decoding, together with the PSNR
+against the full-resolution LANCZOS result.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_inpaint_methods import time_call  # noqa: E402
+from src.utils import RESAMPLE_FILTERS, load_image, save_image  # noqa: E402
+
+
+def make_photo(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Smooth gradients with fine texture, closer to a photo than pure noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width, y / height, (x + y) / (width + height)], axis=-1) * 200
+    texture = cv2.GaussianBlur(rng.normal(0, 40, (height, width, 3)).astype(np.float32), (0, 0), 1.5)
+    return np.clip(base + texture, 0, 255).astype(np.uint8)
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    """Peak signal-to-noise ratio in dB"""
+    mse = np.mean((a.astype(np.float64) - b) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare JPEG decode+resize time with and without draft-mode decoding'
+    )
+    parser.add_argument('--source', type=int, nargs=2, default=[6000, 4000],
+                        metavar=('WIDTH', 'HEIGHT'), help='Size of the generated JPEG')
+    parser.add_argument('--target', type=int, nargs=2, default=[512, 512],
+                        metavar=('WIDTH', 'HEIGHT'), help='Size to load at')
+    parser.add_argument('--filters', nargs='+', choices=list(RESAMPLE_FILTERS),
+                        default=list(RESAMPLE_FILTERS), help='Resampling filters to try')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='Timed repetitions')
+
+    args = parser.parse_args()
+    size = tuple(args.target)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'photo.jpg')
+        save_image(make_photo(*args.source), path, quality=90)
+        print(f"JPEG {args.source[0]}x{args.source[1]} ({os.path.getsize(path) / 1e6:.1f} MB) "
+              f"-> {size[0]}x{size[1]}")
+
+        reference = load_image(path, size=size, draft=False)
+        baseline = time_call(lambda: load_image(path, size=size, draft=False), args.repeat)
+        print(f"{'filter':<10}{'draft':>7}{'ms':>10}{'speedup':>9}{'PSNR dB':>9}")
+        for resample in args.filters:
+            for draft in (False, True):
+                def load():
+                    return load_image(path, size=size, draft=draft, resample=resample)
+
+                ms = time_call(load, args.repeat)
+                print(f"{resample:<10}{str(draft):>7}{ms:>10.2f}{baseline / ms:>8.2f}x"
+                      f"{psnr(load(), reference):>9.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
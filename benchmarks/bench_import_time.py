@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold import time of the package entry points
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+import numpy as np
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+ENTRY_POINTS = {
+    'package': 'import src',
+    'reconstructor': 'from src import FaceReconstructor',
+    'utils': 'import src.utils',
+    'server': 'import src.server',
+}
+
+
+def cold_import_ms(statement: str) -> float:
+    """Wall time of an import statement in a fresh interpreter, in milliseconds"""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output) * 1000
+
+
+def top_modules(statement: str, count: int):
+    """Slowest modules by cumulative time according to -X importtime"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=REPO_ROOT, check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented further; keep the top level only
+        if len(name) - len(name.lstrip()) == 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import time of package entry points')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='Fresh interpreters per entry point')
+    parser.add_argument('--top', type=int, default=5, help='Slowest modules to list per entry point')
+
+    args = parser.parse_args()
+
+    for label, statement in ENTRY_POINTS.items():
+        times = [cold_import_ms(statement) for _ in range(args.repeat)]
+        print(f"{label:>14}: median {np.median(times):8.1f} ms  min {min(times):8.1f} ms  ({statement})")
+        for cumulative_us, name in top_modules(statement, args.top):
+            print(f"{'':>16}{cumulative_us / 1000:8.1f} ms  {name}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
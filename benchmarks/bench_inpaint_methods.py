@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inpainting strategies of edge_guided_inpainting
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import time
+
+import numpy as np
+import cv2
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils import INPAINT_METHODS, edge_guided_inpainting
+
+
+def make_input(width: int, height: int, mask_ratio: float, seed: int = 0):
+    """Create a smooth random image and a centred elliptical mask"""
+    rng = np.random.RandomState(seed)
+    image = cv2.GaussianBlur(rng.randint(0, 255, (height, width, 3), dtype=np.uint8),
+                             (0, 0), 3)
+    mask = np.zeros((height, width), np.uint8)
+    # Ellipse area is pi * a * b; scale both half-axes to hit the requested ratio
+    scale = np.sqrt(4 * mask_ratio / np.pi)
+    axes = (max(1, int(width / 2 * scale)), max(1, int(height / 2 * scale)))
+    cv2.ellipse(mask, (width // 2, height // 2), axes, 0, 0, 360, 255, -1)
+    return image, mask
+
+
+def time_call(fn, repeat: int) -> float:
+    """Return the median wall time of fn in milliseconds"""
+    fn()  # Warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare latency of the telea, ns and blend inpainting strategies'
+    )
+    parser.add_argument('--size', '-s', type=int, nargs=2, default=[1024, 1024],
+                        metavar=('WIDTH', 'HEIGHT'), help='Image size')
+    parser.add_argument('--mask-ratio', type=float, default=0.02,
+                        help='Fraction of the image covered by the mask')
+    parser.add_argument('--radius', type=int, default=3, help='Inpainting radius')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='Timed repetitions')
+    parser.add_argument('--roi', action='store_true', help='Also enable ROI cropping')
+
+    args = parser.parse_args()
+
+    image, mask = make_input(args.size[0], args.size[1], args.mask_ratio)
+    print(f"Image {args.size[0]}x{args.size[1]}, mask {np.count_nonzero(mask)} px, "
+          f"radius {args.radius}, roi={args.roi}")
+
+    baseline = None
+    for method in ('blend',) + tuple(m for m in INPAINT_METHODS if m != 'blend'):
+        ms = time_call(lambda: edge_guided_inpainting(
+            image, mask, inpaint_radius=args.radius, roi=args.roi, method=method),
+            args.repeat)
+        baseline = baseline or ms
+        print(f"{method:>6}: {ms:9.2f} ms  ({baseline / ms:4.2f}x vs blend)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark coarse-to-fine (pyramid) inpainting against the single-scale path
+
+Reports latency per pyramid level and band width, together with the mean
+absolute difference to the single-scale result inside the mask.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_inpaint_methods import make_input, time_call  # noqa: E402
+from src.utils import INPAINT_METHODS, edge_guided_inpainting  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare pyramid inpainting levels and band widths with single-scale inpainting'
+    )
+    parser.add_argument('--size', '-s', type=int, nargs=2, default=[3840, 2160],
+                        metavar=('WIDTH', 'HEIGHT'), help='Image size')
+    parser.add_argument('--mask-ratio', type=float, default=0.05,
+                        help='Fraction of the image covered by the mask')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 3],
+                        help='Pyramid levels to try')
+    parser.add_argument('--bands', type=int, nargs='+', default=[4, 8, 16],
+                        help='Full-resolution band widths to try')
+    parser.add_argument('--method', choices=INPAINT_METHODS, default='blend',
+                        help='Inpainting strategy')
+    parser.add_argument('--roi', action='store_true', help='Also enable ROI cropping')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='Timed repetitions')
+
+    args = parser.parse_args()
+
+    image, mask = make_input(args.size[0], args.size[1], args.mask_ratio)
+    inside = mask > 0
+    print(f"Image {args.size[0]}x{args.size[1]}, mask {np.count_nonzero(mask)} px, "
+          f"method {args.method}, roi={args.roi}")
+
+    def run(levels: int, band: int) -> np.ndarray:
+        return edge_guided_inpainting(image, mask, roi=args.roi, method=args.method,
+                                      pyramid_levels=levels, pyramid_band=band)[0]
+
+    reference = run(0, 0)
+    baseline = time_call(lambda: run(0, 0), args.repeat)
+    print(f"{'levels':>6}{'band':>6}{'ms':>11}{'speedup':>9}{'MAD':>8}")
+    print(f"{0:>6}{'-':>6}{baseline:>11.2f}{1:>8.2f}x{0:>8.2f}")
+    for levels in args.levels:
+        for band in args.bands:
+            ms = time_call(lambda: run(levels, band), args.repeat)
+            result = run(levels, band)
+            mad = np.abs(result[inside].astype(np.int16) - reference[inside]).mean()
+            print(f"{levels:>6}{band:>6}{ms:>11.2f}{baseline / ms:>8.2f}x{mad:>8.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
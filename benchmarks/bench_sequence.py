@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark sustained frame rate of sequence mode against per-frame reconstruction
+
+Generates a synthetic clip with sensor noise, several white holes and an
+object moving across the frame, then reports frames per second of
+independent per-frame reconstruction (full frame and ROI) and of
+TemporalInpainter at different tolerances, with the share of reused regions.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import time
+
+import numpy as np
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor  # noqa: E402
+from src.sequence import TemporalInpainter  # noqa: E402
+from src.utils import create_mask_from_white_regions  # noqa: E402
+
+
+def make_clip(width: int, height: int, frames: int, holes: int, seed: int = 0) -> list:
+    """Textured static scene with noise, white holes and a moving dark block"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    scene = np.stack([x / width, y / height, (x + y) / (width + height)], axis=-1) * 180 + 30
+    scene += rng.normal(0, 15, scene.shape)
+
+    hole = max(16, min(width, height) // 12)
+    corners = [(int(rng.integers(0, height - hole)), int(rng.integers(0, width - hole)))
+               for _ in range(holes)]
+    block = hole // 2
+    clip = []
+    for i in range(frames):
+        frame = np.clip(scene + rng.normal(0, 1, scene.shape), 0, 230).astype(np.uint8)
+        left = (i * width // frames) % (width - block)
+        frame[height // 2:height // 2 + block, left:left + block] = 20
+        for top, hole_left in corners:
+            frame[top:top + hole, hole_left:hole_left + hole] = 255
+        clip.append(frame)
+    return clip
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare frames per second of sequence mode and per-frame reconstruction'
+    )
+    parser.add_argument('--size', '-s', type=int, nargs=2, default=[1280, 720],
+                        metavar=('WIDTH', 'HEIGHT'), help='Frame size')
+    parser.add_argument('--frames', '-n', type=int, default=60, help='Clip length')
+    parser.add_argument('--holes', type=int, default=6, help='White holes per frame')
+    parser.add_argument('--tolerances', type=float, nargs='+', default=[1.0, 2.0, 4.0],
+                        help='TemporalInpainter tolerances to try')
+
+    args = parser.parse_args()
+
+    clip = make_clip(args.size[0], args.size[1], args.frames, args.holes)
+    print(f"{args.frames} frames of {args.size[0]}x{args.size[1]} with {args.holes} holes")
+    print(f"{'mode':<24}{'fps':>8}{'reused':>9}")
+
+    for roi in (False, True):
+        reconstructor = FaceReconstructor({'roi_inpainting': roi})
+        start = time.perf_counter()
+        for frame in clip:
+            reconstructor.process_array(frame)
+        fps = len(clip) / (time.perf_counter() - start)
+        print(f"{'per-frame roi=' + str(roi):<24}{fps:>8.1f}{'-':>9}")
+
+    for tolerance in args.tolerances:
+        inpainter = TemporalInpainter(tolerance)
+        start = time.perf_counter()
+        for frame in clip:
+            inpainter.inpaint(frame, create_mask_from_white_regions(frame))
+        fps = len(clip) / (time.perf_counter() - start)
+        share = inpainter.reused / max(inpainter.reused + inpainter.inpainted, 1)
+        print(f"{'sequence tol=' + str(tolerance):<24}{fps:>8.1f}{share:>9.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the EdgeConnect Face Reconstruction hot paths
+
+Runs every case in a fresh process over synthetic inputs, sweeping image
+size and mask coverage, and reports latency percentiles, throughput and
+peak RSS. Results are written as JSON so that runs from different commits
+can be compared with --compare.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.append(REPO_ROOT)
+
+from bench_inpaint_methods import make_input  # noqa: E402
+
+SIZES = {
+    '256': (256, 256),
+    '512': (512, 512),
+    '1k': (1024, 1024),
+    '2k': (2048, 2048),
+    '4k': (3840, 2160),
+    '8k': (7680, 4320),
+}
+COVERAGES = (0.005, 0.02, 0.1)
+
+# Case name -> whether its cost depends on the mask coverage
+CASES = {
+    'load_image': False,
+    'create_mask_from_white_regions': True,
+    'canny_edge_detection': False,
+    'edge_guided_inpainting': True,
+    'save_image': False,
+    'process_image': True,
+}
+
+
+def build_case(case: str, image: np.ndarray, mask: np.ndarray, work_dir: str) -> Callable[[], Any]:
+    """Return a zero-argument callable running one iteration of the case"""
+    from src.face_reconstructor import FaceReconstructor
+    from src.utils import (canny_edge_detection, create_mask_from_white_regions,
+                           edge_guided_inpainting, load_image, save_image)
+
+    # Paint the mask white so mask detection and process_image find it
+    masked = image.copy()
+    masked[mask > 0] = 255
+    input_path = os.path.join(work_dir, 'input.png')
+    save_image(masked, input_path, optimize=False)
+
+    if case == 'load_image':
+        return lambda: load_image(input_path)
+    if case == 'create_mask_from_white_regions':
+        return lambda: create_mask_from_white_regions(masked)
+    if case == 'canny_edge_detection':
+        return lambda: canny_edge_detection(image)
+    if case == 'edge_guided_inpainting':
+        return lambda: edge_guided_inpainting(image, mask)
+    if case == 'save_image':
+        output_path = os.path.join(work_dir, 'output.jpg')
+        return lambda: save_image(image, output_path)
+    if case == 'process_image':
+        reconstructor = FaceReconstructor({'save_intermediate': False})
+        return lambda: reconstructor.process_image(input_path)
+    raise ValueError(f"Unknown case {case}")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(case: str, size: str, coverage: float, repeat: int) -> Dict[str, Any]:
+    """Run one case in the current (fresh) process and collect its metrics"""
+    width, height = SIZES[size]
+    image, mask = make_input(width, height, coverage)
+    with tempfile.TemporaryDirectory() as work_dir:
+        fn = build_case(case, image, mask, work_dir)
+        rss_before = peak_rss_mb()
+        fn()  # Warm up
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        rss_after = peak_rss_mb()
+
+    times_ms = np.array(times) * 1000
+    p50, p90, p99 = np.percentile(times_ms, [50, 90, 99])
+    mean_s = float(np.mean(times))
+    return {
+        'case': case,
+        'size': size,
+        'width': width,
+        'height': height,
+        'coverage': coverage,
+        'repeat': repeat,
+        'p50_ms': float(p50),
+        'p90_ms': float(p90),
+        'p99_ms': float(p99),
+        'images_per_s': 1 / mean_s,
+        'mpx_per_s': width * height / mean_s / 1e6,
+        'peak_rss_mb': rss_after,
+        'case_rss_mb': None if rss_after is None else rss_after - rss_before,
+    }
+
+
+def machine_info() -> Dict[str, Any]:
+    """Describe the environment the numbers were taken on"""
+    import cv2
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+            tolerance: float) -> List[str]:
+    """List the cases whose p50 latency regressed beyond the tolerance"""
+    def key(entry):
+        return entry['case'], entry['size'], entry['coverage']
+
+    previous = {key(entry): entry for entry in baseline['results']}
+    regressions = []
+    for entry in results:
+        before = previous.get(key(entry))
+        if before is None:
+            continue
+        ratio = entry['p50_ms'] / before['p50_ms']
+        marker = 'REGRESSION' if ratio > 1 + tolerance else 'ok'
+        line = (f"{entry['case']:<32}{entry['size']:>5}{entry['coverage']:>7.3f}  "
+                f"{before['p50_ms']:9.2f} -> {entry['p50_ms']:9.2f} ms  ({ratio:5.2f}x) {marker}")
+        print(line)
+        if marker != 'ok':
+            regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the utils hot paths and process_image across sizes and mask coverage'
+    )
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES),
+                        help='Cases to run')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES),
+                        help='Image sizes to sweep')
+    parser.add_argument('--coverages', nargs='+', type=float, default=list(COVERAGES),
+                        help='Mask coverage fractions to sweep')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='Timed iterations per case')
+    parser.add_argument('--quick', action='store_true',
+                        help='Only 256/512/1k, one coverage and 3 iterations')
+    parser.add_argument('--output', '-o', help='Write results JSON to this file')
+    parser.add_argument('--save-baseline', metavar='NAME',
+                        help='Also store results as benchmarks/baselines/NAME.json')
+    parser.add_argument('--compare', metavar='BASELINE_JSON',
+                        help='Compare p50 latency against a previous results file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed p50 slowdown before a case counts as a regression')
+
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes = [size for size in args.sizes if size in ('256', '512', '1k')]
+        args.coverages = args.coverages[1:2] or args.coverages
+        args.repeat = min(args.repeat, 3)
+
+    runs = []
+    for case in args.cases:
+        for size in args.sizes:
+            for coverage in (args.coverages if CASES[case] else args.coverages[:1]):
+                runs.append((case, size, coverage))
+
+    # A fresh spawned process per case keeps peak RSS attributable to it
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"{'case':<32}{'size':>5}{'cover':>7}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'img/s':>9}{'Mpx/s':>9}{'RSS MB':>9}")
+    for case, size, coverage in runs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            entry = executor.submit(run_case, case, size, coverage, args.repeat).result()
+        results.append(entry)
+        rss = '-' if entry['peak_rss_mb'] is None else f"{entry['peak_rss_mb']:.0f}"
+        print(f"{case:<32}{size:>5}{coverage:>7.3f}{entry['p50_ms']:>10.2f}"
+              f"{entry['p99_ms']:>10.2f}{entry['images_per_s']:>9.1f}"
+              f"{entry['mpx_per_s']:>9.1f}{rss:>9}")
+
+    report = {'machine': machine_info(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'results': results}
+    paths = [args.output] if args.output else []
+    if args.save_baseline:
+        paths.append(os.path.join(BENCHMARK_DIR, 'baselines', f'{args.save_baseline}.json'))
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        print(f"\nComparing against {args.compare} (commit {baseline['machine'].get('commit')})")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
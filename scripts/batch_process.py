@@ -9,12 +9,16 @@ License: MIT
 import os
 import sys
 import argparse
+import json
 from typing import List, Tuple
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Add the repository root to path so the src package (and its worker
+# processes) can be imported
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from face_reconstructor import FaceReconstructor
+from src.face_reconstructor import ARTIFACTS, EXECUTORS, OUTPUT_FORMATS, FaceReconstructor
+from src.instrumentation import Instrumentation
+from src.utils import RESAMPLE_FILTERS
 
 
 def main():
@@ -42,12 +46,145 @@ def main():
         metavar=('WIDTH', 'HEIGHT'),
         help='Target size for processing'
     )
+    parser.add_argument(
+        '--resample',
+        choices=list(RESAMPLE_FILTERS),
+        default='lanczos',
+        help='Filter used when resizing to --size'
+    )
+    parser.add_argument(
+        '--no-fast-decode',
+        action='store_true',
+        help='Decode JPEGs at full resolution before resizing to --size'
+    )
     parser.add_argument(
         '--extensions', '-e',
         nargs='+',
         default=['.jpg', '.jpeg', '.png', '.bmp'],
         help='File extensions to process'
     )
+    parser.add_argument(
+        '--artifacts', '-a',
+        nargs='+',
+        choices=ARTIFACTS,
+        default=list(ARTIFACTS),
+        help='Result files to write for each image'
+    )
+    parser.add_argument(
+        '--format', '-f',
+        choices=OUTPUT_FORMATS,
+        default='jpg',
+        help='Output encoding (npy writes raw arrays)'
+    )
+    parser.add_argument(
+        '--quality', '-q',
+        type=int,
+        default=95,
+        help='JPEG/WebP quality'
+    )
+    parser.add_argument(
+        '--png-compression',
+        type=int,
+        default=6,
+        help='PNG compression level (0-9)'
+    )
+    parser.add_argument(
+        '--no-optimize',
+        action='store_true',
+        help='Skip the JPEG encoder optimisation pass (PNG follows --png-compression)'
+    )
+    parser.add_argument(
+        '--resume', '-r',
+        action='store_true',
+        help='Skip images already processed with the same content and settings'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print per-stage timing percentiles after the run'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        help='Write per-stage timings in Prometheus text format to this file'
+    )
+    parser.add_argument(
+        '--mask-dir', '-m',
+        help='Directory of mask files paired with images by file name; '
+             'replaces white region detection for those images'
+    )
+    parser.add_argument(
+        '--mask-map',
+        help='JSON file mapping image file names to mask paths '
+             '(relative paths are resolved against the JSON file)'
+    )
+    parser.add_argument(
+        '--prescan',
+        action='store_true',
+        help='Skip images with no pixel near the white threshold using a cheap '
+             'luma-only decode before full processing'
+    )
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=1,
+        help='Number of workers (0 uses all cores)'
+    )
+    parser.add_argument(
+        '--executor',
+        choices=EXECUTORS,
+        default='process',
+        help='Run workers as processes or as threads sharing one reconstructor'
+    )
+    parser.add_argument(
+        '--opencv-threads',
+        type=int,
+        help="OpenCV's internal thread count per worker process, or in thread mode "
+             "(default: cores per worker)"
+    )
+    parser.add_argument(
+        '--shard-queue',
+        help='Share the batch with other workers through this SQLite queue file '
+             '(or directory to hold it) on a shared filesystem; run the same '
+             'command on every worker'
+    )
+    parser.add_argument(
+        '--worker-id',
+        help='Name of this worker in the shard queue (default: host name and process id)'
+    )
+    parser.add_argument(
+        '--lease-seconds',
+        type=float,
+        default=60.0,
+        help='Seconds a claimed image stays reserved without a heartbeat from its worker'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=1,
+        help='Number of files handed to a worker at a time'
+    )
+    parser.add_argument(
+        '--unordered',
+        action='store_true',
+        help='Report results as they complete instead of in input order'
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=0,
+        help='Decode up to this many images ahead on a background thread'
+    )
+    parser.add_argument(
+        '--writers',
+        type=int,
+        default=0,
+        help='Number of background threads encoding and writing results'
+    )
+    parser.add_argument(
+        '--max-pending-writes',
+        type=int,
+        help='Maximum results waiting to be written before compute blocks'
+    )
 
     args = parser.parse_args()
 
@@ -55,18 +192,52 @@ def main():
     config = {
         'threshold': args.threshold,
         'target_size': tuple(args.size) if args.size else None,
-        'save_intermediate': True
+        'fast_decode': not args.no_fast_decode,
+        'resample': args.resample,
+        'save_intermediate': True,
+        'save_artifacts': tuple(args.artifacts),
+        'output_format': args.format,
+        'output_quality': args.quality,
+        'png_compression': args.png_compression,
+        'optimize_output': not args.no_optimize
     }
 
-    reconstructor = FaceReconstructor(config)
+    profiling = args.profile or args.metrics_file
+    instrumentation = Instrumentation() if profiling else None
+    reconstructor = FaceReconstructor(config, instrumentation=instrumentation)
 
     try:
+        mask_map = None
+        if args.mask_map:
+            with open(args.mask_map) as fh:
+                base_dir = os.path.dirname(os.path.abspath(args.mask_map))
+                mask_map = {name: os.path.join(base_dir, path)
+                            for name, path in json.load(fh).items()}
+
         # Process batch
         reconstructor.batch_process(
             args.input_dir,
             args.output_dir,
-            file_extensions=tuple(args.extensions)
+            file_extensions=tuple(args.extensions),
+            num_workers=args.workers,
+            chunk_size=args.chunk_size,
+            ordered=not args.unordered,
+            prefetch_depth=args.prefetch,
+            writer_threads=args.writers,
+            max_pending_writes=args.max_pending_writes,
+            resume=args.resume,
+            mask_dir=args.mask_dir,
+            mask_map=mask_map,
+            executor=args.executor,
+            opencv_threads=args.opencv_threads,
+            prescan=args.prescan,
+            shard_queue=args.shard_queue,
+            worker_id=args.worker_id,
+            lease_seconds=args.lease_seconds
         )
+        if args.metrics_file:
+            with open(args.metrics_file, 'w') as fh:
+                fh.write(instrumentation.to_prometheus())
         print("✅ Batch processing completed successfully!")
         return 0
 
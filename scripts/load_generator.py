@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Load generator for the EdgeConnect Face Reconstruction HTTP service
+
+Sends concurrent /inpaint requests and reports latency percentiles and
+throughput.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import sys
+import argparse
+import base64
+import http.client
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+def run_client(url: str, body: bytes, headers: dict, count: int) -> List[Tuple[int, float]]:
+    """Send count requests over one keep-alive connection"""
+    target = urlsplit(url)
+    connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=120)
+    path = target.path + (f'?{target.query}' if target.query else '')
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            connection.request('POST', path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = 0
+        samples.append((status, time.perf_counter() - start))
+    connection.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure p50/p99 latency of the face reconstruction service'
+    )
+    parser.add_argument('image_path', help='Image to send with every request')
+    parser.add_argument('--mask', '-m', help='Optional mask image sent alongside')
+    parser.add_argument('--url', default='http://127.0.0.1:8080/inpaint?format=png',
+                        help='Service endpoint')
+    parser.add_argument('--requests', '-n', type=int, default=200, help='Total requests')
+    parser.add_argument('--concurrency', '-c', type=int, default=8,
+                        help='Number of concurrent connections')
+
+    args = parser.parse_args()
+
+    with open(args.image_path, 'rb') as fh:
+        image_bytes = fh.read()
+    if args.mask:
+        with open(args.mask, 'rb') as fh:
+            body = json.dumps({'image': base64.b64encode(image_bytes).decode('ascii'),
+                               'mask': base64.b64encode(fh.read()).decode('ascii')}).encode()
+        headers = {'Content-Type': 'application/json'}
+    else:
+        body = image_bytes
+        headers = {'Content-Type': 'application/octet-stream'}
+
+    concurrency = max(1, min(args.concurrency, args.requests))
+    shares = [args.requests // concurrency + (i < args.requests % concurrency)
+              for i in range(concurrency)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = executor.map(lambda count: run_client(args.url, body, headers, count), shares)
+        samples = [sample for client in results for sample in client]
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in samples)
+    latencies = np.array([latency for status, latency in samples if status == 200]) * 1000
+
+    print(f"Requests: {len(samples)} in {elapsed:.2f}s "
+          f"({len(samples) / elapsed:.1f} req/s) at concurrency {concurrency}")
+    print("Status codes: " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items())))
+    if latencies.size:
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        print(f"Latency ms: p50 {p50:.1f}  p90 {p90:.1f}  p99 {p99:.1f}  max {latencies.max():.1f}")
+    return 0 if statuses.get(200) == len(samples) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
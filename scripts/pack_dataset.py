@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pack an image directory into a memory-mapped dataset for EdgeConnect Face Reconstruction
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dataset import pack_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Decode images (and optional masks) once into a memory-mapped array store'
+    )
+    parser.add_argument('input_dir', help='Input directory containing images')
+    parser.add_argument('output_dir', help='Directory to write the packed dataset to')
+    parser.add_argument('--masks-dir', '-m',
+                        help='Directory with one mask per image, matched by file name')
+    parser.add_argument('--size', '-s', nargs=2, type=int, metavar=('WIDTH', 'HEIGHT'),
+                        help='Resize every image (required if sizes differ)')
+    parser.add_argument('--extensions', nargs='+',
+                        default=['.jpg', '.jpeg', '.png', '.bmp'],
+                        help='File extensions to include')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_dir):
+        print(f"Error: Input directory not found: {args.input_dir}")
+        return 1
+
+    try:
+        dataset = pack_dataset(args.input_dir, args.output_dir,
+                               size=tuple(args.size) if args.size else None,
+                               masks_dir=args.masks_dir,
+                               file_extensions=tuple(args.extensions))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    height, width = dataset.images.shape[1:3]
+    print(f"Packed {len(dataset)} images of {width}x{height}"
+          f"{' with masks' if dataset.masks is not None else ''} into {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Reconstruct a very large image tile by tile with bounded memory
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Tiled face reconstruction for gigapixel scans, streamed to a .npy file'
+    )
+    parser.add_argument('image_path',
+                        help='Input image; .npy and uncompressed PPM/TIFF/BMP are memory-mapped')
+    parser.add_argument('output_path', help='Output .npy file (H x W x 3 uint8)')
+    parser.add_argument('--tile-size', type=int, default=1024, help='Tile edge length in pixels')
+    parser.add_argument('--mask', '-m', help='Mask file of the same size as the image')
+    parser.add_argument('--threshold', '-t', type=int, default=240,
+                        help='White mask detection threshold (0-255)')
+    parser.add_argument('--radius', type=int, default=3, help='Inpainting radius')
+
+    args = parser.parse_args()
+
+    reconstructor = FaceReconstructor({'threshold': args.threshold,
+                                       'inpaint_radius': args.radius})
+    try:
+        stats = reconstructor.process_tiled(args.image_path, args.output_path,
+                                            tile_size=args.tile_size, mask_path=args.mask)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"Inpainted {stats['inpainted_tiles']} of {stats['tiles']} tiles "
+          f"({stats['masked_pixels']} masked pixels). Result saved to {args.output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Run the local HTTP inference service for EdgeConnect Face Reconstruction
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+
+# Add the repository root to path so the src package (and its worker
+# processes) can be imported
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server import InferenceServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve face reconstruction over HTTP with a warm worker pool'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', '-p', type=int, default=8080, help='Port to bind')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='Number of worker processes (0 uses all cores)')
+    parser.add_argument('--max-queue', type=int, default=64,
+                        help='Requests accepted at once before answering 503')
+    parser.add_argument('--max-batch', type=int, default=4,
+                        help='Maximum requests sent to a worker in one batch')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--threshold', '-t', type=int, default=240,
+                        help='White mask detection threshold (0-255)')
+
+    args = parser.parse_args()
+
+    server = InferenceServer({'threshold': args.threshold}, host=args.host, port=args.port,
+                             num_workers=args.workers or None, max_queue=args.max_queue,
+                             max_batch=args.max_batch, timeout=args.timeout)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Shutting down")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
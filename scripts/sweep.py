@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep script for EdgeConnect Face Reconstruction
+
+Runs every combination of the given config values on one image, sharing
+decoded images, masks and inpainting passes between configurations.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import sys
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+# Add the repository root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.sweep import ParameterSweep, expand_grid, masked_psnr
+from src.utils import load_image, save_image
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    """Parse KEY=V1,V2,... arguments, reading each value as JSON when possible"""
+    grid = {}
+    for spec in specs:
+        key, sep, values = spec.partition('=')
+        if not sep or not values:
+            raise ValueError(f"Expected KEY=V1,V2,... but got '{spec}'")
+        parsed = []
+        for value in values.split(','):
+            try:
+                parsed.append(json.loads(value))
+            except json.JSONDecodeError:
+                parsed.append(value)
+        grid[key] = parsed
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reconstruct one image with every combination of the given parameters'
+    )
+    parser.add_argument('input', help='Input image path')
+    parser.add_argument('output_dir', help='Directory for the results and sweep.json')
+    parser.add_argument('--grid', '-g', nargs='+', required=True, metavar='KEY=V1,V2',
+                        help='Config values to sweep, e.g. threshold=230,240 edge_weight=0,0.3,0.6')
+    parser.add_argument('--mask', '-m', help='Mask file (replaces white region detection)')
+    parser.add_argument('--reference',
+                        help='Unmasked ground truth image; reports PSNR inside the mask')
+    parser.add_argument('--size', '-s', type=int, nargs=2, metavar=('WIDTH', 'HEIGHT'),
+                        help='Target size for processing')
+    parser.add_argument('--format', '-f', choices=['jpg', 'png'], default='png',
+                        help='Encoding of the reconstructed images')
+    parser.add_argument('--no-save', action='store_true',
+                        help='Only write sweep.json, not the reconstructed images')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: Input image not found: {args.input}")
+        return 1
+
+    try:
+        grid = parse_grid(args.grid)
+        base_config = {'target_size': tuple(args.size) if args.size else None}
+        sweep = ParameterSweep(args.input, mask=args.mask, base_config=base_config)
+        configs = expand_grid(grid)
+        sweep.config(dict.fromkeys(grid))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.input))[0]
+    reference = None
+    entries = []
+    start = time.perf_counter()
+    for i, overrides in enumerate(configs):
+        entry = {'index': i, 'config': overrides}
+        try:
+            results = sweep.run(overrides)
+        except ValueError as e:
+            entry['error'] = str(e)
+            entries.append(entry)
+            print(f"[{i:>4}] {overrides}: {e}")
+            continue
+
+        if args.reference:
+            if reference is None:
+                reference = load_image(args.reference, size=results['result'].shape[1::-1])
+            entry['psnr'] = masked_psnr(results['result'], reference, results['mask'])
+        if not args.no_save:
+            entry['file'] = f"{stem}_{i:04d}.{args.format}"
+            save_image(results['result'], os.path.join(args.output_dir, entry['file']))
+        entries.append(entry)
+        psnr = f"  PSNR {entry['psnr']:.2f} dB" if 'psnr' in entry else ''
+        print(f"[{i:>4}] {overrides}{psnr}")
+    elapsed = time.perf_counter() - start
+
+    with open(os.path.join(args.output_dir, 'sweep.json'), 'w') as fh:
+        json.dump({'input': args.input, 'grid': grid, 'computed': sweep.computed,
+                   'seconds': elapsed, 'results': entries}, fh, indent=2)
+
+    passes = sweep.computed['inpaint_telea'] + sweep.computed['inpaint_ns'] + sweep.computed['pyramid']
+    print(f"\n{len(configs)} configurations in {elapsed:.2f}s using {passes} inpainting "
+          f"runs and {sweep.computed['mask']} mask(s)")
+    scored = [entry for entry in entries if 'psnr' in entry]
+    if scored:
+        best = max(scored, key=lambda entry: entry['psnr'])
+        print(f"Best PSNR {best['psnr']:.2f} dB: {best['config']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
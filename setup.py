@@ -58,6 +58,7 @@ setup(
         "console_scripts": [
             "face-reconstruct=scripts.process_user_image:main",
             "face-test=scripts.test_reconstruction:main",
+            "face-serve=scripts.serve:main",
         ],
     },
     keywords="computer-vision image-inpainting face-reconstruction edge-connect deep-learning",
@@ -12,14 +12,20 @@ __version__ = "1.0.0"
 __author__ = "ABDULLAH AHMAD"
 __email__ = "your.email@example.com"
 
-from .face_reconstructor import FaceReconstructor
-from .utils import (
-    create_mask_from_white_regions,
-    canny_edge_detection,
-    edge_guided_inpainting,
-    load_image,
-    save_image
-)
+import importlib
+from typing import Any, List
+
+# Public names are resolved on first access so that importing the package
+# (for example in a freshly spawned worker) does not pay for OpenCV, NumPy
+# and PIL until they are actually used
+_LAZY_ATTRIBUTES = {
+    "FaceReconstructor": "face_reconstructor",
+    "create_mask_from_white_regions": "utils",
+    "canny_edge_detection": "utils",
+    "edge_guided_inpainting": "utils",
+    "load_image": "utils",
+    "save_image": "utils",
+}
 
 __all__ = [
     "FaceReconstructor",
@@ -28,4 +34,17 @@ __all__ = [
     "edge_guided_inpainting",
     "load_image",
     "save_image"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,132 @@
+"""
+Memory-mapped dataset format for repeated reconstruction experiments
+
+A packed dataset is a directory holding fixed-stride uint8 arrays that are
+decoded once and then memory-mapped on every access:
+
+    images.npy   N x H x W x 3 RGB images
+    masks.npy    N x H x W binary masks (only when packed with masks)
+    index.json   image names and source file names in array order, plus
+                 shape metadata
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .utils import IMAGE_EXTENSIONS, index_by_stem, load_image
+
+INDEX_FILE = 'index.json'
+IMAGES_FILE = 'images.npy'
+MASKS_FILE = 'masks.npy'
+
+
+def pack_dataset(image_dir: str, output_dir: str, size: Optional[Tuple[int, int]] = None,
+                 masks_dir: Optional[str] = None,
+                 file_extensions: Tuple[str, ...] = IMAGE_EXTENSIONS) -> 'MemmapDataset':
+    """
+    Decode an image directory (and optional masks directory) into a packed dataset
+
+    Args:
+        image_dir: Directory containing images
+        output_dir: Directory to write the packed arrays to
+        size: Resize every image to (width, height); required when the
+            images do not all share one size
+        masks_dir: Directory with one mask per image, matched by file name
+            without extension
+        file_extensions: Supported file extensions
+
+    Returns:
+        The packed dataset, opened read-only
+    """
+    images = index_by_stem(image_dir, file_extensions)
+    if not images:
+        raise ValueError(f"No image files found in {image_dir}")
+    names = sorted(images)
+
+    masks: Dict[str, str] = {}
+    if masks_dir is not None:
+        masks = index_by_stem(masks_dir, file_extensions)
+        missing = [name for name in names if name not in masks]
+        if missing:
+            raise ValueError(f"No mask in {masks_dir} for: {', '.join(missing[:10])}")
+
+    if size is None:
+        with Image.open(images[names[0]]) as first:
+            width, height = first.size
+    else:
+        width, height = size
+
+    os.makedirs(output_dir, exist_ok=True)
+    image_store = np.lib.format.open_memmap(os.path.join(output_dir, IMAGES_FILE), mode='w+',
+                                            dtype=np.uint8, shape=(len(names), height, width, 3))
+    mask_store = None
+    if masks:
+        mask_store = np.lib.format.open_memmap(os.path.join(output_dir, MASKS_FILE), mode='w+',
+                                               dtype=np.uint8, shape=(len(names), height, width))
+
+    for i, name in enumerate(names):
+        image = load_image(images[name], size=size)
+        if image.shape[:2] != (height, width):
+            raise ValueError(f"{name} is {image.shape[1]}x{image.shape[0]}, expected "
+                             f"{width}x{height}; pass size to resize")
+        image_store[i] = image
+        if mask_store is not None:
+            with Image.open(masks[name]) as mask_file:
+                mask = mask_file.convert('L')
+            if mask.size != (width, height):
+                mask = mask.resize((width, height), Image.NEAREST)
+            mask_store[i] = np.where(np.asarray(mask) > 127, 255, 0)
+
+    image_store.flush()
+    if mask_store is not None:
+        mask_store.flush()
+    with open(os.path.join(output_dir, INDEX_FILE), 'w') as fh:
+        json.dump({'names': names,
+                   'files': [os.path.basename(images[name]) for name in names],
+                   'width': width, 'height': height,
+                   'has_masks': mask_store is not None}, fh, indent=2)
+
+    return MemmapDataset(output_dir)
+
+
+class MemmapDataset:
+    """
+    Read-only view of a packed dataset
+
+    Indexing returns (name, image, mask) where image and mask are zero-copy
+    views into the memory-mapped files; mask is None when the dataset was
+    packed without masks.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, INDEX_FILE)) as fh:
+            index = json.load(fh)
+        self.path = path
+        self.names: List[str] = index['names']
+        self.files: List[str] = index['files']
+        self.images = np.load(os.path.join(path, IMAGES_FILE), mmap_mode='r')
+        self.masks = (np.load(os.path.join(path, MASKS_FILE), mmap_mode='r')
+                      if index['has_masks'] else None)
+        self._positions: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, i: int) -> Tuple[str, np.ndarray, Optional[np.ndarray]]:
+        mask = self.masks[i] if self.masks is not None else None
+        return self.names[i], self.images[i], mask
+
+    def __iter__(self) -> Iterator[Tuple[str, np.ndarray, Optional[np.ndarray]]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def index_of(self, name: str) -> int:
+        """Position of an image by its file name without extension"""
+        return self._positions[name]
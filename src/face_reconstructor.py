@@ -6,18 +6,145 @@ License: MIT
 """
 
 import os
+import multiprocessing
+from collections.abc import MutableMapping
+from functools import partial
 import numpy as np
 import cv2
-from PIL import Image
-from typing import Tuple, Optional, Dict, Any
-import matplotlib.pyplot as plt
+from typing import (Tuple, Optional, Dict, Any, List, Iterable, Iterator, Callable, Mapping,
+                    Sequence, Union)
 
 from .utils import (
+    IMAGE_EXTENSIONS,
+    as_mask_array,
+    as_rgb_array,
+    decode_image,
+    decode_mask,
+    encode_image,
+    index_by_stem,
+    limit_opencv_threads,
     load_image,
+    load_mask,
+    may_have_white_regions,
     save_image,
     create_mask_from_white_regions,
-    edge_guided_inpainting
+    detect_white_regions,
+    edge_guided_inpainting,
+    edge_maps,
+    StageTimer,
+    no_timer
 )
+from .dataset import MemmapDataset
+from .instrumentation import Instrumentation, StageRecord
+from .manifest import BatchManifest, hash_config
+from .pipeline import BoundedWriter, prefetch, thread_map
+from .sequence import TemporalInpainter, iter_frames
+from .tiling import RasterFile, tile_grid, tile_halo
+from .work_queue import WorkQueue
+
+# Result files written by _save_results and the supported encodings
+ARTIFACTS = ('reconstructed', 'mask', 'edges', 'comparison')
+OUTPUT_FORMATS = ('jpg', 'jpeg', 'png', 'webp', 'npy')
+
+# Worker kinds for batch_process with more than one worker
+EXECUTORS = ('process', 'thread')
+
+# Outcome of batch images skipped because the prescan found no white pixels
+PRESCAN_REJECTED = 'no white regions (rejected by prescan)'
+
+# Path, error message and stage timings a pool worker sends back per image
+WorkerOutcome = Tuple[str, Optional[str], List[StageRecord]]
+
+# Per-process reconstructor used by batch_process worker pools
+_worker_reconstructor: Optional['FaceReconstructor'] = None
+
+
+def _init_worker(config: Dict[str, Any], instrumented: bool = False,
+                 opencv_threads: Optional[int] = None) -> None:
+    """Build the reconstructor once per worker process"""
+    global _worker_reconstructor
+    if opencv_threads is not None:
+        # Each worker otherwise starts one OpenCV thread per core
+        cv2.setNumThreads(opencv_threads)
+    # Records are buffered until they are sent back with each task's outcome
+    instrumentation = Instrumentation(buffer_records=True) if instrumented else None
+    _worker_reconstructor = FaceReconstructor(config, instrumentation=instrumentation)
+
+
+def _process_file_in_worker(task: Tuple[str, str, Optional[str], bool]) -> WorkerOutcome:
+    """Process one file inside a pool worker, returning its stage timings"""
+    image_path, output_dir, mask_path, prescan = task
+    reconstructor = _worker_reconstructor
+    assert reconstructor is not None, "worker pool was started without _init_worker"
+    error = reconstructor._process_file(image_path, output_dir, mask_path, prescan)
+    instrumentation = reconstructor.instrumentation
+    return image_path, error, instrumentation.drain() if instrumentation else []
+
+
+class ReconstructionResults(MutableMapping):
+    """
+    Results mapping that computes 'edges' and 'edges_dilated' on first access
+
+    The edge maps do not influence the reconstruction, so runs that never
+    look at them skip the blur, Canny and dilation passes. The lazy keys
+    are part of ``keys()`` and ``len()`` like stored ones; anything that
+    reads every value (``dict(results)``, ``copy``, pickling) computes them.
+    Until then the results keep the image the edges are derived from
+    alive, e.g. the grayscale from mask detection.
+    """
+
+    LAZY_KEYS = ('edges', 'edges_dilated')
+
+    def __init__(self, results: Dict[str, Any],
+                 compute_edges: Optional[Callable[[], Tuple[np.ndarray, np.ndarray]]] = None):
+        self._data = dict(results)
+        self._compute_edges = compute_edges
+
+    def _lazy_keys(self) -> List[str]:
+        if self._compute_edges is None:
+            return []
+        return [key for key in self.LAZY_KEYS if key not in self._data]
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._data:
+            return self._data[key]
+        compute_edges = self._compute_edges
+        if compute_edges is None or key not in self.LAZY_KEYS:
+            raise KeyError(key)
+        edges, edges_dilated = compute_edges()
+        self._compute_edges = None
+        self._data.setdefault('edges', edges)
+        self._data.setdefault('edges_dilated', edges_dilated)
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._lazy_keys():
+            self.__getitem__(key)  # Computes both maps, keeping the other
+        del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._data)
+        yield from self._lazy_keys()
+
+    def __len__(self) -> int:
+        return len(self._data) + len(self._lazy_keys())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data or key in self._lazy_keys()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({sorted(self)})"
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Any]]]:
+        # The edge closure cannot be pickled, so the edges are sent computed
+        return type(self), (dict(self),)
+
+    def copy(self) -> 'ReconstructionResults':
+        """Shallow copy with the edges computed"""
+        return type(self)(dict(self))
 
 
 class FaceReconstructor:
@@ -25,14 +152,24 @@ class FaceReconstructor:
     Main class for EdgeConnect-inspired face reconstruction
     """
 
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 instrumentation: Optional[Instrumentation] = None):
         """
         Initialize the FaceReconstructor
 
         Args:
-            config: Configuration dictionary with parameters
+            config: Configuration dictionary with parameters. Missing keys
+                fall back to the defaults.
+            instrumentation: Optional collector for per-stage timings
         """
-        self.config = config or self._get_default_config()
+        self.config = self._get_default_config()
+        self.config.update(config or {})
+        self.instrumentation = instrumentation
+
+    @property
+    def _timer(self) -> StageTimer:
+        """Stage timer passed to the utils functions"""
+        return self.instrumentation.stage if self.instrumentation else no_timer
 
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default configuration"""
@@ -41,15 +178,29 @@ class FaceReconstructor:
             'edge_sigma': 2,
             'edge_weight': 0.3,
             'inpaint_radius': 3,
+            'inpaint_method': 'blend',
+            'roi_inpainting': False,
+            'pyramid_levels': 0,
+            'pyramid_band': 8,
             'target_size': None,
+            'fast_decode': True,
+            'resample': 'lanczos',
             'save_intermediate': True,
             'output_format': 'jpg',
-            'output_quality': 95
+            'output_quality': 95,
+            'save_artifacts': ARTIFACTS,
+            'optimize_output': True,
+            'png_compression': 6
         }
 
+    def _decode_options(self) -> Dict[str, Any]:
+        """Keyword arguments for load_image and decode_image from the config"""
+        return {'draft': self.config['fast_decode'], 'resample': self.config['resample']}
+
     def process_image(self, image_path: str, output_dir: str = './output',
                      mask_threshold: Optional[int] = None,
-                     target_size: Optional[Tuple[int, int]] = None) -> Dict[str, np.ndarray]:
+                     target_size: Optional[Tuple[int, int]] = None,
+                     mask_path: Optional[str] = None) -> ReconstructionResults:
         """
         Process a single image with face reconstruction
 
@@ -58,72 +209,353 @@ class FaceReconstructor:
             output_dir: Output directory
             mask_threshold: Override mask detection threshold
             target_size: Target size for processing (width, height)
+            mask_path: Mask file to use instead of detecting white regions;
+                pixels brighter than 127 are inpainted
 
         Returns:
-            Dictionary containing results
+            ReconstructionResults mapping
         """
         # Load image
         size = target_size or self.config.get('target_size')
-        image = load_image(image_path, size=size)
+        image = load_image(image_path, size=size, timer=self._timer, **self._decode_options())
+
+        mask = load_mask(mask_path, image.shape[:2]) if mask_path else None
+        results = self._reconstruct(image, mask_threshold, mask=mask)
+
+        # Save results if requested
+        if self.config['save_intermediate']:
+            self._save_results(image_path, results, output_dir)
+
+        return results
+
+    def process_array(self, image: np.ndarray, mask: Optional[np.ndarray] = None,
+                      mask_threshold: Optional[int] = None,
+                      output_format: Optional[str] = None) -> ReconstructionResults:
+        """
+        Reconstruct an in-memory RGB image without touching the disk
+
+        A C-contiguous uint8 RGB array is used as it is, without a copy;
+        other layouts are converted once (see as_rgb_array). Nothing is saved,
+        whatever save_intermediate says.
+
+        Args:
+            image: RGB image array
+            mask: Optional mask of the image's height and width to inpaint
+                instead of detecting white regions; nonzero pixels are
+                inpainted
+            mask_threshold: Override mask detection threshold
+            output_format: Also encode the result as 'png', 'jpg' or 'webp'
+                bytes under results['encoded']
+
+        Returns:
+            ReconstructionResults mapping
+        """
+        image = as_rgb_array(image)
+        if mask is not None:
+            mask = as_mask_array(mask, image.shape[:2])
+        results = self._reconstruct(image, mask_threshold, mask=mask)
+        if output_format is not None:
+            with self._timer('encode', image.shape[0] * image.shape[1]):
+                results['encoded'] = encode_image(results['result'], output_format,
+                                                  self.config['output_quality'])
+        return results
+
+    def process_bytes(self, data: bytes, mask_data: Optional[bytes] = None,
+                      mask_threshold: Optional[int] = None,
+                      output_format: Optional[str] = None,
+                      target_size: Optional[Tuple[int, int]] = None) -> ReconstructionResults:
+        """
+        Reconstruct an encoded image held in memory, e.g. a request body
+
+        Args:
+            data: Encoded image bytes in any format PIL reads
+            mask_data: Optional encoded mask of the same size; pixels
+                brighter than 127 are inpainted. It is resized along with
+                the image when a target size applies.
+            mask_threshold: Override mask detection threshold
+            output_format: Also encode the result under results['encoded']
+            target_size: Target size for processing (width, height)
+
+        Returns:
+            ReconstructionResults mapping
+        """
+        size = target_size or self.config.get('target_size')
+        image = decode_image(data, size=size, **self._decode_options())
+        mask = None
+        if mask_data:
+            mask = decode_mask(mask_data, image.shape[:2], resize=bool(size))
+        return self.process_array(image, mask, mask_threshold, output_format)
+
+    def process_dataset(self, dataset: Union[str, MemmapDataset], output_dir: str = './output',
+                        indices: Optional[Sequence[int]] = None,
+                        use_masks: bool = True) -> Iterator[Tuple[str, ReconstructionResults]]:
+        """
+        Reconstruct images straight from a packed dataset, skipping decode
+
+        Args:
+            dataset: MemmapDataset or the directory written by pack_dataset
+            output_dir: Directory to save results
+            indices: Positions to process; all images when None
+            use_masks: Use the packed masks instead of detecting white regions
+
+        Yields:
+            (name, results) per image, where results['original'] is a
+            read-only view into the dataset
+        """
+        if isinstance(dataset, str):
+            dataset = MemmapDataset(dataset)
 
-        # Get threshold
-        threshold = mask_threshold or self.config['threshold']
+        for i in (range(len(dataset)) if indices is None else indices):
+            name, image, mask = dataset[i]
+            results = self._reconstruct(image, mask=mask if use_masks else None)
 
-        # Create mask from white regions
-        mask = create_mask_from_white_regions(image, threshold=threshold)
+            if self.config['save_intermediate']:
+                self._save_results(dataset.files[i], results, output_dir)
 
-        # Check if mask was detected
-        if np.sum(mask) == 0:
-            raise ValueError(f"No white regions detected with threshold {threshold}")
+            yield name, results
 
-        # Perform edge-guided inpainting
-        result, edges, edges_dilated = edge_guided_inpainting(
+    def process_sequence(self, source: str, output_dir: str = './output',
+                         tolerance: float = 2.0) -> Iterator[Tuple[str, ReconstructionResults]]:
+        """
+        Reconstruct the frames of a video file or image directory in order
+
+        White regions are detected in every frame, but a mask region is only
+        inpainted again when it changed or the pixels around it changed by
+        more than ``tolerance`` (mean absolute difference in 8-bit levels);
+        otherwise the previous frame's fill is reused. See TemporalInpainter.
+        Frames without white regions are passed through unchanged.
+
+        Args:
+            source: Video file or directory of frames ordered by file name
+            output_dir: Directory to save results
+            tolerance: Change allowed before a region is inpainted again;
+                negative inpaints every frame in full
+
+        Yields:
+            (name, results) per frame
+        """
+        inpainter = TemporalInpainter(
+            tolerance,
+            inpaint_radius=self.config['inpaint_radius'],
+            edge_weight=self.config['edge_weight'],
+            method=self.config['inpaint_method'],
+            pyramid_levels=self.config['pyramid_levels'],
+            pyramid_band=self.config['pyramid_band'],
+            timer=self._timer
+        )
+        sigma, timer = self.config['edge_sigma'], self._timer
+
+        for name, frame in iter_frames(source, self.config.get('target_size')):
+            with timer('mask', frame.shape[0] * frame.shape[1]):
+                gray, mask, components = detect_white_regions(frame, self.config['threshold'])
+            result = inpainter.inpaint(frame, mask, components)
+            results = ReconstructionResults({
+                'original': frame,
+                'mask': mask,
+                'result': result
+            }, partial(edge_maps, gray, mask, sigma, timer))
+
+            if self.config['save_intermediate']:
+                self._save_results(name, results, output_dir)
+
+            yield name, results
+
+    def process_many(self, images: Iterable[np.ndarray],
+                     masks: Optional[Iterable[Optional[np.ndarray]]] = None,
+                     num_workers: Optional[int] = None,
+                     opencv_threads: Optional[int] = None) -> List[ReconstructionResults]:
+        """
+        Reconstruct in-memory RGB images concurrently on a thread pool
+
+        OpenCV releases the GIL while it works, so threads share this
+        reconstructor and the input arrays without pickling or copying them.
+        Nothing is saved to disk.
+
+        Args:
+            images: RGB images, accepted in the layouts process_array takes
+            masks: Optional mask per image (None entries detect white
+                regions), accepted like the mask of process_array
+            num_workers: Number of threads (None or 0 uses all cores)
+            opencv_threads: OpenCV's internal thread count while running;
+                defaults to the cores left per worker thread
+
+        Returns:
+            ReconstructionResults mappings in input order
+        """
+        images = list(images)
+        masks = list(masks) if masks is not None else [None] * len(images)
+        if len(masks) != len(images):
+            raise ValueError(f"Got {len(masks)} masks for {len(images)} images")
+
+        num_workers, opencv_threads = self._thread_counts(num_workers, opencv_threads)
+        with limit_opencv_threads(opencv_threads):
+            return list(thread_map(lambda pair: self.process_array(*pair),
+                                   zip(images, masks), num_workers))
+
+    @staticmethod
+    def _thread_counts(num_workers: Optional[int],
+                       opencv_threads: Optional[int]) -> Tuple[int, int]:
+        """Resolve worker and OpenCV thread counts so they do not oversubscribe"""
+        cores = os.cpu_count() or 1
+        if num_workers is None or num_workers <= 0:
+            num_workers = cores
+        if opencv_threads is None:
+            opencv_threads = max(1, cores // num_workers)
+        return num_workers, opencv_threads
+
+    def process_tiled(self, image_path: str, output_path: str, tile_size: int = 1024,
+                      mask_path: Optional[str] = None,
+                      mask_threshold: Optional[int] = None) -> Dict[str, int]:
+        """
+        Reconstruct a very large image tile by tile with bounded memory
+
+        The image is read in tiles overlapping by tile_halo pixels. Tiles
+        without masked pixels are copied through, and the result is streamed
+        into an H x W x 3 ``.npy`` file, so peak memory scales with the tile
+        size as long as the input can be memory-mapped (see
+        RasterFile.open). A hole that does not fit inside one padded tile
+        is filled per tile and may show seams; pick tile_size well above the
+        largest hole.
+
+        Args:
+            image_path: Path to input image (.npy, or any format PIL reads)
+            output_path: .npy file to write the reconstructed image to
+            tile_size: Edge length of the tiles each process call covers
+            mask_path: Mask file of the same size to use instead of
+                detecting white regions
+            mask_threshold: Override mask detection threshold
+
+        Returns:
+            Counts of 'tiles', 'inpainted_tiles' and 'masked_pixels'
+        """
+        if not output_path.lower().endswith('.npy'):
+            raise ValueError(f"Tiled output is streamed to a .npy file, got {output_path}")
+
+        source = RasterFile.open(image_path, 'RGB')
+        height, width = source.shape[:2]
+        mask_source = RasterFile.open(mask_path, 'L') if mask_path else None
+        if mask_source is not None and mask_source.shape != (height, width):
+            raise ValueError(f"Mask size {mask_source.shape[::-1]} does not match image size "
+                             f"{(width, height)}")
+
+        threshold = self.config['threshold'] if mask_threshold is None else mask_threshold
+        halo = tile_halo(self.config['inpaint_radius'], self.config['edge_sigma'],
+                         self.config['pyramid_levels'])
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        output = RasterFile.create_npy(output_path, (height, width, 3))
+        stats = {'tiles': 0, 'inpainted_tiles': 0, 'masked_pixels': 0}
+        for padded, core, inner in tile_grid(height, width, tile_size, halo):
+            tile = source.read(*padded)
+            if mask_source is None:
+                with self._timer('mask', tile.shape[0] * tile.shape[1]):
+                    mask = create_mask_from_white_regions(tile, threshold=threshold)
+            else:
+                mask = np.where(mask_source.read(*padded) > 127, 255, 0).astype(np.uint8)
+
+            stats['tiles'] += 1
+            masked = int(np.count_nonzero(mask[inner]))
+            if masked == 0:
+                output.write(*core, tile[inner])
+            else:
+                output.write(*core, self._reconstruct(tile, mask=mask)['result'][inner])
+                stats['inpainted_tiles'] += 1
+                stats['masked_pixels'] += masked
+
+        return stats
+
+    def _reconstruct(self, image: np.ndarray, mask_threshold: Optional[int] = None,
+                     mask: Optional[np.ndarray] = None) -> ReconstructionResults:
+        """Run mask detection (unless a mask is given) and inpainting on an RGB image"""
+        gray, components = image, None
+        if mask is None:
+            # Get threshold
+            threshold = self.config['threshold'] if mask_threshold is None else mask_threshold
+
+            # Create mask from white regions; the grayscale image is reused
+            # for edges and the components for ROI crops
+            with self._timer('mask', image.shape[0] * image.shape[1]):
+                gray, mask, components = detect_white_regions(
+                    image, threshold, components=self.config['roi_inpainting'])
+
+            # Check if mask was detected
+            if cv2.countNonZero(mask) == 0:
+                raise ValueError(f"No white regions detected with threshold {threshold}")
+
+        # Perform edge-guided inpainting; edges are computed when first read
+        result, _, _ = edge_guided_inpainting(
             image, mask,
             sigma=self.config['edge_sigma'],
             edge_weight=self.config['edge_weight'],
-            inpaint_radius=self.config['inpaint_radius']
+            inpaint_radius=self.config['inpaint_radius'],
+            roi=self.config['roi_inpainting'],
+            method=self.config['inpaint_method'],
+            timer=self._timer,
+            pyramid_levels=self.config['pyramid_levels'],
+            pyramid_band=self.config['pyramid_band'],
+            compute_edges=False,
+            components=components
         )
 
-        # Save results if requested
-        if self.config['save_intermediate']:
-            self._save_results(image_path, image, mask, edges, result, output_dir)
-
-        return {
+        sigma, timer = self.config['edge_sigma'], self._timer
+        return ReconstructionResults({
             'original': image,
             'mask': mask,
-            'edges': edges,
-            'edges_dilated': edges_dilated,
             'result': result
-        }
+        }, lambda: edge_maps(gray, mask, sigma, timer))
 
-    def _save_results(self, image_path: str, image: np.ndarray, mask: np.ndarray,
-                     edges: np.ndarray, result: np.ndarray, output_dir: str) -> None:
-        """Save all results to files"""
+    def _save_results(self, image_path: str, results: ReconstructionResults,
+                      output_dir: str) -> None:
+        """Save the configured artifacts to files"""
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
 
-        # Generate base filename
-        base_name = os.path.splitext(os.path.basename(image_path))[0]
+        paths = self._output_paths(image_path, output_dir)
+
+        def save(name: str, data: np.ndarray) -> None:
+            with self._timer('encode', data.shape[0] * data.shape[1]):
+                save_image(data, paths[name],
+                           quality=self.config['output_quality'],
+                           optimize=self.config['optimize_output'],
+                           compress_level=self.config['png_compression'])
 
         # Save individual results
-        save_image(result, os.path.join(output_dir, f"{base_name}_reconstructed.jpg"),
-                  quality=self.config['output_quality'])
-        save_image(mask, os.path.join(output_dir, f"{base_name}_mask.jpg"))
-        save_image(edges, os.path.join(output_dir, f"{base_name}_edges.jpg"))
+        if 'reconstructed' in paths:
+            save('reconstructed', results['result'])
+        if 'mask' in paths:
+            save('mask', results['mask'])
+        if 'edges' in paths:
+            save('edges', results['edges'])
 
         # Create and save comparison
-        comparison = np.hstack([image, result])
-        save_image(comparison, os.path.join(output_dir, f"{base_name}_comparison.jpg"))
+        if 'comparison' in paths:
+            save('comparison', np.hstack([results['original'], results['result']]))
 
-    def visualize_results(self, results: Dict[str, np.ndarray],
+    def _output_paths(self, image_path: str, output_dir: str) -> Dict[str, str]:
+        """Map each configured artifact to the file it is saved to"""
+        extension = self.config['output_format'].lower()
+        if extension not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{extension}', expected one of {OUTPUT_FORMATS}")
+
+        # Generate base filename
+        base_name = os.path.splitext(os.path.basename(image_path))[0]
+        return {
+            name: os.path.join(output_dir, f"{base_name}_{name}.{extension}")
+            for name in ARTIFACTS if name in self.config['save_artifacts']
+        }
+
+    def visualize_results(self, results: Mapping[str, Any],
                          figsize: Tuple[int, int] = (15, 10)) -> None:
         """
         Visualize reconstruction results
 
         Args:
-            results: Results dictionary from process_image
+            results: Results mapping from process_image
             figsize: Figure size for matplotlib
         """
+        # Imported here so headless runs never load matplotlib
+        import matplotlib.pyplot as plt
+
         fig, axes = plt.subplots(2, 3, figsize=figsize)
 
         # Original image
@@ -161,7 +593,18 @@ class FaceReconstructor:
         plt.show()
 
     def batch_process(self, input_dir: str, output_dir: str,
-                     file_extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.bmp')) -> None:
+                     file_extensions: Tuple[str, ...] = IMAGE_EXTENSIONS,
+                     num_workers: Optional[int] = 1, chunk_size: int = 1,
+                     ordered: bool = True, prefetch_depth: int = 0,
+                     writer_threads: int = 0,
+                     max_pending_writes: Optional[int] = None,
+                     resume: bool = False, mask_dir: Optional[str] = None,
+                     mask_map: Optional[Dict[str, str]] = None,
+                     executor: str = 'process',
+                     opencv_threads: Optional[int] = None,
+                     prescan: bool = False, shard_queue: Optional[str] = None,
+                     worker_id: Optional[str] = None,
+                     lease_seconds: float = 60.0) -> None:
         """
         Process multiple images in a directory
 
@@ -169,9 +612,52 @@ class FaceReconstructor:
             input_dir: Input directory containing images
             output_dir: Output directory for results
             file_extensions: Supported file extensions
+            num_workers: Number of workers (None or 0 uses all cores).
+                Each worker process builds its own reconstructor once.
+            chunk_size: Number of files handed to a worker at a time
+            ordered: Report results in input order instead of completion order
+            prefetch_depth: Decode up to this many images ahead on a background
+                thread (single-process runs)
+            writer_threads: Encode and write results on this many background
+                threads (single-process runs)
+            max_pending_writes: Maximum number of results waiting to be written
+                before compute blocks; defaults to twice the writer threads
+            resume: Skip images whose content, configuration and outputs are
+                unchanged since a previous run, as recorded in a manifest in
+                the output directory
+            mask_dir: Directory of mask files paired with images by file name
+                without extension
+            mask_map: Mapping from image file name (with or without
+                extension) to mask path; takes precedence over mask_dir.
+                Images without a mask fall back to white region detection.
+            executor: 'process' runs workers as a process pool, 'thread'
+                as threads sharing this reconstructor, which avoids pickling
+                and per-process memory
+            opencv_threads: OpenCV's internal thread count per worker
+                process, or in thread mode for the whole process; defaults
+                to the cores left per worker
+            prescan: Skip images without a mask file whose luma has no pixel
+                near the white threshold before the full decode (see
+                may_have_white_regions); they are counted separately in the
+                summary and never include an image the full path would
+                reconstruct
+            shard_queue: Share the batch with other workers through this
+                SQLite queue file (or a directory to hold it), e.g. on a
+                shared filesystem. Each worker, on any host, runs the same
+                command and claims images until none are pending or
+                leased by another worker; images leased by a worker that
+                stopped heartbeating are claimed again once the lease
+                expires. Workers in this mode are
+                threads; start more processes for more parallelism.
+            worker_id: Name of this worker in the queue; defaults to host
+                name and process id
+            lease_seconds: How long a claimed image stays reserved without
+                a heartbeat
         """
         if not os.path.exists(input_dir):
             raise FileNotFoundError(f"Input directory not found: {input_dir}")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
 
         # Find all image files
         image_files = []
@@ -183,18 +669,217 @@ class FaceReconstructor:
             print(f"No image files found in {input_dir}")
             return
 
-        print(f"Found {len(image_files)} images to process...")
+        mask_paths = self._match_masks(image_files, mask_dir, mask_map, file_extensions)
+        manifest_config = self.config
+        if mask_dir is not None or mask_map is not None:
+            print(f"Using mask files for {len(mask_paths)} of {len(image_files)} images")
+            # Mask sources count as configuration; editing a mask file in
+            # place is not detected on resume
+            manifest_config = dict(self.config, mask_dir=mask_dir, mask_map=mask_map)
+        manifest = BatchManifest(output_dir, manifest_config) if resume else None
+        if manifest is not None:
+            total = len(image_files)
+            image_files = [
+                image_path for image_path in image_files
+                if not manifest.is_current(image_path,
+                                           self._output_paths(image_path, output_dir).values())
+            ]
+            print(f"Skipping {total - len(image_files)} unchanged images")
+            if not image_files:
+                print(f"Nothing to do. Results are up to date in {output_dir}")
+                return
 
-        # Process each image
-        for i, image_path in enumerate(image_files, 1):
-            try:
-                print(f"Processing {i}/{len(image_files)}: {os.path.basename(image_path)}")
-                self.process_image(image_path, output_dir)
-                print(f"✓ Completed: {os.path.basename(image_path)}")
-            except Exception as e:
-                print(f"✗ Error processing {os.path.basename(image_path)}: {e}")
+        print(f"Found {len(image_files)} images to process...")
+        on_success = manifest.record if manifest is not None else None
+
+        if num_workers is None or num_workers <= 0:
+            num_workers = os.cpu_count() or 1
+        num_workers = min(num_workers, len(image_files))
+
+        if shard_queue is not None:
+            queue = WorkQueue(shard_queue, worker_id=worker_id, lease_seconds=lease_seconds,
+                              job=hash_config(manifest_config))
+            added = queue.add(os.path.basename(image_path) for image_path in image_files)
+            print(f"Worker {queue.worker_id} sharing queue {queue.path} ({added} new images)")
+            outcomes = self._claim_outcomes(queue, input_dir, output_dir, mask_paths,
+                                            prescan, num_workers, opencv_threads)
+            self._report_progress(outcomes, len(image_files), on_success)
+            counts = queue.counts()
+            print("Queue: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+        elif num_workers == 1 and (prefetch_depth > 0 or writer_threads > 0):
+            outcomes = self._stream_outcomes(image_files, output_dir, prefetch_depth,
+                                             writer_threads, max_pending_writes, mask_paths,
+                                             prescan)
+            self._report_progress(outcomes, len(image_files), on_success)
+        elif num_workers == 1:
+            outcomes = (
+                (image_path, self._process_file(image_path, output_dir,
+                                                mask_paths.get(image_path), prescan))
+                for image_path in image_files
+            )
+            self._report_progress(outcomes, len(image_files), on_success)
+        elif executor == 'thread':
+            print(f"Using {num_workers} worker threads")
+            num_workers, opencv_threads = self._thread_counts(num_workers, opencv_threads)
+            with limit_opencv_threads(opencv_threads):
+                outcomes = thread_map(
+                    lambda image_path: (image_path, self._process_file(
+                        image_path, output_dir, mask_paths.get(image_path), prescan)),
+                    image_files, num_workers, ordered)
+                self._report_progress(outcomes, len(image_files), on_success)
+        else:
+            print(f"Using {num_workers} worker processes")
+            num_workers, opencv_threads = self._thread_counts(num_workers, opencv_threads)
+            tasks = [(image_path, output_dir, mask_paths.get(image_path), prescan)
+                     for image_path in image_files]
+            with multiprocessing.Pool(num_workers, initializer=_init_worker,
+                                      initargs=(self.config, self.instrumentation is not None,
+                                                opencv_threads)) as pool:
+                imap = pool.imap if ordered else pool.imap_unordered
+                worker_outcomes = imap(_process_file_in_worker, tasks,
+                                       chunksize=max(1, chunk_size))
+                self._report_progress(self._collect_worker_timings(worker_outcomes),
+                                      len(image_files), on_success)
 
         print(f"Batch processing completed. Results saved to {output_dir}")
+        if self.instrumentation is not None:
+            print(self.instrumentation.format_summary())
+
+    def _collect_worker_timings(self, outcomes: Iterable[WorkerOutcome]
+                                ) -> Iterator[Tuple[str, Optional[str]]]:
+        """Merge stage timings sent back by pool workers"""
+        for image_path, error, records in outcomes:
+            if self.instrumentation is not None:
+                self.instrumentation.extend(records)
+            yield image_path, error
+
+    @staticmethod
+    def _match_masks(image_files: List[str], mask_dir: Optional[str],
+                     mask_map: Optional[Dict[str, str]],
+                     file_extensions: Tuple[str, ...]) -> Dict[str, str]:
+        """Pair image paths with mask files from a mapping or a mask directory"""
+        by_stem = index_by_stem(mask_dir, file_extensions) if mask_dir else {}
+        mask_map = mask_map or {}
+
+        mask_paths = {}
+        for image_path in image_files:
+            file = os.path.basename(image_path)
+            stem = os.path.splitext(file)[0]
+            mask_path = mask_map.get(file) or mask_map.get(stem) or by_stem.get(stem)
+            if mask_path:
+                mask_paths[image_path] = mask_path
+        return mask_paths
+
+    def _process_file(self, image_path: str, output_dir: str,
+                      mask_path: Optional[str] = None, prescan: bool = False) -> Optional[str]:
+        """Process one file, returning an error message instead of raising"""
+        try:
+            if prescan and mask_path is None and not self._prescan(image_path):
+                return PRESCAN_REJECTED
+            self.process_image(image_path, output_dir, mask_path=mask_path)
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _claim_outcomes(self, queue: WorkQueue, input_dir: str, output_dir: str,
+                        mask_paths: Dict[str, str], prescan: bool, num_workers: int,
+                        opencv_threads: Optional[int]) -> Iterator[Tuple[str, Optional[str]]]:
+        """Process images claimed from a shared work queue until none are left"""
+        def run(item: str) -> Tuple[str, Optional[str]]:
+            image_path = os.path.join(input_dir, item)
+            error = self._process_file(image_path, output_dir, mask_paths.get(image_path), prescan)
+            if error is None or error == PRESCAN_REJECTED:
+                queue.complete(item)
+            else:
+                queue.fail(item, error)
+            return image_path, error
+
+        with queue.heartbeat():
+            # Claim lazily so that at most one image per thread is leased
+            claims = queue.claims()
+            if num_workers == 1:
+                yield from map(run, claims)
+                return
+            num_workers, opencv_threads = self._thread_counts(num_workers, opencv_threads)
+            with limit_opencv_threads(opencv_threads):
+                yield from thread_map(run, claims, num_workers, ordered=False,
+                                      max_pending=num_workers)
+
+    def _stream_outcomes(self, image_files: List[str], output_dir: str,
+                         prefetch_depth: int, writer_threads: int,
+                         max_pending_writes: Optional[int],
+                         mask_paths: Optional[Dict[str, str]] = None,
+                         prescan: bool = False) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Decode, reconstruct and write as a three-stage pipeline
+
+        Decoded images wait in a bounded prefetch queue and finished results
+        in a bounded writer queue, so at most about
+        ``prefetch_depth + max_pending_writes + 1`` images are held at once.
+        """
+        size = self.config.get('target_size')
+        decode_options = self._decode_options()
+        mask_paths = mask_paths or {}
+
+        def load(path: str) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+            mask_path = mask_paths.get(path)
+            if prescan and mask_path is None and not self._prescan(path):
+                return None
+            image = load_image(path, size=size, timer=self._timer, **decode_options)
+            return image, load_mask(mask_path, image.shape[:2]) if mask_path else None
+
+        decoded = prefetch(image_files, load, prefetch_depth)
+
+        with BoundedWriter(writer_threads, max_pending_writes) as writer:
+            for image_path, loaded, error in decoded:
+                if error is not None:
+                    yield image_path, str(error)
+                    continue
+                if loaded is None:
+                    yield image_path, PRESCAN_REJECTED
+                    continue
+                image, mask = loaded
+                try:
+                    results = self._reconstruct(image, mask=mask)
+                except Exception as e:
+                    yield image_path, str(e)
+                    continue
+
+                if not self.config['save_intermediate']:
+                    yield image_path, None
+                    continue
+                yield from writer.submit(image_path, self._save_results, image_path,
+                                         results, output_dir)
+            yield from writer.drain()
+
+    def _prescan(self, image_path: str) -> bool:
+        """Whether white region detection may find anything in the file"""
+        return may_have_white_regions(image_path, self.config['threshold'],
+                                      size=self.config.get('target_size'),
+                                      timer=self._timer, **self._decode_options())
+
+    @staticmethod
+    def _report_progress(outcomes: Iterable[Tuple[str, Optional[str]]], total: int,
+                         on_success: Optional[Callable[[str], None]] = None) -> List[str]:
+        """Print per-file status and a run summary, returning failed paths"""
+        failed = []
+        completed = rejected = 0
+        for i, (image_path, error) in enumerate(outcomes, 1):
+            name = os.path.basename(image_path)
+            if error is None:
+                if on_success is not None:
+                    on_success(image_path)
+                completed += 1
+                print(f"✓ Completed {i}/{total}: {name}")
+            elif error == PRESCAN_REJECTED:
+                rejected += 1
+                print(f"- Skipped {i}/{total}: {name}: {error}")
+            else:
+                print(f"✗ Error processing {name}: {error}")
+                failed.append(image_path)
+        print(f"Summary: {completed} completed, {rejected} rejected by prescan, "
+              f"{len(failed)} failed")
+        return failed
 
     def update_config(self, **kwargs) -> None:
         """Update configuration parameters"""
@@ -0,0 +1,191 @@
+"""
+Per-stage timing instrumentation for the reconstruction pipeline
+
+An ``Instrumentation`` instance times each executed stage (prescan,
+decode, resize, mask, canny, inpaint_telea, inpaint_ns, blend, pyramid,
+temporal, encode) as a ``StageRecord``, forwards it to any registered hooks
+and folds it into bounded per-stage aggregates, so memory does not grow
+with the number of images. Its ``stage`` method is the timer accepted by
+the ``timer`` argument of the utils functions.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+# Wall times kept per stage for percentiles; exact up to this many executions
+RESERVOIR_SIZE = 1024
+
+
+class StageRecord(NamedTuple):
+    """Timing of one executed stage"""
+    name: str
+    wall: float  # Seconds
+    cpu: float  # Process CPU seconds, includes other threads running meanwhile
+    pixels: int
+
+
+Hook = Callable[[StageRecord], None]
+
+
+def logging_hook(logger: Optional[logging.Logger] = None,
+                 level: int = logging.INFO) -> Hook:
+    """Hook that logs each stage as a single-line JSON object"""
+    logger = logger or logging.getLogger('edge_connect.stages')
+
+    def hook(record: StageRecord) -> None:
+        logger.log(level, json.dumps({
+            'stage': record.name,
+            'wall_ms': round(record.wall * 1000, 3),
+            'cpu_ms': round(record.cpu * 1000, 3),
+            'pixels': record.pixels,
+        }))
+
+    return hook
+
+
+class _StageStats:
+    """Running totals of one stage and a uniform reservoir sample of wall times"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall_total = 0.0
+        self.cpu_total = 0.0
+        self.pixels_total = 0
+        self.walls: List[float] = []
+
+    def add(self, record: StageRecord, rng: random.Random) -> None:
+        self.count += 1
+        self.wall_total += record.wall
+        self.cpu_total += record.cpu
+        self.pixels_total += record.pixels
+        if len(self.walls) < RESERVOIR_SIZE:
+            self.walls.append(record.wall)
+        else:
+            slot = rng.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.walls[slot] = record.wall
+
+
+class Instrumentation:
+    """
+    Collects stage timings and aggregates them into percentiles
+
+    Counts and totals are exact; percentiles come from a reservoir of
+    RESERVOIR_SIZE wall times per stage. With ``buffer_records`` the raw
+    records are also kept until ``drain``, which is how pool workers hand
+    their timings to the parent process.
+    """
+
+    def __init__(self, hooks: Iterable[Hook] = (), buffer_records: bool = False):
+        self.hooks: List[Hook] = list(hooks)
+        self.buffer_records = buffer_records
+        self._stats: Dict[str, _StageStats] = {}
+        self._buffer: List[StageRecord] = []
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook) -> None:
+        """Register a callback invoked with every new StageRecord"""
+        self.hooks.append(hook)
+
+    @contextmanager
+    def stage(self, name: str, pixels: int = 0) -> Iterator[None]:
+        """Time the enclosed block as one execution of ``name``"""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.add(StageRecord(name, time.perf_counter() - wall_start,
+                                 time.process_time() - cpu_start, int(pixels)))
+
+    def add(self, record: StageRecord) -> None:
+        """Aggregate a record and pass it to the hooks"""
+        with self._lock:
+            stats = self._stats.get(record.name)
+            if stats is None:
+                stats = self._stats[record.name] = _StageStats()
+            stats.add(record, self._random)
+            if self.buffer_records:
+                self._buffer.append(record)
+        for hook in self.hooks:
+            hook(record)
+
+    def extend(self, records: Iterable[StageRecord]) -> None:
+        """Merge records collected elsewhere, e.g. in a worker process"""
+        for record in records:
+            self.add(record)
+
+    def drain(self) -> List[StageRecord]:
+        """Return the buffered records and reset every aggregate"""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._stats = {}
+        return records
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, totals and wall-time percentiles (in seconds) per stage"""
+        with self._lock:
+            stages = {name: (stats.count, stats.wall_total, stats.cpu_total,
+                             stats.pixels_total, list(stats.walls))
+                      for name, stats in self._stats.items()}
+
+        summary = {}
+        for name, (count, wall_total, cpu_total, pixels_total, walls) in stages.items():
+            stats = {
+                'count': count,
+                'wall_total': wall_total,
+                'cpu_total': cpu_total,
+                'pixels_total': pixels_total,
+            }
+            for q, value in zip(PERCENTILES, np.percentile(walls, PERCENTILES)):
+                stats[f'p{q}'] = float(value)
+            summary[name] = stats
+        return summary
+
+    def format_summary(self) -> str:
+        """Human-readable per-stage table sorted by total wall time"""
+        summary = self.summary()
+        lines = [f"{'stage':<14}{'count':>8}{'total s':>10}{'p50 ms':>10}"
+                 f"{'p90 ms':>10}{'p99 ms':>10}{'Mpx/s':>10}"]
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]['wall_total']):
+            rate = stats['pixels_total'] / stats['wall_total'] / 1e6 if stats['wall_total'] else 0.0
+            lines.append(f"{name:<14}{stats['count']:>8}{stats['wall_total']:>10.3f}"
+                         f"{stats['p50'] * 1000:>10.2f}{stats['p90'] * 1000:>10.2f}"
+                         f"{stats['p99'] * 1000:>10.2f}{rate:>10.1f}")
+        return '\n'.join(lines)
+
+    def to_prometheus(self, prefix: str = 'edge_connect') -> str:
+        """Render the aggregates in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = [
+            f'# HELP {prefix}_stage_seconds Wall time per pipeline stage',
+            f'# TYPE {prefix}_stage_seconds summary',
+        ]
+        for name, stats in sorted(summary.items()):
+            for q in PERCENTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q / 100}"}} '
+                             f'{stats[f"p{q}"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["wall_total"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+        for metric, key, help_text in (
+                ('stage_cpu_seconds_total', 'cpu_total', 'Process CPU time per pipeline stage'),
+                ('stage_pixels_total', 'pixels_total', 'Pixels processed per pipeline stage')):
+            lines.append(f'# HELP {prefix}_{metric} {help_text}')
+            lines.append(f'# TYPE {prefix}_{metric} counter')
+            for name, stats in sorted(summary.items()):
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {stats[key]}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,103 @@
+"""
+Content-hash manifest for resumable batch runs
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+
+def hash_config(config: Dict[str, Any]) -> str:
+    """Stable hash of a configuration dictionary"""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BatchManifest:
+    """
+    Append-only record of completed inputs in an output directory
+
+    Each completed input is written as one JSON line holding the content
+    hash of the input and the hash of the configuration that produced it,
+    so an interrupted run loses at most the line being written. An input is
+    current when both hashes match and its outputs still exist. The file
+    size and modification time are kept as well, which lets unchanged files
+    skip re-hashing.
+    """
+
+    FILENAME = '.manifest.jsonl'
+
+    def __init__(self, output_dir: str, config: Dict[str, Any]):
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self.config_hash = hash_config(config)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._torn_tail = False
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    self._torn_tail = not line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crashed run
+                    self._entries[entry['input']] = entry
+
+    def content_hash(self, image_path: str) -> str:
+        """Content hash of an input, reusing the recorded one if unchanged on disk"""
+        if image_path in self._hashes:
+            return self._hashes[image_path]
+
+        stat = os.stat(image_path)
+        entry = self._entries.get(os.path.abspath(image_path))
+        digest: str
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            digest = entry['content']
+        else:
+            digest = hash_file(image_path)
+        self._hashes[image_path] = digest
+        return digest
+
+    def is_current(self, image_path: str, outputs: Iterable[str] = ()) -> bool:
+        """Check whether an input was already processed with this configuration"""
+        entry = self._entries.get(os.path.abspath(image_path))
+        if entry is None or entry['config'] != self.config_hash:
+            return False
+        if entry['content'] != self.content_hash(image_path):
+            return False
+        return all(os.path.exists(path) for path in outputs)
+
+    def record(self, image_path: str, content_hash: Optional[str] = None) -> None:
+        """Append a completed input to the manifest"""
+        stat = os.stat(image_path)
+        entry: Dict[str, Any] = {
+            'input': os.path.abspath(image_path),
+            'content': content_hash or self.content_hash(image_path),
+            'config': self.config_hash,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        self._entries[entry['input']] = entry
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            if self._torn_tail:
+                fh.write('\n')
+                self._torn_tail = False
+            fh.write(json.dumps(entry) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
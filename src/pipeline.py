@@ -0,0 +1,143 @@
+"""
+Streaming and threading helpers for overlapping decode, compute and encode
+in batch runs
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+_DONE = object()
+
+
+def prefetch(items: Iterable[Any], load: Callable[[Any], Any],
+             depth: int) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """
+    Load items on a background thread, keeping at most ``depth`` loaded ahead
+
+    Yields (item, loaded value, error) in input order. A failed load yields
+    the exception instead of stopping the stream.
+    """
+    loaded: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(entry: Any) -> bool:
+        # Re-check the stop flag so an abandoned consumer never leaves us blocked
+        while not stop.is_set():
+            try:
+                loaded.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker() -> None:
+        entry: Tuple[Any, Any, Optional[BaseException]]
+        for item in items:
+            try:
+                entry = (item, load(item), None)
+            except Exception as e:
+                entry = (item, None, e)
+            if not put(entry):
+                return
+        put(_DONE)
+
+    thread = threading.Thread(target=worker, name='prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            entry = loaded.get()
+            if entry is _DONE:
+                break
+            yield entry
+    finally:
+        stop.set()
+        thread.join()
+
+
+def thread_map(fn: Callable[[Any], Any], items: Iterable[Any], num_threads: int,
+               ordered: bool = True, max_pending: Optional[int] = None) -> Iterator[Any]:
+    """
+    Apply fn to items on a thread pool with at most ``max_pending`` in flight
+
+    Yields results in input order, or in completion order when ``ordered``
+    is False. Exceptions raised by fn propagate to the consumer. Threads
+    only run in parallel while fn releases the GIL, as OpenCV calls do.
+    """
+    max_pending = max_pending or 2 * max(1, num_threads)
+    with ThreadPoolExecutor(max(1, num_threads)) as executor:
+        pending: Deque[Future] = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            while len(pending) >= max_pending:
+                yield from _take_finished(pending, ordered)
+        while pending:
+            yield from _take_finished(pending, ordered)
+
+
+def _take_finished(pending: Deque[Future], ordered: bool) -> Iterator[Any]:
+    """Wait for the oldest (ordered) or any finished future and yield results"""
+    if ordered:
+        yield pending.popleft().result()
+        return
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in [future for future in pending if future in done]:
+        pending.remove(future)
+        yield future.result()
+
+
+class BoundedWriter:
+    """
+    Run write jobs on a thread pool with at most ``max_pending`` outstanding
+
+    ``submit`` blocks on the oldest job once the limit is reached, which
+    applies backpressure to the producer. Both ``submit`` and ``drain``
+    return (key, error message or None) for jobs finished so far, in
+    submission order.
+    """
+
+    def __init__(self, num_threads: int, max_pending: Optional[int] = None):
+        self._executor = ThreadPoolExecutor(num_threads) if num_threads > 0 else None
+        self._max_pending = max_pending or 2 * max(1, num_threads)
+        self._pending: Deque[Tuple[Any, Future]] = deque()
+
+    def submit(self, key: Any, fn: Callable[..., Any], *args: Any) -> List[Tuple[Any, Optional[str]]]:
+        """Queue a write job and collect the jobs that have finished"""
+        if self._executor is None:
+            try:
+                fn(*args)
+            except Exception as e:
+                return [(key, str(e))]
+            return [(key, None)]
+
+        self._pending.append((key, self._executor.submit(fn, *args)))
+        finished = []
+        while self._pending and (len(self._pending) > self._max_pending or
+                                 self._pending[0][1].done()):
+            finished.append(self._pop())
+        return finished
+
+    def drain(self) -> List[Tuple[Any, Optional[str]]]:
+        """Wait for every outstanding job"""
+        return [self._pop() for _ in range(len(self._pending))]
+
+    def close(self) -> None:
+        """Wait for outstanding jobs and stop the thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _pop(self) -> Tuple[Any, Optional[str]]:
+        key, future = self._pending.popleft()
+        error = future.exception()
+        return key, None if error is None else str(error)
+
+    def __enter__(self) -> "BoundedWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,143 @@
+"""
+Frame sequences with temporal reuse of the inpainted fill
+
+Consecutive video frames mostly repeat the previous one. TemporalInpainter
+splits each frame's mask into independent regions (see mask_regions) and
+only inpaints a region again when its mask changed or the known pixels
+around it moved away from the ones its current fill was computed from;
+all other regions keep their previous fill.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .utils import (
+    IMAGE_EXTENSIONS,
+    Components,
+    edge_guided_inpainting,
+    index_by_stem,
+    load_image,
+    mask_regions,
+    roi_margin,
+    StageTimer,
+    no_timer
+)
+
+
+def iter_frames(source: str, size: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Yield (name, RGB frame) in order from a directory of images or a video file
+
+    Directory frames are ordered by file name and named after it; video
+    frames are read with OpenCV and named frame_000000, frame_000001, ...
+    """
+    if os.path.isdir(source):
+        files = index_by_stem(source, IMAGE_EXTENSIONS)
+        for name in sorted(files):
+            yield name, load_image(files[name], size=size)
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video: {source}")
+    try:
+        index = 0
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if size:
+                frame = cv2.resize(frame, tuple(size), interpolation=cv2.INTER_AREA)
+            yield f"frame_{index:06d}", cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            index += 1
+    finally:
+        capture.release()
+
+
+class TemporalInpainter:
+    """
+    Inpaint a frame sequence, reusing fills of unchanged mask regions
+
+    A region is reused when its mask crop is identical to the previous
+    frame's and the mean absolute difference of its unmasked pixels to the
+    frame its fill was computed from is at most ``tolerance`` (in 8-bit
+    levels). Comparing against that reference frame instead of the
+    previous one keeps slow drift from accumulating. A negative tolerance
+    inpaints every region of every frame.
+
+    ``reused`` and ``inpainted`` count regions over the whole sequence.
+    """
+
+    def __init__(self, tolerance: float = 2.0, inpaint_radius: int = 3,
+                 edge_weight: float = 0.3, method: str = 'blend',
+                 pyramid_levels: int = 0, pyramid_band: int = 8,
+                 timer: StageTimer = no_timer):
+        self.tolerance = tolerance
+        self.inpaint_radius = inpaint_radius
+        self.edge_weight = edge_weight
+        self.method = method
+        self.pyramid_levels = pyramid_levels
+        self.pyramid_band = pyramid_band
+        self.timer = timer
+        self.reused = 0
+        self.inpainted = 0
+        self._mask: Optional[np.ndarray] = None
+        self._result: Optional[np.ndarray] = None
+        self._reference: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        """Forget the previous frame, e.g. at a scene cut"""
+        self._mask = self._result = self._reference = None
+
+    def inpaint(self, frame: np.ndarray, mask: np.ndarray,
+                components: Optional[Components] = None) -> np.ndarray:
+        """Inpaint the next frame of the sequence, optionally given the mask's components"""
+        if self._mask is None or self._mask.shape != mask.shape:
+            self.reset()
+            self._reference = frame.copy()
+        reference, previous = self._reference, self._result
+        assert reference is not None
+        result: np.ndarray = frame.copy()
+
+        with self.timer('roi_regions', mask.shape[0] * mask.shape[1]):
+            labels, regions = mask_regions(mask, roi_margin(self.inpaint_radius, self.pyramid_levels),
+                                           components)
+        for rows, cols, members in regions:
+            paste = np.isin(labels[rows, cols], members)
+            if previous is not None and self._unchanged(frame, mask, rows, cols):
+                result[rows, cols][paste] = previous[rows, cols][paste]
+                self.reused += 1
+                continue
+
+            crop_result, _, _ = edge_guided_inpainting(
+                frame[rows, cols], mask[rows, cols], edge_weight=self.edge_weight,
+                inpaint_radius=self.inpaint_radius, method=self.method, timer=self.timer,
+                pyramid_levels=self.pyramid_levels, pyramid_band=self.pyramid_band,
+                compute_edges=False)
+            result[rows, cols][paste] = crop_result[paste]
+            reference[rows, cols] = frame[rows, cols]
+            self.inpainted += 1
+
+        self._mask = mask.copy()
+        self._result = result
+        return result
+
+    def _unchanged(self, frame: np.ndarray, mask: np.ndarray, rows: slice, cols: slice) -> bool:
+        """Whether the region's previous fill is still valid for this frame"""
+        if self._mask is None or self._reference is None or self.tolerance < 0:
+            return False
+        with self.timer('temporal', (rows.stop - rows.start) * (cols.stop - cols.start)):
+            crop_mask = mask[rows, cols]
+            if not np.array_equal(crop_mask, self._mask[rows, cols]):
+                return False
+            known = crop_mask == 0
+            if not known.any():
+                return True
+            difference = cv2.absdiff(frame[rows, cols], self._reference[rows, cols])
+            return float(difference[known].mean()) <= self.tolerance
@@ -0,0 +1,359 @@
+"""
+Local HTTP inference service backed by a warm worker pool
+
+Endpoints:
+    GET  /ready    200 once every worker is warm, 503 before
+    POST /inpaint  Raw image bytes, or JSON {"image": b64, "mask": b64}.
+                   Query parameters: format (png, jpg, webp), threshold.
+                   Returns the encoded reconstruction.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .face_reconstructor import FaceReconstructor
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error',
+    503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
+                 'webp': 'image/webp'}
+
+# Per-process reconstructor used by the service workers
+_service_reconstructor: Optional[FaceReconstructor] = None
+
+# One request as sent to a worker: image bytes, mask bytes, format, threshold
+Job = Tuple[bytes, Optional[bytes], str, Optional[int]]
+# What a worker sends back per request: encoded result or error message
+Outcome = Tuple[Optional[bytes], Optional[str]]
+
+
+def _init_service_worker(config: Dict[str, Any]) -> None:
+    """Build the reconstructor once per worker process"""
+    global _service_reconstructor
+    _service_reconstructor = FaceReconstructor(config)
+
+
+def _worker_reconstructor() -> FaceReconstructor:
+    """The reconstructor built by _init_service_worker in this process"""
+    assert _service_reconstructor is not None, "worker was started without _init_service_worker"
+    return _service_reconstructor
+
+
+def _warm_up() -> int:
+    """Run a tiny reconstruction so imports and code paths are hot"""
+    image = np.full((16, 16, 3), 128, np.uint8)
+    image[6:10, 6:10] = 255
+    _worker_reconstructor().process_array(image)
+    return os.getpid()
+
+
+def _process_jobs(jobs: List[Job]) -> List[Outcome]:
+    """Reconstruct a batch of requests, isolating errors per request"""
+    reconstructor = _worker_reconstructor()
+    outcomes: List[Outcome] = []
+    for image_bytes, mask_bytes, image_format, threshold in jobs:
+        try:
+            results = reconstructor.process_bytes(
+                image_bytes, mask_bytes, threshold, output_format=image_format)
+            outcomes.append((results['encoded'], None))
+        except Exception as e:
+            outcomes.append((None, str(e)))
+    return outcomes
+
+
+class HTTPError(Exception):
+    """Error that maps directly to an HTTP response"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class InferenceServer:
+    """
+    asyncio HTTP front end dispatching reconstruction requests to processes
+
+    Requests are queued and grouped into batches of up to ``max_batch``
+    while all workers are busy (or for ``batch_window`` seconds), so each
+    worker round trip amortises IPC over several images. At most
+    ``max_queue`` requests are accepted at once; the rest get 503. A request
+    that takes longer than ``timeout`` seconds gets 504. If a worker
+    process dies, the requests it was handling get 503 and the pool is
+    rebuilt and warmed up again, reporting not ready in the meantime.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, host: str = '127.0.0.1',
+                 port: int = 8080, num_workers: Optional[int] = None,
+                 max_queue: int = 64, max_batch: int = 4, batch_window: float = 0.002,
+                 timeout: float = 30.0, max_body: int = 32 * 1024 * 1024):
+        self.config = FaceReconstructor(config).get_config()
+        self.host = host
+        self.port = port
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.max_body = max_body
+
+        self.ready = False
+        self._in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_slots: Optional[asyncio.Semaphore] = None
+        self._worker_pids: List[int] = []
+
+    async def start(self) -> None:
+        """Start the worker pool and begin listening"""
+        self._queue = asyncio.Queue()
+        self._worker_slots = asyncio.Semaphore(self.num_workers)
+        self._executor = self._new_executor()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        await self._warm_up_pool()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.num_workers, initializer=_init_service_worker,
+                                   initargs=(self.config,))
+
+    async def _warm_up_pool(self) -> None:
+        """Warm every worker of the current pool, then report ready"""
+        loop = asyncio.get_running_loop()
+        self._worker_pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up)
+                                                   for _ in range(self.num_workers)))
+        self.ready = True
+
+    async def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a pool broken by a dead worker, once per broken pool"""
+        if broken is not self._executor:
+            return
+        self.ready = False
+        broken.shutdown(wait=False)
+        self._executor = self._new_executor()
+        await self._warm_up_pool()
+
+    async def close(self) -> None:
+        """Stop accepting requests and shut the worker pool down"""
+        self.ready = False
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def serve_forever(self) -> None:
+        """Start the service and run until cancelled"""
+        await self.start()
+        assert self._server is not None
+        print(f"Serving on http://{self.host}:{self.port} with {self.num_workers} workers")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def submit(self, job: Job) -> bytes:
+        """Queue one request and wait for its encoded result"""
+        if self._queue is None:
+            raise HTTPError(503, 'Server is not started')
+        if self._in_flight >= self.max_queue:
+            raise HTTPError(503, 'Request queue is full')
+
+        future: 'asyncio.Future[Outcome]' = asyncio.get_running_loop().create_future()
+        self._in_flight += 1
+        future.add_done_callback(self._release)
+        await self._queue.put((job, future))
+        try:
+            image_bytes, error = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # Dropped by the dispatcher if still queued
+            raise HTTPError(504, f'Request timed out after {self.timeout}s')
+        if error is not None or image_bytes is None:
+            raise HTTPError(422, error or 'No result')
+        return image_bytes
+
+    def _release(self, future: asyncio.Future) -> None:
+        self._in_flight -= 1
+
+    async def _dispatch(self) -> None:
+        """Group queued requests into batches and hand them to free workers"""
+        loop = asyncio.get_running_loop()
+        queue, slots = self._queue, self._worker_slots
+        assert queue is not None and slots is not None, "dispatching before start()"
+        while True:
+            await slots.acquire()
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(job, future) for job, future in batch if not future.done()]
+            if not batch:
+                slots.release()
+                continue
+            executor = self._executor
+            assert executor is not None
+            try:
+                task = loop.run_in_executor(executor, _process_jobs, [job for job, _ in batch])
+            except BrokenProcessPool:
+                slots.release()
+                self._fail_broken(batch)
+                await self._restart_pool(executor)
+                continue
+            task.add_done_callback(partial(self._complete, batch=batch, executor=executor))
+
+    def _complete(self, done: asyncio.Future, batch: List[Tuple[Job, asyncio.Future]],
+                  executor: ProcessPoolExecutor) -> None:
+        """Deliver batch outcomes to the waiting requests"""
+        if self._worker_slots is not None:
+            self._worker_slots.release()
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            self._fail_broken(batch)
+            asyncio.ensure_future(self._restart_pool(executor))
+            return
+        if done.cancelled():
+            outcomes = [(None, 'Worker pool shut down')] * len(batch)
+        elif done.exception() is not None:
+            outcomes = [(None, f'Worker failed: {done.exception()}')] * len(batch)
+        else:
+            outcomes = done.result()
+        for (_, future), outcome in zip(batch, outcomes):
+            if not future.done():
+                future.set_result(outcome)
+
+    @staticmethod
+    def _fail_broken(batch: List[Tuple[Job, asyncio.Future]]) -> None:
+        """Fail the requests of a batch lost with a dead worker process"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(HTTPError(503, 'Worker process died; restarting workers'))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one keep-alive connection"""
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > self.max_body:
+                    await self._respond(writer, 413, {'error': 'Request body too large'}, False)
+                    break
+                body = await reader.readexactly(length)
+
+                keep_alive = (version == 'HTTP/1.1' and
+                              headers.get('connection', '').lower() != 'close')
+                try:
+                    status, payload, content_type = await self._route(method, target,
+                                                                      headers, body)
+                except HTTPError as e:
+                    status, payload, content_type = e.status, {'error': str(e)}, None
+                except Exception as e:
+                    status, payload, content_type = 500, {'error': str(e)}, None
+                await self._respond(writer, status, payload, keep_alive, content_type)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError,
+                asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str],
+                     body: bytes) -> Tuple[int, Any, Optional[str]]:
+        """Dispatch a parsed request to its endpoint"""
+        url = urlsplit(target)
+        if url.path == '/ready':
+            if method != 'GET':
+                raise HTTPError(405, 'Use GET')
+            status = 200 if self.ready else 503
+            return status, {'ready': self.ready, 'workers': self.num_workers,
+                            'in_flight': self._in_flight}, None
+
+        if url.path != '/inpaint':
+            raise HTTPError(404, f'Unknown path {url.path}')
+        if method != 'POST':
+            raise HTTPError(405, 'Use POST')
+        if not self.ready:
+            raise HTTPError(503, 'Workers are still starting')
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        image_format = query.get('format', 'png').lower()
+        if image_format not in CONTENT_TYPES:
+            raise HTTPError(400, f'Unsupported format {image_format}')
+        raw_threshold = query.get('threshold')
+        threshold: Optional[int] = None
+        if raw_threshold is not None:
+            if (not (raw_threshold.isascii() and raw_threshold.isdigit())
+                    or int(raw_threshold) > 255):
+                raise HTTPError(400, f'Threshold must be an integer from 0 to 255, '
+                                     f'got {raw_threshold!r}')
+            threshold = int(raw_threshold)
+
+        image_bytes, mask_bytes = body, None
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                request = json.loads(body)
+                image_bytes = base64.b64decode(request['image'])
+                mask_bytes = base64.b64decode(request['mask']) if request.get('mask') else None
+            except (ValueError, KeyError, TypeError, binascii.Error):
+                raise HTTPError(400, 'Expected JSON with base64 "image" and optional "mask"')
+        if not image_bytes:
+            raise HTTPError(400, 'Empty request body')
+
+        result = await self.submit((image_bytes, mask_bytes, image_format, threshold))
+        return 200, result, CONTENT_TYPES[image_format]
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any,
+                       keep_alive: bool, content_type: Optional[str] = None) -> None:
+        if content_type is None:
+            payload = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
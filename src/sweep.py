@@ -0,0 +1,196 @@
+"""
+Parameter sweeps that share pipeline intermediates across configurations
+
+Every stage of the reconstruction depends on a few config keys and on the
+outputs of earlier stages (see STAGES). A stage's cache key is made of its
+own config values plus the keys of its inputs, so across a grid of
+configurations each distinct decode, mask, cv2.inpaint pass and edge map
+is computed once. Only the final Telea/NS blend runs per configuration,
+which makes a sweep over ``edge_weight`` almost free.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import itertools
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .face_reconstructor import FaceReconstructor, ReconstructionResults
+from .instrumentation import Instrumentation
+from .utils import (
+    as_rgb_array,
+    create_mask_from_white_regions,
+    edge_guided_inpainting,
+    edge_maps,
+    blend_masked,
+    load_image,
+    load_mask,
+    no_timer,
+    StageTimer
+)
+
+# Stage -> (config keys it reads, stages whose output it consumes)
+STAGES = {
+    'image': (('target_size', 'fast_decode', 'resample'), ()),
+    'mask': (('threshold',), ('image',)),
+    'inpaint_telea': (('inpaint_radius', 'roi_inpainting'), ('image', 'mask')),
+    'inpaint_ns': (('inpaint_radius', 'roi_inpainting'), ('image', 'mask')),
+    # The full-resolution band pass starts from the blended coarse fill, so
+    # pyramid results cannot be split into separately cached passes
+    'pyramid': (('inpaint_radius', 'roi_inpainting', 'inpaint_method', 'edge_weight',
+                 'pyramid_levels', 'pyramid_band'), ('image', 'mask')),
+    'edges': (('edge_sigma',), ('image', 'mask')),
+}
+
+
+def expand_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the grid values, in row-major order of the keys"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def masked_psnr(result: np.ndarray, reference: np.ndarray, mask: np.ndarray) -> float:
+    """PSNR in dB between result and reference over the masked pixels"""
+    inside = mask > 0
+    if not inside.any():
+        return float('inf')
+    mse = np.mean((result[inside].astype(np.float64) - reference[inside]) ** 2)
+    return float('inf') if mse == 0 else float(10 * np.log10(255 ** 2 / mse))
+
+
+def _hashable(value: Any) -> Hashable:
+    return tuple(value) if isinstance(value, list) else value
+
+
+class ParameterSweep:
+    """
+    Run many FaceReconstructor configurations on one image
+
+    ``source`` is an image path or an RGB uint8 array; arrays are used as
+    given, so target_size, fast_decode and resample have no effect. With
+    ``mask`` (a path or an array) mask detection is skipped and threshold
+    has no effect either.
+
+    Cached intermediates are read-only and results may share memory with
+    them. ``computed`` counts the executions of each stage.
+    """
+
+    def __init__(self, source: Union[str, np.ndarray],
+                 mask: Optional[Union[str, np.ndarray]] = None,
+                 base_config: Optional[Dict[str, Any]] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        self.source = source
+        self.mask = mask
+        self.base_config = FaceReconstructor(base_config).config
+        self.instrumentation = instrumentation
+        self.computed: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self._cache: Dict[Tuple[str, Hashable], Any] = {}
+
+        # Stages fed by the caller do not depend on any config key
+        self._fixed = set()
+        if not isinstance(source, str):
+            self._fixed.add('image')
+        if mask is not None:
+            self._fixed.add('mask')
+
+    @property
+    def _timer(self) -> StageTimer:
+        return self.instrumentation.stage if self.instrumentation else no_timer
+
+    def config(self, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """The base config updated with overrides, rejecting unknown keys"""
+        unknown = set(overrides or {}) - set(self.base_config)
+        if unknown:
+            raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+        return {**self.base_config, **(overrides or {})}
+
+    def run(self, overrides: Optional[Dict[str, Any]] = None) -> ReconstructionResults:
+        """
+        Reconstruct with one configuration
+
+        Returns the same results as FaceReconstructor(config).process_array,
+        computing only the stages not already cached.
+        """
+        config = self.config(overrides)
+        image = self._stage('image', config)
+        mask = self._stage('mask', config)
+        if self.mask is None and not mask.any():
+            raise ValueError(f"No white regions detected with threshold {config['threshold']}")
+
+        method, weight = config['inpaint_method'], config['edge_weight']
+        if config['pyramid_levels'] > 0:
+            result = self._stage('pyramid', config)
+        elif method == 'telea' or (method == 'blend' and weight <= 0):
+            result = self._stage('inpaint_telea', config)
+        elif method == 'ns' or (method == 'blend' and weight >= 1):
+            result = self._stage('inpaint_ns', config)
+        else:
+            result = self._stage('inpaint_telea', config).copy()
+            ns = self._stage('inpaint_ns', config)
+            with self._timer('blend', image.shape[0] * image.shape[1]):
+                blend_masked(result, ns, mask, weight)
+
+        return ReconstructionResults({
+            'original': image,
+            'mask': mask,
+            'result': result
+        }, lambda: self._stage('edges', config))
+
+    def sweep(self, grid: Dict[str, Sequence[Any]]) -> Iterator[Tuple[Dict[str, Any], ReconstructionResults]]:
+        """Yield (overrides, results) for every combination of the grid values"""
+        # Fail on unknown keys before any work
+        self.config(dict.fromkeys(grid))
+        for overrides in expand_grid(grid):
+            yield overrides, self.run(overrides)
+
+    def _key(self, stage: str, config: Dict[str, Any]) -> Hashable:
+        params, inputs = STAGES[stage]
+        own = () if stage in self._fixed else tuple(_hashable(config[name]) for name in params)
+        return own + tuple(self._key(name, config) for name in inputs)
+
+    def _stage(self, stage: str, config: Dict[str, Any]) -> Any:
+        key = (stage, self._key(stage, config))
+        if key not in self._cache:
+            output = self._compute(stage, config)
+            for array in output if isinstance(output, tuple) else (output,):
+                array.setflags(write=False)
+            self._cache[key] = output
+            self.computed[stage] += 1
+        return self._cache[key]
+
+    def _compute(self, stage: str, config: Dict[str, Any]) -> Any:
+        timer = self._timer
+        if stage == 'image':
+            if not isinstance(self.source, str):
+                return as_rgb_array(self.source).copy()
+            return load_image(self.source, size=config['target_size'], timer=timer,
+                              draft=config['fast_decode'], resample=config['resample'])
+
+        image = self._stage('image', config)
+        if stage == 'mask':
+            if isinstance(self.mask, str):
+                return load_mask(self.mask, image.shape[:2])
+            if self.mask is not None:
+                return np.array(self.mask, dtype=np.uint8)
+            with timer('mask', image.shape[0] * image.shape[1]):
+                return create_mask_from_white_regions(image, threshold=config['threshold'])
+
+        mask = self._stage('mask', config)
+        if stage == 'edges':
+            return edge_maps(image, mask, config['edge_sigma'], timer)
+
+        method = config['inpaint_method'] if stage == 'pyramid' else stage[len('inpaint_'):]
+        result, _, _ = edge_guided_inpainting(
+            image, mask,
+            edge_weight=config['edge_weight'],
+            inpaint_radius=config['inpaint_radius'],
+            roi=config['roi_inpainting'],
+            method=method,
+            timer=timer,
+            pyramid_levels=config['pyramid_levels'] if stage == 'pyramid' else 0,
+            pyramid_band=config['pyramid_band'],
+            compute_edges=False
+        )
+        return result
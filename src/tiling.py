@@ -0,0 +1,174 @@
+"""
+Tiled access to very large images for bounded-memory reconstruction
+
+Rasters are read and written one tile at a time. ``.npy`` files and
+uncompressed raster files (PPM/PGM, raw TIFF, 24-bit BMP) are
+memory-mapped per tile, so only the tile in use is resident; other
+formats have to be decoded in full by PIL once.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import math
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFile
+
+from .utils import roi_margin
+
+# Raw PIL modes that map directly onto uint8 pixel layouts
+_RAW_CHANNELS = {'RGB': 3, 'BGR': 3, 'L': 1}
+
+# (padded, core, inner) row and column slices of one tile
+Tile = Tuple[Tuple[slice, slice], Tuple[slice, slice], Tuple[slice, slice]]
+
+# Serialises the temporary change of PIL's decompression-bomb limit
+_header_lock = threading.Lock()
+
+
+@contextmanager
+def _open_header(path: str) -> Iterator[ImageFile.ImageFile]:
+    """
+    Open an image for its header without PIL's decompression-bomb check
+
+    The check guards against decoding huge images in full; memory-mapped
+    rasters are never decoded, so callers re-apply the limit themselves
+    before falling back to a full decode.
+    """
+    with _header_lock:
+        limit, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+        try:
+            image = Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+    with image:
+        yield image
+
+
+class RasterFile:
+    """
+    Row-band view of a uint8 raster stored in a file
+
+    ``rows(top, bottom)`` maps only the requested rows and the mapping is
+    released as soon as the returned array is dropped. Pages are only
+    loaded when touched, so ``read`` and ``write`` of one tile keep the
+    resident memory proportional to the tile rather than to the image.
+    """
+
+    def __init__(self, path: str, shape: Tuple[int, ...], offset: int = 0,
+                 stride: int = 0, bottom_up: bool = False, bgr: bool = False,
+                 writable: bool = False, pixels: Optional[np.ndarray] = None):
+        self.path = path
+        self.shape = shape
+        self.offset = offset
+        self.channels = shape[2] if len(shape) == 3 else 1
+        self.stride = stride or shape[1] * self.channels
+        self.bottom_up = bottom_up
+        self.bgr = bgr
+        self.writable = writable
+        self._pixels = pixels
+
+    @classmethod
+    def open(cls, path: str, mode: str = 'RGB') -> 'RasterFile':
+        """Open an RGB or L raster, memory-mapped when its layout allows"""
+        channels = 3 if mode == 'RGB' else 1
+        if path.lower().endswith('.npy'):
+            pixels = np.load(path, mmap_mode='r')
+            if pixels.dtype != np.uint8 or pixels.shape[2:] != ((3,) if channels == 3 else ()):
+                raise ValueError(f"Expected a uint8 {mode} array in {path}, got "
+                                 f"{pixels.shape} {pixels.dtype}")
+            if not pixels.flags.c_contiguous:
+                return cls(path, pixels.shape, pixels=np.ascontiguousarray(pixels))
+            return cls(path, pixels.shape, offset=pixels.offset)
+
+        with _open_header(path) as image:
+            width, height = image.size
+            shape = (height, width, 3) if channels == 3 else (height, width)
+            if image.mode == mode and len(image.tile) == 1:
+                codec, extents, offset, args = image.tile[0]
+                args = (args,) if isinstance(args, str) else tuple(args or ())
+                if (codec == 'raw' and args and _RAW_CHANNELS.get(args[0]) == channels
+                        and tuple(extents or ()) == (0, 0, width, height)):
+                    return cls(path, shape, offset=offset,
+                               stride=args[1] if len(args) > 1 else 0,
+                               bottom_up=len(args) > 2 and args[2] < 0,
+                               bgr=args[0] == 'BGR')
+            limit = Image.MAX_IMAGE_PIXELS
+            if limit and width * height > 2 * limit:
+                raise ValueError(f"{path} has {width * height} pixels, too many to decode in "
+                                 f"full; convert it to .npy, PPM/PGM, raw TIFF or BMP")
+            return cls(path, shape, pixels=np.asarray(image.convert(mode)))
+
+    @classmethod
+    def create_npy(cls, path: str, shape: Tuple[int, ...]) -> 'RasterFile':
+        """Create a writable uint8 .npy raster of the given shape"""
+        created = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=shape)
+        offset = created.offset
+        del created
+        return cls(path, shape, offset=offset, writable=True)
+
+    @property
+    def memory_mapped(self) -> bool:
+        """Whether rows are read from the file instead of a decoded copy"""
+        return self._pixels is None
+
+    def rows(self, top: int, bottom: int) -> np.ndarray:
+        """Array view of rows [top, bottom)"""
+        if self._pixels is not None:
+            return self._pixels[top:bottom]
+
+        height, width = self.shape[:2]
+        first = height - bottom if self.bottom_up else top
+        band = np.memmap(self.path, dtype=np.uint8, mode='r+' if self.writable else 'r',
+                         offset=self.offset + first * self.stride,
+                         shape=(bottom - top, self.stride))
+        pixels = band[:, :width * self.channels].reshape(bottom - top, width, self.channels)
+        if self.bottom_up:
+            pixels = pixels[::-1]
+        if self.bgr:
+            pixels = pixels[:, :, ::-1]
+        return pixels if self.channels == 3 else pixels[:, :, 0]
+
+    def read(self, rows: slice, cols: slice) -> np.ndarray:
+        """Contiguous copy of one rectangular region"""
+        return np.ascontiguousarray(self.rows(rows.start, rows.stop)[:, cols])
+
+    def write(self, rows: slice, cols: slice, data: np.ndarray) -> None:
+        """Write one rectangular region"""
+        self.rows(rows.start, rows.stop)[:, cols] = data
+
+
+def tile_halo(inpaint_radius: int, sigma: float, pyramid_levels: int = 0) -> int:
+    """
+    Overlap around each tile so that a tile sees all the context it needs
+
+    Covers the inpainting context of holes that fit inside the tile, the
+    Gaussian and Sobel support of the Canny edges, and the 3x3 morphology
+    of white region detection.
+    """
+    canny = math.ceil(4 * sigma) + 2
+    return max(roi_margin(inpaint_radius, pyramid_levels), canny) + 2
+
+
+def tile_grid(height: int, width: int, tile_size: int, halo: int) -> Iterator[Tile]:
+    """
+    Yield (padded, core, inner) slices covering the image in row-major order
+
+    ``core`` is the region a tile is responsible for and ``padded`` extends
+    it by ``halo`` pixels, clipped to the image. ``inner`` locates the core
+    inside the padded tile.
+    """
+    for top in range(0, height, tile_size):
+        bottom = min(top + tile_size, height)
+        pad_top, pad_bottom = max(top - halo, 0), min(bottom + halo, height)
+        for left in range(0, width, tile_size):
+            right = min(left + tile_size, width)
+            pad_left, pad_right = max(left - halo, 0), min(right + halo, width)
+            yield ((slice(pad_top, pad_bottom), slice(pad_left, pad_right)),
+                   (slice(top, bottom), slice(left, right)),
+                   (slice(top - pad_top, bottom - pad_top),
+                    slice(left - pad_left, right - pad_left)))
@@ -5,47 +5,332 @@ Author: ABDULLAH AHMAD
 License: MIT
 """
 
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 import numpy as np
 import cv2
 from PIL import Image
-from typing import Tuple, Optional, Union
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, NamedTuple, Tuple, Optional, Union
 
+INPAINT_METHODS = ('telea', 'ns', 'blend')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
 
-def load_image(image_path: str, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
-    """Load and preprocess image"""
+# Resampling filters accepted by load_image and decode_image
+RESAMPLE_FILTERS = {
+    'lanczos': Image.LANCZOS,
+    'bicubic': Image.BICUBIC,
+    'bilinear': Image.BILINEAR,
+    'box': Image.BOX,
+    'nearest': Image.NEAREST,
+}
+
+# Gray levels below the threshold that may_have_white_regions still accepts,
+# covering luma decoding vs RGB-to-gray and resampling rounding differences
+PRESCAN_MARGIN = 8
+
+# Structuring elements of the white region morphology
+_KERNEL_3 = np.ones((3, 3), np.uint8)
+_KERNEL_5 = np.ones((5, 5), np.uint8)
+
+# Number of decoded mask files kept by load_mask
+MASK_CACHE_SIZE = 64
+
+# Stage timer: called as timer(stage_name, pixels) around each pipeline
+# stage, e.g. Instrumentation.stage
+StageTimer = Callable[[str, int], ContextManager]
+
+
+def no_timer(name: str, pixels: int = 0) -> ContextManager:
+    """Stage timer that records nothing"""
+    return nullcontext()
+
+
+@contextmanager
+def limit_opencv_threads(num_threads: int) -> Iterator[None]:
+    """
+    Temporarily set the size of OpenCV's internal thread pool
+
+    The setting is process-wide, so concurrent callers should agree on it.
+    """
+    previous = cv2.getNumThreads()
+    cv2.setNumThreads(num_threads)
+    try:
+        yield
+    finally:
+        cv2.setNumThreads(previous)
+
+
+def index_by_stem(directory: str,
+                  file_extensions: Tuple[str, ...] = IMAGE_EXTENSIONS) -> Dict[str, str]:
+    """Map file name without extension to path for the images in a directory"""
+    return {
+        os.path.splitext(file)[0]: os.path.join(directory, file)
+        for file in sorted(os.listdir(directory))
+        if file.lower().endswith(file_extensions)
+    }
+
+
+def load_image(image_path: str, size: Optional[Tuple[int, int]] = None,
+               timer: StageTimer = no_timer, draft: bool = True,
+               resample: str = 'lanczos') -> np.ndarray:
+    """
+    Load and preprocess image
+
+    When resizing, JPEG files are decoded with DCT scaling (PIL draft mode)
+    to no less than twice ``size``, which skips most of the decode work
+    for large photos while the final filter still anti-aliases.
+    ``draft=False`` always decodes at full resolution. ``resample`` names
+    the resize filter, see RESAMPLE_FILTERS.
+    """
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"Image not found: {image_path}")
 
-    image = Image.open(image_path).convert('RGB')
-    if size:
-        image = image.resize(size, Image.LANCZOS)
+    return _prepare_image(Image.open(image_path), size, timer, draft, resample)
+
+
+def _prepare_image(image: Image.Image, size: Optional[Tuple[int, int]],
+                   timer: StageTimer, draft: bool, resample: str) -> np.ndarray:
+    """Decode an opened image to RGB, resizing it when size is given"""
+    if resample not in RESAMPLE_FILTERS:
+        raise ValueError(f"Unknown resample filter '{resample}', "
+                         f"expected one of {tuple(RESAMPLE_FILTERS)}")
+    if size and draft:
+        # A no-op for formats without reduced-resolution decoding
+        image.draft('RGB', (size[0] * 2, size[1] * 2))
+
+    with timer('decode', image.width * image.height):
+        image = image.convert('RGB')
+    if size and image.size != tuple(size):
+        with timer('resize', size[0] * size[1]):
+            image = image.resize(size, RESAMPLE_FILTERS[resample])
     return np.array(image)
 
 
-def save_image(image: np.ndarray, output_path: str, quality: int = 95) -> None:
-    """Save image array to file"""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+def save_image(image: np.ndarray, output_path: str, quality: int = 95,
+               optimize: bool = True, compress_level: Optional[int] = None) -> None:
+    """
+    Save image array to file
+
+    The encoding follows the file extension. ``.npy`` stores the raw array
+    without any codec work; ``quality`` applies to JPEG and WebP and
+    ``compress_level`` (0-9) to PNG. ``optimize=False`` skips the extra
+    optimisation pass of the JPEG and PNG encoders; PIL implements PNG
+    optimisation as level 9, so an explicit ``compress_level`` takes
+    precedence over it.
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
 
     if image.dtype != np.uint8:
         image = (image * 255).astype(np.uint8)
 
+    if output_path.lower().endswith('.npy'):
+        np.save(output_path, image)
+        return
+
+    params: Dict[str, Any] = {'quality': quality, 'optimize': optimize}
+    if compress_level is not None:
+        params['compress_level'] = compress_level
+        if output_path.lower().endswith('.png'):
+            del params['optimize']
+
     pil_image = Image.fromarray(image)
-    pil_image.save(output_path, quality=quality, optimize=True)
+    pil_image.save(output_path, **params)
+
+
+def as_rgb_array(image: np.ndarray) -> np.ndarray:
+    """
+    Return an image as a C-contiguous uint8 RGB array
+
+    Arrays that already qualify are returned as they are, without a copy.
+    Grayscale and RGBA inputs are converted, and float images in [0, 1]
+    are scaled to uint8 like in save_image.
+    """
+    image = np.asarray(image)
+    if image.dtype != np.uint8:
+        image = (image * 255).astype(np.uint8)
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    if image.ndim != 3 or image.shape[2] not in (3, 4):
+        raise ValueError(f"Expected an H x W x 3 RGB image, got shape {image.shape}")
+    if image.shape[2] == 4:
+        return cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGBA2RGB)
+    return np.ascontiguousarray(image)
+
+
+def as_mask_array(mask: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Return a mask as a C-contiguous uint8 array of the given (height, width)
+
+    Nonzero pixels are inpainted. uint8 masks that already qualify are
+    returned as they are; bool and other dtypes become 0/255 masks.
+    """
+    mask = np.asarray(mask)
+    if mask.ndim == 3 and mask.shape[2] == 1:
+        mask = mask[:, :, 0]
+    if mask.shape != tuple(shape):
+        raise ValueError(f"Mask shape {mask.shape} does not match image shape {tuple(shape)}")
+    if mask.dtype != np.uint8:
+        mask = np.where(mask != 0, 255, 0).astype(np.uint8)
+    return np.ascontiguousarray(mask)
+
+
+def decode_image(data: bytes, size: Optional[Tuple[int, int]] = None,
+                 draft: bool = True, resample: str = 'lanczos') -> np.ndarray:
+    """Decode encoded image bytes to an RGB array, resizing like load_image"""
+    return _prepare_image(Image.open(io.BytesIO(data)), size, no_timer, draft, resample)
+
+
+def decode_mask(data: bytes, shape: Tuple[int, int], resize: bool = False) -> np.ndarray:
+    """
+    Decode encoded mask bytes to a binary 0/255 mask of the given (height, width)
+
+    A mask of another size raises ValueError, or with ``resize=True`` is
+    resized with nearest neighbour like load_mask does.
+    """
+    mask = Image.open(io.BytesIO(data)).convert('L')
+    if mask.size != (shape[1], shape[0]):
+        if not resize:
+            raise ValueError(f"Mask size {mask.size} does not match image size "
+                             f"{tuple(shape)[::-1]}")
+        mask = mask.resize((shape[1], shape[0]), Image.NEAREST)
+    return np.where(np.asarray(mask) > 127, 255, 0).astype(np.uint8)
+
+
+def load_mask(mask_path: str, shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """
+    Load a mask file as a binary 0/255 mask, optionally resized to (height, width)
+
+    Decoded masks are cached by path, modification time and target shape,
+    so datasets reusing a few mask files decode each one once. The returned
+    array is shared between callers and therefore read-only.
+    """
+    if not os.path.exists(mask_path):
+        raise FileNotFoundError(f"Mask not found: {mask_path}")
+    stat = os.stat(mask_path)
+    return _load_mask_cached(os.path.abspath(mask_path), stat.st_mtime_ns, stat.st_size,
+                             None if shape is None else tuple(shape))
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def _load_mask_cached(mask_path: str, mtime_ns: int, file_size: int,
+                      shape: Optional[Tuple[int, int]]) -> np.ndarray:
+    """Decode and binarize a mask file; the stat fields only key the cache"""
+    with Image.open(mask_path) as mask_file:
+        mask_image = mask_file.convert('L')
+    if shape is not None and mask_image.size != (shape[1], shape[0]):
+        mask_image = mask_image.resize((shape[1], shape[0]), Image.NEAREST)
+    mask = np.where(np.asarray(mask_image) > 127, 255, 0).astype(np.uint8)
+    mask.setflags(write=False)
+    return mask
+
+
+def encode_image(image: np.ndarray, image_format: str = 'png', quality: int = 95) -> bytes:
+    """Encode an image array to bytes in the given format"""
+    image_format = image_format.lower()
+    pil_format = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}.get(image_format)
+    if pil_format is None:
+        raise ValueError(f"Unsupported encoding '{image_format}'")
+
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+class Components(NamedTuple):
+    """Connected components of a mask as returned by cv2.connectedComponentsWithStats"""
+    num_labels: int  # Including the background label 0
+    labels: np.ndarray
+    stats: np.ndarray  # One CC_STAT_* row per label, background first
+
+    @property
+    def areas(self) -> np.ndarray:
+        """Pixel count of each component"""
+        return self.stats[1:, cv2.CC_STAT_AREA]
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """(left, top, width, height) of each component"""
+        return self.stats[1:, :cv2.CC_STAT_AREA]
+
+
+class WhiteRegions(NamedTuple):
+    """Outputs of detect_white_regions"""
+    gray: np.ndarray
+    mask: np.ndarray
+    components: Optional[Components]
 
 
 def create_mask_from_white_regions(image: np.ndarray, threshold: int = 240) -> np.ndarray:
     """Create mask from white regions in the image"""
     gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-    mask = (gray > threshold).astype(np.uint8) * 255
+    return _white_mask(gray, threshold, out=gray)
 
-    kernel = np.ones((3, 3), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
 
+def detect_white_regions(image: np.ndarray, threshold: int = 240,
+                         components: bool = True) -> WhiteRegions:
+    """
+    White region mask plus the intermediates later stages would recompute
+
+    Returns the grayscale image (canny_edge_detection and edge_maps accept
+    it in place of the RGB image), the mask of create_mask_from_white_regions
+    and, with ``components``, its connected components, which mask_regions
+    and ROI inpainting take instead of labelling the mask again.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    mask = _white_mask(gray, threshold)
+    found = Components(*cv2.connectedComponentsWithStats(mask, connectivity=8)[:3]) if components else None
+    return WhiteRegions(gray, mask, found)
+
+
+def _white_mask(gray: np.ndarray, threshold: int,
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Threshold and clean a grayscale image, writing into ``out`` (may be ``gray``)"""
+    mask = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY, dst=out)[1]
+    return _close_open(mask)
+
+
+def _close_open(mask: np.ndarray) -> np.ndarray:
+    """
+    3x3 closing followed by 3x3 opening, in place
+
+    The closing ends and the opening starts with a 3x3 erosion; two 3x3
+    erosions are one 5x5 erosion, so the four passes run as three.
+    """
+    cv2.dilate(mask, _KERNEL_3, dst=mask)
+    cv2.erode(mask, _KERNEL_5, dst=mask)
+    cv2.dilate(mask, _KERNEL_3, dst=mask)
     return mask
 
 
+def may_have_white_regions(image_path: str, threshold: int = 240,
+                           size: Optional[Tuple[int, int]] = None, draft: bool = True,
+                           resample: str = 'lanczos', margin: int = PRESCAN_MARGIN,
+                           timer: StageTimer = no_timer) -> bool:
+    """
+    Cheap, conservative check whether create_mask_from_white_regions can find anything
+
+    Closing and opening keep an empty threshold mask empty, so a detected
+    region needs at least one gray pixel above ``threshold``. Only the
+    luma plane is decoded (JPEGs skip the chroma passes and colour
+    conversion), at the same DCT scale and size as load_image, and the
+    image is rejected only if no pixel exceeds ``threshold - margin``.
+
+    A coarser decode is deliberately not used: averaging can hide sparse
+    bright pixels that the closing merges into a region, such as a
+    one-in-nine lattice.
+    """
+    with Image.open(image_path) as image:
+        image.draft('L', (size[0] * 2, size[1] * 2) if size and draft else image.size)
+        with timer('prescan', image.width * image.height):
+            gray = image.convert('L')
+            if size and gray.size != tuple(size):
+                gray = gray.resize(size, RESAMPLE_FILTERS[resample])
+            return int(np.asarray(gray).max()) > threshold - margin
+
+
 def canny_edge_detection(image: np.ndarray, sigma: float = 2,
                         low_threshold: float = 0.1, high_threshold: float = 0.2) -> np.ndarray:
     """Apply Canny edge detection"""
@@ -61,17 +346,396 @@ def canny_edge_detection(image: np.ndarray, sigma: float = 2,
 
 
 def edge_guided_inpainting(image: np.ndarray, mask: np.ndarray, sigma: float = 2,
-                          edge_weight: float = 0.3, inpaint_radius: int = 3) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-    """Perform edge-guided inpainting using traditional methods"""
-    edges = canny_edge_detection(image, sigma=sigma)
+                          edge_weight: float = 0.3, inpaint_radius: int = 3,
+                          roi: bool = False, method: str = 'blend',
+                          out: Optional[np.ndarray] = None,
+                          timer: StageTimer = no_timer, pyramid_levels: int = 0,
+                          pyramid_band: int = 8, compute_edges: bool = True,
+                          components: Optional[Components] = None
+                          ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Perform edge-guided inpainting using traditional methods
+
+    ``method`` selects the inpainting strategy: 'telea' or 'ns' run a single
+    cv2.inpaint pass, 'blend' runs both passes concurrently and mixes them
+    with ``edge_weight`` inside the mask. A blend with an edge_weight of 0 or
+    1 only runs the pass that contributes.
+
+    With ``roi=True`` only padded crops around the connected components of
+    the mask are processed, so the cost scales with the mask area instead of
+    the image size. Inside the mask the result matches the full-frame path
+    (up to resampling differences when combined with pyramid_levels); edges
+    are only computed inside the crops and are zero elsewhere. Passing the
+    mask's ``components`` (see detect_white_regions) skips labelling it.
+
+    ``pyramid_levels`` > 0 switches to coarse-to-fine inpainting, see
+    pyramid_inpaint; ``pyramid_band`` is the width of the border band that
+    is refined at full resolution.
+
+    The edge maps do not influence the result. With ``compute_edges=False``
+    they are skipped and returned as None; edge_maps computes them later.
+
+    ``out`` may be a preallocated uint8 array shaped like ``image``; the
+    result is written into it and returned instead of a new allocation.
+    ``timer`` is entered around the canny, inpaint_telea, inpaint_ns,
+    blend and pyramid stages (once per region in ROI mode).
+    """
+    if method not in INPAINT_METHODS:
+        raise ValueError(f"Unknown inpainting method '{method}', expected one of {INPAINT_METHODS}")
+    _check_out(out, image.shape)
+
+    if roi:
+        return _roi_edge_guided_inpainting(image, mask, sigma, edge_weight,
+                                           inpaint_radius, method, out, timer,
+                                           pyramid_levels, pyramid_band, compute_edges,
+                                           components)
+
+    edges, edges_dilated = edge_maps(image, mask, sigma, timer) if compute_edges else (None, None)
+    return pyramid_inpaint(image, mask, pyramid_levels, pyramid_band, inpaint_radius,
+                           method, edge_weight, out, timer), edges, edges_dilated
+
+
+def edge_maps(image: np.ndarray, mask: np.ndarray, sigma: float = 2,
+              timer: StageTimer = no_timer) -> Tuple[np.ndarray, np.ndarray]:
+    """Canny edges of the RGB or grayscale image and their dilation with the masked edges removed"""
+    with timer('canny', image.shape[0] * image.shape[1]):
+        edges = canny_edge_detection(image, sigma=sigma)
+        edges_dilated = _dilate_known_edges(edges, mask)
+    return edges, edges_dilated
+
+
+def _dilate_known_edges(edges: np.ndarray, mask: np.ndarray,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Dilate the edges outside the mask, writing into ``out`` (may be ``edges``)"""
     edges_masked = edges.copy()
     edges_masked[mask > 0] = 0
+    return cv2.dilate(edges_masked, _KERNEL_3, dst=out, iterations=2)
+
+
+def inpaint_masked(image: np.ndarray, mask: np.ndarray, inpaint_radius: int = 3,
+                   method: str = 'blend', edge_weight: float = 0.3,
+                   out: Optional[np.ndarray] = None,
+                   timer: StageTimer = no_timer) -> np.ndarray:
+    """Run the inpainting passes of edge_guided_inpainting without edge detection"""
+    _check_out(out, image.shape)
+    if out is not None and not _cv2_writable(out):
+        # cv2 rejects destinations whose pixels or channels are strided
+        np.copyto(out, inpaint_masked(image, mask, inpaint_radius, method, edge_weight,
+                                      timer=timer))
+        return out
+    if method == 'blend' and edge_weight <= 0:
+        method = 'telea'
+    elif method == 'blend' and edge_weight >= 1:
+        method = 'ns'
+    pixels = image.shape[0] * image.shape[1]
+
+    def inpaint_ns(dst: Optional[np.ndarray] = None) -> np.ndarray:
+        with timer('inpaint_ns', pixels):
+            return cv2.inpaint(image, mask, inpaint_radius, cv2.INPAINT_NS, dst=dst)
+
+    def inpaint_telea(dst: Optional[np.ndarray] = None) -> np.ndarray:
+        with timer('inpaint_telea', pixels):
+            return cv2.inpaint(image, mask, inpaint_radius, cv2.INPAINT_TELEA, dst=dst)
+
+    if method == 'telea':
+        inpainted = inpaint_telea(out)
+    elif method == 'ns':
+        inpainted = inpaint_ns(out)
+    else:
+        # cv2.inpaint releases the GIL, so the NS pass runs alongside Telea
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ns_future = executor.submit(inpaint_ns)
+            inpainted = inpaint_telea(out)
+            inpainted_fm = ns_future.result()
+
+        with timer('blend', pixels):
+            blend_masked(inpainted, inpainted_fm, mask, edge_weight)
+    return inpainted
+
+
+def pyramid_inpaint(image: np.ndarray, mask: np.ndarray, levels: int = 2,
+                    band_width: int = 8, inpaint_radius: int = 3,
+                    method: str = 'blend', edge_weight: float = 0.3,
+                    out: Optional[np.ndarray] = None,
+                    timer: StageTimer = no_timer) -> np.ndarray:
+    """
+    Coarse-to-fine inpainting for large holes
+
+    The hole is filled at 1 / 2**levels of the resolution, where
+    cv2.inpaint is cheap, and the upsampled fill initializes the hole at
+    full resolution. Only a band of ``band_width`` pixels inside the mask
+    border is then inpainted again at full resolution, blending the coarse
+    fill into the surrounding detail. More levels and a narrower band are
+    faster; ``levels=0`` is the single-scale inpaint_masked.
+    """
+    if levels <= 0:
+        return inpaint_masked(image, mask, inpaint_radius, method, edge_weight, out, timer)
+
+    height, width = mask.shape[:2]
+    scale = 2 ** levels
+    coarse_size = (max(1, width // scale), max(1, height // scale))
+    binary = (mask > 0).astype(np.uint8)
+
+    with timer('pyramid', height * width):
+        coarse_image = cv2.resize(image, coarse_size, interpolation=cv2.INTER_AREA)
+        # Any masked pixel marks its whole coarse cell as unknown
+        coarse_mask = cv2.resize(binary.astype(np.float32), coarse_size,
+                                 interpolation=cv2.INTER_AREA)
+        coarse_mask = (coarse_mask > 0).astype(np.uint8) * 255
+
+    coarse = inpaint_masked(coarse_image, coarse_mask, inpaint_radius, method,
+                            edge_weight, timer=timer)
+
+    with timer('pyramid', height * width):
+        fill = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_LINEAR)
+        initial = image.copy()
+        np.copyto(initial, fill, where=binary[..., None].astype(bool))
+
+        kernel = np.ones((2 * band_width + 1, 2 * band_width + 1), np.uint8)
+        band = cv2.subtract(binary, cv2.erode(binary, kernel)) * 255
+
+    return inpaint_masked(initial, band, inpaint_radius, method, edge_weight, out, timer)
+
+
+def blend_masked(target: np.ndarray, other: np.ndarray, mask: np.ndarray,
+                 weight: float) -> np.ndarray:
+    """
+    Blend ``other`` into ``target`` in place at masked pixels only
+
+    Computes ``(1 - weight) * target + weight * other`` with rounding via
+    cv2.addWeighted on the gathered masked pixels, so the temporaries scale
+    with the mask area and pixels outside the mask are never touched.
+    """
+    if not target.flags.c_contiguous:
+        # Views such as crops of a larger canvas cannot be flattened in place
+        where = np.nonzero(mask)
+        pixels = target[where]
+        if pixels.size:
+            target[where] = cv2.addWeighted(pixels, 1 - weight, other[where], weight,
+                                            0).reshape(pixels.shape)
+        return target
+
+    index = np.flatnonzero(mask)
+    if index.size == 0:
+        return target
+
+    channels = target.shape[2] if target.ndim == 3 else 1
+    target_pixels = target.reshape(-1, channels)
+    blended = cv2.addWeighted(target_pixels[index], 1 - weight,
+                              other.reshape(-1, channels)[index], weight, 0)
+    target_pixels[index] = blended.reshape(-1, channels)
+    return target
+
+
+def roi_margin(inpaint_radius: int, pyramid_levels: int = 0) -> int:
+    """Padding around a mask component that makes crop inpainting exact"""
+    # Both cv2.inpaint methods only read known pixels within the radius,
+    # which covers 2**levels full-resolution pixels per coarse pixel
+    return (inpaint_radius + 2) << max(pyramid_levels, 0)
+
+
+def mask_regions(mask: np.ndarray, margin: int,
+                 components: Optional[Components] = None
+                 ) -> Tuple[np.ndarray, List[Tuple[slice, slice, List[int]]]]:
+    """
+    Group mask components whose padded bounding boxes overlap
+
+    ``components`` are the mask's 8-connected components when already known.
+
+    Returns:
+        Label image and a list of (row slice, column slice, component labels)
+        with one entry per independent region
+    """
+    if components is None:
+        components = Components(*cv2.connectedComponentsWithStats(
+            (mask > 0).astype(np.uint8), connectivity=8)[:3])
+    count, labels, stats = components
+    if count <= 1:
+        return labels, []
+
+    height, width = mask.shape[:2]
+    x0 = np.maximum(stats[1:, cv2.CC_STAT_LEFT] - margin, 0)
+    y0 = np.maximum(stats[1:, cv2.CC_STAT_TOP] - margin, 0)
+    x1 = np.minimum(stats[1:, cv2.CC_STAT_LEFT] + stats[1:, cv2.CC_STAT_WIDTH] + margin, width)
+    y1 = np.minimum(stats[1:, cv2.CC_STAT_TOP] + stats[1:, cv2.CC_STAT_HEIGHT] + margin, height)
+
+    # Union-find over pairwise box overlaps
+    overlaps = ((x0[:, None] < x1[None, :]) & (x0[None, :] < x1[:, None]) &
+                (y0[:, None] < y1[None, :]) & (y0[None, :] < y1[:, None]))
+    parent = list(range(count - 1))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(overlaps, 1))):
+        parent[find(i)] = find(j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(count - 1):
+        groups.setdefault(find(i), []).append(i)
+
+    regions = []
+    for members in groups.values():
+        rows = slice(int(y0[members].min()), int(y1[members].max()))
+        cols = slice(int(x0[members].min()), int(x1[members].max()))
+        regions.append((rows, cols, [i + 1 for i in members]))
+    return labels, regions
+
+
+def _roi_edge_guided_inpainting(image: np.ndarray, mask: np.ndarray, sigma: float,
+                                edge_weight: float, inpaint_radius: int,
+                                method: str, out: Optional[np.ndarray],
+                                timer: StageTimer, pyramid_levels: int = 0,
+                                pyramid_band: int = 8, compute_edges: bool = True,
+                                components: Optional[Components] = None
+                                ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """Run edge_guided_inpainting on padded crops around the mask components"""
+    if out is None:
+        result = image.copy()
+    else:
+        result = out
+        np.copyto(result, image)
+    edges = np.zeros(mask.shape[:2], np.uint8) if compute_edges else None
+    edges_dilated = np.zeros(mask.shape[:2], np.uint8) if compute_edges else None
+
+    with timer('roi_regions', mask.shape[0] * mask.shape[1]):
+        labels, regions = mask_regions(mask, roi_margin(inpaint_radius, pyramid_levels),
+                                       components)
+    for rows, cols, members in regions:
+        crop_mask = mask[rows, cols]
+        crop_result, crop_edges, crop_dilated = edge_guided_inpainting(
+            image[rows, cols], crop_mask, sigma=sigma,
+            edge_weight=edge_weight, inpaint_radius=inpaint_radius, method=method,
+            timer=timer, pyramid_levels=pyramid_levels, pyramid_band=pyramid_band,
+            compute_edges=compute_edges)
+
+        # Paste only this region's components; crops may overlap others
+        paste = np.isin(labels[rows, cols], members)
+        result[rows, cols][paste] = crop_result[paste]
+        if edges is not None and edges_dilated is not None:
+            assert crop_edges is not None and crop_dilated is not None
+            edges[rows, cols] = crop_edges
+            edges_dilated[rows, cols] = crop_dilated
+
+    return result, edges, edges_dilated
+
+
+def _check_batch(images: np.ndarray) -> None:
+    if images.ndim != 4 or images.shape[-1] != 3 or images.dtype != np.uint8:
+        raise ValueError(f"Expected an N x H x W x 3 uint8 array, got {images.dtype} {images.shape}")
+
+
+def _check_out(out: Optional[np.ndarray], shape: Tuple[int, ...]) -> None:
+    """Reject an output buffer cv2 would silently replace with a new array"""
+    if out is not None and (out.dtype != np.uint8 or out.shape != tuple(shape)):
+        raise ValueError(f"Expected out to be a uint8 array of shape {tuple(shape)}, "
+                         f"got {out.dtype} {out.shape}")
+
+
+def _cv2_writable(array: np.ndarray) -> bool:
+    """Whether cv2 can write into the array in place; only rows may be strided"""
+    pixel = array.itemsize * (array.shape[2] if array.ndim == 3 else 1)
+    return array.strides[1] == pixel and (array.ndim < 3 or array.strides[2] == array.itemsize)
+
+
+def _batch_target(out: Optional[np.ndarray], shape: Tuple[int, ...]) -> np.ndarray:
+    """Contiguous array the batch functions write into, ``out`` when it qualifies"""
+    _check_out(out, shape)
+    if out is not None and out.flags.c_contiguous:
+        return out
+    return np.empty(shape, np.uint8)
+
+
+def _batch_result(target: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """Copy a batch result computed in a temporary into a strided ``out``"""
+    if out is None or target is out:
+        return target
+    np.copyto(out, target)
+    return out
+
+
+def _batch_gray(images: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Grayscale a contiguous NHWC batch with a single cvtColor call"""
+    n, height, width = images.shape[:3]
+    cv2.cvtColor(np.ascontiguousarray(images).reshape(n * height, width, 3),
+                 cv2.COLOR_RGB2GRAY, dst=out.reshape(n * height, width))
+    return out
+
+
+def create_masks_from_white_regions_batch(images: np.ndarray, threshold: int = 240,
+                                          out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Batch version of create_mask_from_white_regions for an N x H x W x 3 array
+
+    Grayscale conversion and thresholding run once over the stacked batch;
+    the morphology passes run per image in place. Returns an N x H x W
+    array, written into ``out`` when given.
+    """
+    _check_batch(images)
+    masks = _batch_target(out, images.shape[:3])
+
+    _batch_gray(images, masks)
+    flat = masks.reshape(-1, masks.shape[2])
+    cv2.threshold(flat, threshold, 255, cv2.THRESH_BINARY, dst=flat)
+
+    # Morphology must not cross image boundaries, so it runs per image
+    for mask in masks:
+        _close_open(mask)
+    return _batch_result(masks, out)
+
+
+def canny_edge_detection_batch(images: np.ndarray, sigma: float = 2,
+                               low_threshold: float = 0.1, high_threshold: float = 0.2,
+                               out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Batch version of canny_edge_detection for an N x H x W x 3 array
+
+    Returns an N x H x W edge array, written into ``out`` when given. One
+    grayscale batch and one blur buffer are reused for every image.
+    """
+    _check_batch(images)
+    result = _batch_target(out, images.shape[:3])
+
+    gray = _batch_gray(images, np.empty(images.shape[:3], np.uint8))
+    blurred = np.empty(images.shape[1:3], np.uint8)
+    low, high = int(low_threshold * 255), int(high_threshold * 255)
+    for gray_image, edges in zip(gray, result):
+        cv2.GaussianBlur(gray_image, (0, 0), sigma, dst=blurred)
+        cv2.Canny(blurred, low, high, edges=edges)
+    return _batch_result(result, out)
+
+
+def edge_guided_inpainting_batch(images: np.ndarray, masks: np.ndarray, sigma: float = 2,
+                                 edge_weight: float = 0.3, inpaint_radius: int = 3,
+                                 method: str = 'blend',
+                                 out: Optional[np.ndarray] = None,
+                                 compute_edges: bool = True
+                                 ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Batch version of edge_guided_inpainting
 
-    kernel = np.ones((3, 3), np.uint8)
-    edges_dilated = cv2.dilate(edges_masked, kernel, iterations=2)
+    Takes N x H x W x 3 images and N x H x W masks and returns stacked
+    results, edges and dilated edges (None with ``compute_edges=False``).
+    Results are written into ``out`` when given.
+    """
+    _check_batch(images)
+    if masks.shape != images.shape[:3]:
+        raise ValueError(f"Masks shape {masks.shape} does not match images {images.shape[:3]}")
+    if method not in INPAINT_METHODS:
+        raise ValueError(f"Unknown inpainting method '{method}', expected one of {INPAINT_METHODS}")
+    results = _batch_target(out, images.shape)
 
-    inpainted = cv2.inpaint(image, mask, inpaint_radius, cv2.INPAINT_TELEA)
-    inpainted_fm = cv2.inpaint(image, mask, inpaint_radius, cv2.INPAINT_NS)
+    for image, mask, result in zip(images, masks, results):
+        inpaint_masked(image, mask, inpaint_radius, method, edge_weight, out=result)
+    results = _batch_result(results, out)
+    if not compute_edges:
+        return results, None, None
 
-    final_result = (1 - edge_weight) * inpainted + edge_weight * inpainted_fm
-    return final_result.astype(np.uint8), edges, edges_dilated
\ No newline at end of file
+    edges = canny_edge_detection_batch(images, sigma=sigma)
+    edges_dilated = np.empty_like(edges)
+    for image_edges, mask, dilated in zip(edges, masks, edges_dilated):
+        _dilate_known_edges(image_edges, mask, out=dilated)
+    return results, edges, edges_dilated
@@ -0,0 +1,226 @@
+"""
+SQLite lease queue for sharing a batch between workers on several hosts
+
+Workers open the same queue file on a shared filesystem and claim items
+one at a time. A claim is a lease that expires unless the worker renews it
+with heartbeats, so the items of a crashed worker are claimed again by the
+others once their lease runs out. There is no coordinator: every
+transition is a short write transaction on the queue file.
+
+The filesystem must support POSIX locks (local disks, NFSv4 with locking),
+and host clocks must agree to well within the lease duration.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def default_worker_id() -> str:
+    """Host name and process id, unique among concurrently running workers"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Lease-based work queue stored in one SQLite file
+
+    ``claim`` hands out pending items, and leased items whose lease
+    expired, in insertion order; ``claims`` keeps claiming until no item
+    is pending or leased by anyone else. An item whose lease expired
+    ``max_attempts`` times is marked failed instead of being handed out
+    again, so an input that crashes its worker cannot take down every
+    worker in turn. ``complete`` and ``fail`` only apply while the caller
+    still holds the lease.
+
+    ``job`` identifies the work the queue was created for, e.g. a
+    configuration hash; opening an existing queue with a different job
+    raises ValueError instead of silently skipping items done for another
+    job.
+    """
+
+    FILENAME = '.work_queue.sqlite'
+
+    def __init__(self, path: str, worker_id: Optional[str] = None,
+                 lease_seconds: float = 60.0, max_attempts: int = 3,
+                 job: Optional[str] = None, poll_seconds: float = 1.0):
+        if os.path.isdir(path):
+            path = os.path.join(path, self.FILENAME)
+        self.path = path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        # Items leased by this instance; only these are renewed, so the
+        # leases of a crashed earlier worker with the same id still expire
+        self._held: Set[str] = set()
+        self._lock = threading.Lock()
+
+        db = self._connect()
+        try:
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+        if job is not None:
+            with self._transaction() as db:
+                db.execute("INSERT OR IGNORE INTO meta VALUES ('job', ?)", (job,))
+                recorded = db.execute("SELECT value FROM meta WHERE key = 'job'").fetchone()[0]
+            if recorded != job:
+                raise ValueError(f"Queue {path} belongs to another job; "
+                                 f"use a new queue file for a new configuration")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are started explicitly
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction on a fresh connection, safe to use from any thread"""
+        db = self._connect()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        finally:
+            db.close()
+
+    def add(self, items: Iterable[str]) -> int:
+        """Enqueue items not already in the queue, returning how many were new"""
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany('INSERT OR IGNORE INTO items (item) VALUES (?)',
+                           ((item,) for item in items))
+            return db.total_changes - before
+
+    def claim(self) -> Optional[str]:
+        """Lease the next available item, or return None when there is none"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE items SET status = ?, error = 'lease expired too often' "
+                       "WHERE status = ? AND expires < ? AND attempts >= ?",
+                       (FAILED, LEASED, now, self.max_attempts))
+            row = db.execute('SELECT item FROM items WHERE status = ? OR '
+                             '(status = ? AND expires < ?) ORDER BY rowid LIMIT 1',
+                             (PENDING, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE items SET status = ?, worker = ?, expires = ?, '
+                       'attempts = attempts + 1 WHERE item = ?',
+                       (LEASED, self.worker_id, now + self.lease_seconds, row[0]))
+        item: str = row[0]
+        with self._lock:
+            self._held.add(item)
+        return item
+
+    def claims(self) -> Iterator[str]:
+        """
+        Claim items one at a time until none are pending or leased elsewhere
+
+        When nothing is claimable but other workers still hold leases, waits
+        for the earliest one to expire instead of stopping, so the items of
+        a worker that dies are still processed by the workers that outlive
+        it. The queue is checked again at least every ``poll_seconds`` in
+        case those leases are completed or renewed in the meantime.
+        """
+        while True:
+            item = self.claim()
+            if item is not None:
+                yield item
+                continue
+            expires = self._next_expiry()
+            if expires is None:
+                return
+            time.sleep(min(max(expires - time.time(), 0.05), self.poll_seconds))
+
+    def _next_expiry(self) -> Optional[float]:
+        """Earliest expiry of leases not held by this instance, None if there are none"""
+        with self._transaction() as db:
+            rows = db.execute('SELECT item, expires FROM items WHERE status = ?',
+                              (LEASED,)).fetchall()
+        with self._lock:
+            expiries = [expires for item, expires in rows if item not in self._held]
+        return min(expiries) if expiries else None
+
+    def renew(self) -> int:
+        """Extend every lease held by this instance, returning how many"""
+        with self._lock:
+            held = [(item,) for item in self._held]
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany('UPDATE items SET expires = ? WHERE item = ? AND status = ? AND worker = ?',
+                           ((time.time() + self.lease_seconds, item, LEASED, self.worker_id)
+                            for item, in held))
+            return db.total_changes - before
+
+    def complete(self, item: str) -> bool:
+        """Mark a leased item done; False if the lease was lost to another worker"""
+        return self._finish(item, DONE, None)
+
+    def fail(self, item: str, error: str) -> bool:
+        """Mark a leased item failed with an error message"""
+        return self._finish(item, FAILED, error)
+
+    def _finish(self, item: str, status: str, error: Optional[str]) -> bool:
+        with self._lock:
+            self._held.discard(item)
+        with self._transaction() as db:
+            return db.execute('UPDATE items SET status = ?, error = ?, expires = NULL '
+                              'WHERE item = ? AND status = ? AND worker = ?',
+                              (status, error, item, LEASED, self.worker_id)).rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items per status"""
+        with self._transaction() as db:
+            rows = db.execute('SELECT status, COUNT(*) FROM items GROUP BY status').fetchall()
+        counts = dict.fromkeys((PENDING, LEASED, DONE, FAILED), 0)
+        counts.update(rows)
+        return counts
+
+    @contextmanager
+    def heartbeat(self, interval: Optional[float] = None) -> Iterator[None]:
+        """Renew this worker's leases on a background thread while the block runs"""
+        interval = interval or self.lease_seconds / 3
+        stop = threading.Event()
+
+        def beat() -> None:
+            while not stop.wait(interval):
+                try:
+                    self.renew()
+                except sqlite3.OperationalError:
+                    pass  # Queue busy for too long; retry on the next beat
+
+        thread = threading.Thread(target=beat, name='work-queue-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
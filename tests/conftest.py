@@ -0,0 +1,16 @@
+"""
+Shared helpers for the test suite
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import numpy as np
+
+
+def make_masked_image(size: int = 64, seed: int = 0) -> np.ndarray:
+    """Create a random image with a white square to inpaint"""
+    rng = np.random.RandomState(seed)
+    image = rng.randint(50, 200, (size, size, 3)).astype(np.uint8)
+    image[size // 4:size // 2, size // 4:size // 2] = 255
+    return image
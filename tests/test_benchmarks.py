@@ -0,0 +1,39 @@
+"""
+Smoke test for the benchmark suite
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCHMARK_SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'run_benchmarks.py')
+
+
+@pytest.mark.slow
+def test_benchmark_suite_runs_and_compares():
+    """Test that a tiny sweep produces results that compare against themselves"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = os.path.join(temp_dir, 'results.json')
+        command = [sys.executable, BENCHMARK_SCRIPT, '--sizes', '256', '--repeat', '1',
+                   '--coverages', '0.02', '--cases', 'canny_edge_detection', 'process_image']
+        subprocess.run(command + ['--output', output], check=True, capture_output=True)
+
+        with open(output) as fh:
+            report = json.load(fh)
+        assert [entry['case'] for entry in report['results']] == [
+            'canny_edge_detection', 'process_image']
+        assert all(entry['p50_ms'] > 0 for entry in report['results'])
+
+        # A huge tolerance can never flag a regression against the same machine
+        subprocess.run(command + ['--compare', output, '--tolerance', '100'],
+                       check=True, capture_output=True)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,102 @@
+"""
+Unit tests for the memory-mapped dataset format
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import numpy as np
+import os
+import shutil
+import tempfile
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dataset import MemmapDataset, pack_dataset
+from src.face_reconstructor import FaceReconstructor
+from src.utils import save_image
+
+from conftest import make_masked_image
+
+
+class TestMemmapDataset:
+    """Test packing and reading datasets"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.image_dir = os.path.join(self.temp_dir, 'images')
+        self.mask_dir = os.path.join(self.temp_dir, 'masks')
+        self.packed_dir = os.path.join(self.temp_dir, 'packed')
+        self.images = [make_masked_image(seed=i) for i in range(3)]
+        for i, image in enumerate(self.images):
+            save_image(image, os.path.join(self.image_dir, f'face_{i}.png'))
+            mask = np.zeros(image.shape[:2], dtype=np.uint8)
+            mask[10:20, 30:40] = 255
+            save_image(mask, os.path.join(self.mask_dir, f'face_{i}.png'))
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_pack_round_trip(self):
+        """Test that packed images are returned unchanged as read-only views"""
+        pack_dataset(self.image_dir, self.packed_dir, masks_dir=self.mask_dir)
+        dataset = MemmapDataset(self.packed_dir)
+
+        assert len(dataset) == 3
+        assert dataset.index_of('face_2') == 2
+        name, image, mask = dataset[1]
+        assert name == 'face_1'
+        np.testing.assert_array_equal(image, self.images[1])
+        assert np.shares_memory(image, dataset.images)
+        assert not image.flags.writeable
+        assert mask.shape == (64, 64)
+        assert set(np.unique(mask)) == {0, 255}
+
+    def test_mixed_sizes_require_size(self):
+        """Test that differently sized images are rejected unless resized"""
+        save_image(make_masked_image(size=32), os.path.join(self.image_dir, 'small.png'))
+
+        with pytest.raises(ValueError):
+            pack_dataset(self.image_dir, self.packed_dir)
+
+        dataset = pack_dataset(self.image_dir, self.packed_dir, size=(48, 40))
+        assert dataset.images.shape == (4, 40, 48, 3)
+        assert dataset.masks is None
+
+    def test_missing_mask_raises(self):
+        """Test that every image needs a mask when a masks directory is given"""
+        os.remove(os.path.join(self.mask_dir, 'face_0.png'))
+
+        with pytest.raises(ValueError):
+            pack_dataset(self.image_dir, self.packed_dir, masks_dir=self.mask_dir)
+
+    def test_process_dataset_matches_process_image(self):
+        """Test that reconstructing from the dataset equals reconstructing from files"""
+        pack_dataset(self.image_dir, self.packed_dir)
+        reconstructor = FaceReconstructor({'save_intermediate': False})
+
+        for name, results in reconstructor.process_dataset(self.packed_dir, use_masks=False):
+            expected = reconstructor.process_image(os.path.join(self.image_dir, f'{name}.png'))
+            np.testing.assert_array_equal(results['result'], expected['result'])
+
+    def test_process_dataset_uses_packed_masks(self):
+        """Test that packed masks replace white region detection and name the outputs"""
+        pack_dataset(self.image_dir, self.packed_dir, masks_dir=self.mask_dir)
+        output_dir = os.path.join(self.temp_dir, 'out')
+        reconstructor = FaceReconstructor({'output_format': 'png'})
+
+        results = dict(reconstructor.process_dataset(self.packed_dir, output_dir, indices=[2]))
+
+        assert list(results) == ['face_2']
+        assert results['face_2']['mask'][15, 35] == 255
+        assert results['face_2']['mask'][40, 20] == 0
+        assert os.path.exists(os.path.join(output_dir, 'face_2_reconstructed.png'))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
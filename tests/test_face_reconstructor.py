@@ -0,0 +1,387 @@
+"""
+Unit tests for the FaceReconstructor class
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import numpy as np
+import cv2
+import io
+import os
+import pickle
+import shutil
+import tempfile
+from PIL import Image
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor, _init_worker
+from src.instrumentation import Instrumentation
+from src.utils import canny_edge_detection, create_mask_from_white_regions, edge_guided_inpainting
+
+from conftest import make_masked_image
+
+
+class TestConfig:
+    """Test configuration handling"""
+
+    def test_partial_config_keeps_defaults(self):
+        """Test that a partial config is merged over the defaults"""
+        reconstructor = FaceReconstructor({'threshold': 200})
+
+        assert reconstructor.config['threshold'] == 200
+        assert reconstructor.config['edge_sigma'] == 2
+
+
+class TestSaveResults:
+    """Test artifact selection and output encodings"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.input_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        self.image_path = os.path.join(self.input_dir, 'face.png')
+        Image.fromarray(make_masked_image()).save(self.image_path)
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.input_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_default_artifacts(self):
+        """Test that all four artifacts are written by default"""
+        FaceReconstructor().process_image(self.image_path, self.output_dir)
+
+        assert sorted(os.listdir(self.output_dir)) == [
+            'face_comparison.jpg', 'face_edges.jpg', 'face_mask.jpg', 'face_reconstructed.jpg']
+
+    @pytest.mark.parametrize('output_format', ['png', 'webp'])
+    def test_selected_artifacts(self, output_format):
+        """Test that only the requested artifacts are written"""
+        reconstructor = FaceReconstructor({'save_artifacts': ('reconstructed',),
+                                           'output_format': output_format,
+                                           'optimize_output': False})
+        reconstructor.process_image(self.image_path, self.output_dir)
+
+        assert os.listdir(self.output_dir) == [f'face_reconstructed.{output_format}']
+
+    def test_npy_output_is_lossless(self):
+        """Test that the npy format stores the exact result array"""
+        reconstructor = FaceReconstructor({'save_artifacts': ('reconstructed', 'mask'),
+                                           'output_format': 'npy'})
+        results = reconstructor.process_image(self.image_path, self.output_dir)
+
+        np.testing.assert_array_equal(
+            np.load(os.path.join(self.output_dir, 'face_reconstructed.npy')), results['result'])
+        np.testing.assert_array_equal(
+            np.load(os.path.join(self.output_dir, 'face_mask.npy')), results['mask'])
+
+    def test_edges_computed_on_demand(self):
+        """Test that edges are only computed when saved or read"""
+        instrumentation = Instrumentation()
+        reconstructor = FaceReconstructor({'save_artifacts': ('reconstructed',)},
+                                          instrumentation=instrumentation)
+        results = reconstructor.process_image(self.image_path, self.output_dir)
+
+        assert 'canny' not in instrumentation.summary()
+        assert 'edges' in results
+        expected = canny_edge_detection(results['original'], sigma=2)
+        np.testing.assert_array_equal(results['edges'], expected)
+        assert results['edges_dilated'].shape == expected.shape
+        assert instrumentation.summary()['canny']['count'] == 1
+
+    def test_lazy_edges_behave_like_dict_entries(self):
+        """Test that lazy keys are listed, copied and pickled like stored ones"""
+        results = FaceReconstructor({'save_intermediate': False}).process_image(self.image_path)
+
+        assert len(results) == 5
+        assert sorted(results) == ['edges', 'edges_dilated', 'mask', 'original', 'result']
+        restored = pickle.loads(pickle.dumps(results))
+        np.testing.assert_array_equal(restored['edges'], results['edges'])
+        assert sorted(dict(results.copy())) == sorted(results)
+
+    def test_unknown_format(self):
+        """Test that an unknown output format raises ValueError"""
+        reconstructor = FaceReconstructor({'output_format': 'gif'})
+        with pytest.raises(ValueError):
+            reconstructor.process_image(self.image_path, self.output_dir)
+
+
+class TestInMemory:
+    """Test the array and bytes entry points"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.image = make_masked_image()
+        self.work_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.work_dir)
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        os.chdir(self.cwd)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_process_array_does_not_copy(self):
+        """Test that contiguous uint8 RGB input is used in place and nothing is saved"""
+        results = FaceReconstructor().process_array(self.image)
+
+        assert results['original'] is self.image
+        assert 'encoded' not in results
+        assert os.listdir(self.work_dir) == []
+
+    def test_process_array_converts_layouts(self):
+        """Test that non-contiguous and RGBA inputs give the same result"""
+        reconstructor = FaceReconstructor()
+        expected = reconstructor.process_array(self.image)['result']
+
+        flipped = np.ascontiguousarray(self.image[:, ::-1])[:, ::-1]
+        rgba = np.dstack([self.image, np.full(self.image.shape[:2], 255, np.uint8)])
+        for image in (flipped, rgba):
+            np.testing.assert_array_equal(reconstructor.process_array(image)['result'],
+                                          expected)
+
+    def test_roi_reuses_detected_components(self):
+        """Test that ROI reconstruction with detected components matches the utils path"""
+        results = FaceReconstructor({'roi_inpainting': True}).process_array(self.image)
+        mask = create_mask_from_white_regions(self.image)
+        expected, edges, _ = edge_guided_inpainting(self.image, mask, roi=False)
+
+        np.testing.assert_array_equal(results['mask'], mask)
+        inside = mask > 0
+        np.testing.assert_array_equal(results['result'][inside], expected[inside])
+        np.testing.assert_array_equal(results['edges'], edges)
+
+    def test_process_array_honours_zero_threshold(self):
+        """Test that a threshold of 0 is used rather than replaced by the default"""
+        results = FaceReconstructor().process_array(self.image, mask_threshold=0)
+
+        expected = create_mask_from_white_regions(self.image, threshold=0)
+        np.testing.assert_array_equal(results['mask'], expected)
+        assert not np.array_equal(expected, create_mask_from_white_regions(self.image))
+
+    def test_process_bytes_round_trip(self):
+        """Test that encoded input and output match the array path"""
+        buffer = io.BytesIO()
+        Image.fromarray(self.image).save(buffer, format='PNG')
+        reconstructor = FaceReconstructor()
+
+        results = reconstructor.process_bytes(buffer.getvalue(), output_format='png')
+
+        expected = reconstructor.process_array(self.image)['result']
+        np.testing.assert_array_equal(results['result'], expected)
+        np.testing.assert_array_equal(np.array(Image.open(io.BytesIO(results['encoded']))),
+                                      expected)
+        assert os.listdir(self.work_dir) == []
+
+    def test_process_bytes_resizes_mask(self):
+        """Test that a supplied mask is resized along with the image"""
+        mask = np.zeros((64, 64), np.uint8)
+        mask[8:24, 8:24] = 255
+        encoded = []
+        for array in (self.image, mask):
+            buffer = io.BytesIO()
+            Image.fromarray(array).save(buffer, format='PNG')
+            encoded.append(buffer.getvalue())
+
+        results = FaceReconstructor().process_bytes(*encoded, target_size=(32, 32))
+
+        assert results['result'].shape == (32, 32, 3)
+        np.testing.assert_array_equal(results['mask'], mask[::2, ::2])
+
+    def test_process_array_normalises_mask(self):
+        """Test that bool masks work and mismatched masks raise ValueError"""
+        mask = np.zeros((64, 64), bool)
+        mask[8:24, 8:24] = True
+        reconstructor = FaceReconstructor()
+
+        results = reconstructor.process_array(self.image, mask)
+
+        expected = reconstructor.process_array(self.image, mask.astype(np.uint8) * 255)
+        np.testing.assert_array_equal(results['result'], expected['result'])
+        with pytest.raises(ValueError):
+            reconstructor.process_array(self.image, mask[:32])
+
+
+class TestBatchProcess:
+    """Test batch processing"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.input_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        for i in range(4):
+            Image.fromarray(make_masked_image(seed=i)).save(
+                os.path.join(self.input_dir, f'face_{i}.png'))
+        # An image without white regions must not stop the batch
+        Image.fromarray(np.zeros((64, 64, 3), np.uint8)).save(
+            os.path.join(self.input_dir, 'blank.png'))
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.input_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_serial_batch(self):
+        """Test that every valid image is reconstructed"""
+        FaceReconstructor().batch_process(self.input_dir, self.output_dir)
+
+        for i in range(4):
+            assert os.path.exists(
+                os.path.join(self.output_dir, f'face_{i}_reconstructed.jpg'))
+        assert not os.path.exists(
+            os.path.join(self.output_dir, 'blank_reconstructed.jpg'))
+
+    def assert_matches_serial(self, **kwargs):
+        """Run a batch with kwargs and compare its files to a serial run"""
+        serial_dir = tempfile.mkdtemp()
+        try:
+            FaceReconstructor().batch_process(self.input_dir, serial_dir)
+            FaceReconstructor().batch_process(self.input_dir, self.output_dir, **kwargs)
+
+            assert sorted(os.listdir(self.output_dir)) == sorted(os.listdir(serial_dir))
+            for name in os.listdir(serial_dir):
+                with open(os.path.join(serial_dir, name), 'rb') as a, \
+                        open(os.path.join(self.output_dir, name), 'rb') as b:
+                    assert a.read() == b.read()
+        finally:
+            shutil.rmtree(serial_dir, ignore_errors=True)
+
+    @pytest.mark.parametrize('ordered', [True, False])
+    def test_worker_pool_matches_serial(self, ordered):
+        """Test that the worker pool produces the same files as a serial run"""
+        self.assert_matches_serial(num_workers=2, chunk_size=2, ordered=ordered)
+
+    def test_worker_initializer_limits_opencv_threads(self):
+        """Test that pool workers cap OpenCV's thread pool"""
+        threads = cv2.getNumThreads()
+        try:
+            _init_worker(FaceReconstructor().config, opencv_threads=1)
+            assert cv2.getNumThreads() == 1
+        finally:
+            cv2.setNumThreads(threads)
+
+    @pytest.mark.parametrize('ordered', [True, False])
+    def test_thread_pool_matches_serial(self, ordered):
+        """Test that the thread executor produces the same files as a serial run"""
+        threads = cv2.getNumThreads()
+        self.assert_matches_serial(num_workers=3, ordered=ordered, executor='thread')
+        assert cv2.getNumThreads() == threads
+
+    @pytest.mark.parametrize('kwargs', [{}, {'prefetch_depth': 2},
+                                        {'num_workers': 2, 'executor': 'thread'},
+                                        {'num_workers': 2}])
+    def test_prescan_rejects_blank_image(self, kwargs, capsys):
+        """Test that the prescan skips only the image without white regions"""
+        self.assert_matches_serial(prescan=True, **kwargs)
+
+        assert 'Summary: 4 completed, 1 rejected by prescan, 0 failed' in capsys.readouterr().out
+
+    @pytest.mark.parametrize('num_workers', [1, 2])
+    def test_shard_queue_matches_serial(self, num_workers, capsys):
+        """Test that a worker draining a shard queue produces the same files"""
+        self.assert_matches_serial(num_workers=num_workers, shard_queue=self.input_dir,
+                                   worker_id='worker-a')
+
+        assert 'Queue: 0 pending, 0 leased, 4 done, 1 failed' in capsys.readouterr().out
+
+        # A second worker joining the finished queue has nothing left to claim
+        FaceReconstructor().batch_process(self.input_dir, self.output_dir,
+                                          shard_queue=self.input_dir, worker_id='worker-b')
+        assert 'Summary: 0 completed' in capsys.readouterr().out
+
+    def test_unknown_executor(self):
+        """Test that an unknown executor raises ValueError"""
+        with pytest.raises(ValueError):
+            FaceReconstructor().batch_process(self.input_dir, self.output_dir,
+                                              executor='fiber')
+
+    def test_process_many_matches_single(self):
+        """Test that concurrent in-memory processing returns results in input order"""
+        reconstructor = FaceReconstructor()
+        images = [make_masked_image(seed=i) for i in range(5)]
+        masks = [None] * 3 + [np.pad(np.ones((8, 8), bool), 28),
+                              np.pad(np.full((8, 8), 255, np.uint8), 28)]
+
+        results = reconstructor.process_many(images, masks, num_workers=3)
+
+        for image, mask, entry in zip(images, masks, results):
+            expected = reconstructor.process_array(image, mask)
+            np.testing.assert_array_equal(entry['result'], expected['result'])
+        assert results[4]['mask'][30, 30] == 255
+
+    def test_streaming_pipeline_matches_serial(self):
+        """Test that the prefetch/writer pipeline produces the same files"""
+        self.assert_matches_serial(prefetch_depth=2, writer_threads=2,
+                                   max_pending_writes=1)
+
+    def write_masks(self):
+        """Write a mask for every input, including the blank one"""
+        mask_dir = os.path.join(self.input_dir, 'masks')
+        os.makedirs(mask_dir)
+        mask = np.zeros((64, 64), np.uint8)
+        mask[40:50, 40:50] = 255
+        for name in ['blank'] + [f'face_{i}' for i in range(4)]:
+            Image.fromarray(mask).save(os.path.join(mask_dir, f'{name}.png'))
+        return mask_dir
+
+    def test_mask_dir_replaces_detection(self):
+        """Test that supplied masks are used, even for images without white regions"""
+        mask_dir = self.write_masks()
+        FaceReconstructor({'output_format': 'png'}).batch_process(
+            self.input_dir, self.output_dir, mask_dir=mask_dir)
+
+        mask = np.array(Image.open(os.path.join(self.output_dir, 'face_0_mask.png')))
+        assert mask[45, 45] == 255 and mask[20, 20] == 0
+        assert os.path.exists(os.path.join(self.output_dir, 'blank_reconstructed.png'))
+
+    def test_mask_map_pipelines_match_serial(self):
+        """Test that a mask mapping gives the same files in every execution mode"""
+        mask_dir = self.write_masks()
+        mask_map = {'face_1.png': os.path.join(mask_dir, 'face_0.png'),
+                    'blank': os.path.join(mask_dir, 'blank.png')}
+
+        serial_dir = tempfile.mkdtemp()
+        try:
+            FaceReconstructor().batch_process(self.input_dir, serial_dir, mask_map=mask_map)
+            for kwargs in ({'num_workers': 2}, {'prefetch_depth': 2, 'writer_threads': 1}):
+                output_dir = tempfile.mkdtemp(dir=self.output_dir)
+                FaceReconstructor().batch_process(self.input_dir, output_dir,
+                                                  mask_map=mask_map, **kwargs)
+                for name in os.listdir(serial_dir):
+                    with open(os.path.join(serial_dir, name), 'rb') as a, \
+                            open(os.path.join(output_dir, name), 'rb') as b:
+                        assert a.read() == b.read()
+            assert os.path.exists(os.path.join(serial_dir, 'blank_reconstructed.jpg'))
+        finally:
+            shutil.rmtree(serial_dir, ignore_errors=True)
+
+    def test_resume_skips_unchanged_images(self, capsys):
+        """Test that a resumed run only reprocesses changed inputs"""
+        FaceReconstructor().batch_process(self.input_dir, self.output_dir, resume=True)
+        capsys.readouterr()
+
+        Image.fromarray(make_masked_image(seed=9)).save(
+            os.path.join(self.input_dir, 'face_0.png'))
+        FaceReconstructor().batch_process(self.input_dir, self.output_dir, resume=True)
+        output = capsys.readouterr().out
+
+        assert 'Skipping 3 unchanged images' in output
+        assert 'face_0.png' in output
+        assert 'face_1.png' not in output
+
+    def test_resume_reprocesses_on_config_change(self, capsys):
+        """Test that a different configuration invalidates the manifest"""
+        FaceReconstructor().batch_process(self.input_dir, self.output_dir, resume=True)
+        FaceReconstructor({'edge_weight': 0.5}).batch_process(
+            self.input_dir, self.output_dir, resume=True)
+
+        assert 'Skipping 0 unchanged images' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
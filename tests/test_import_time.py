@@ -0,0 +1,60 @@
+"""
+Import-time regression tests
+
+Each check runs in a fresh interpreter so module caches from other tests
+do not hide the real cold-start cost.
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Generous budgets in seconds; cold CI machines are slow but a regression
+# that pulls matplotlib or torch back in blows well past them
+PACKAGE_IMPORT_BUDGET = 0.5
+RECONSTRUCTOR_IMPORT_BUDGET = 3.0
+
+
+def measure_import(statement: str) -> dict:
+    """Time an import statement in a fresh interpreter"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+class TestImportTime:
+    """Test that package startup stays cheap"""
+
+    def test_package_import_is_lazy(self):
+        """Test that importing the package loads no heavy dependencies"""
+        measured = measure_import('import src')
+
+        for module in ('cv2', 'numpy', 'PIL', 'matplotlib', 'torch'):
+            assert module not in measured['modules']
+        assert measured['seconds'] < PACKAGE_IMPORT_BUDGET
+
+    def test_reconstructor_import_skips_matplotlib(self):
+        """Test that the reconstructor does not import matplotlib or torch"""
+        measured = measure_import('from src import FaceReconstructor')
+
+        assert 'matplotlib' not in measured['modules']
+        assert 'torch' not in measured['modules']
+        assert measured['seconds'] < RECONSTRUCTOR_IMPORT_BUDGET
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+"""
+Unit tests for pipeline instrumentation
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import logging
+import numpy as np
+import os
+import shutil
+import tempfile
+from PIL import Image
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor
+from src.instrumentation import RESERVOIR_SIZE, Instrumentation, StageRecord, logging_hook
+
+
+class TestInstrumentation:
+    """Test stage recording and exports"""
+
+    def test_stage_records_and_hooks(self):
+        """Test that a stage produces a record and calls hooks"""
+        seen = []
+        instrumentation = Instrumentation(hooks=[seen.append])
+
+        with instrumentation.stage('canny', pixels=100):
+            pass
+
+        assert len(seen) == 1
+        assert seen[0].name == 'canny' and seen[0].pixels == 100
+        assert instrumentation.summary()['canny']['count'] == 1
+
+    def test_prometheus_export(self):
+        """Test the Prometheus text exposition output"""
+        instrumentation = Instrumentation()
+        for wall in (0.1, 0.2, 0.3):
+            instrumentation.add(StageRecord('blend', wall, wall, 10))
+
+        text = instrumentation.to_prometheus()
+
+        assert '# TYPE edge_connect_stage_seconds summary' in text
+        assert 'edge_connect_stage_seconds{stage="blend",quantile="0.5"} 0.200000' in text
+        assert 'edge_connect_stage_seconds_count{stage="blend"} 3' in text
+        assert 'edge_connect_stage_pixels_total{stage="blend"} 30' in text
+
+    def test_memory_is_bounded(self):
+        """Test that aggregates stay bounded while totals remain exact"""
+        instrumentation = Instrumentation()
+        for i in range(10 * RESERVOIR_SIZE):
+            instrumentation.add(StageRecord('mask', (i % 100) / 1000, 0.0, 1))
+
+        stats = instrumentation.summary()['mask']
+        assert stats['count'] == 10 * RESERVOIR_SIZE
+        assert stats['pixels_total'] == 10 * RESERVOIR_SIZE
+        assert len(instrumentation._stats['mask'].walls) == RESERVOIR_SIZE
+        assert instrumentation.drain() == []
+        assert abs(stats['p50'] - 0.05) < 0.01
+
+    def test_buffered_records_drain(self):
+        """Test that buffered records are handed over once"""
+        worker = Instrumentation(buffer_records=True)
+        worker.add(StageRecord('decode', 0.5, 0.25, 4))
+        parent = Instrumentation()
+        parent.extend(worker.drain())
+
+        assert worker.drain() == [] and worker.summary() == {}
+        assert parent.summary()['decode']['count'] == 1
+
+    def test_logging_hook(self, caplog):
+        """Test that the logging hook emits structured JSON"""
+        instrumentation = Instrumentation(hooks=[logging_hook()])
+        with caplog.at_level(logging.INFO, logger='edge_connect.stages'):
+            instrumentation.add(StageRecord('decode', 0.5, 0.25, 4))
+
+        assert '"stage": "decode"' in caplog.text
+        assert '"wall_ms": 500.0' in caplog.text
+
+
+class TestReconstructorTimings:
+    """Test that the reconstructor reports its stages"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.input_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        image = np.random.randint(50, 200, (64, 64, 3), dtype=np.uint8)
+        image[20:40, 20:40] = 255
+        for i in range(2):
+            Image.fromarray(image).save(os.path.join(self.input_dir, f'face_{i}.png'))
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.input_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_process_image_stages(self):
+        """Test that every pipeline stage is timed"""
+        instrumentation = Instrumentation()
+        reconstructor = FaceReconstructor({'target_size': (32, 32)},
+                                          instrumentation=instrumentation)
+        reconstructor.process_image(os.path.join(self.input_dir, 'face_0.png'), self.output_dir)
+
+        stages = set(instrumentation.summary())
+        assert stages == {'decode', 'resize', 'mask', 'canny', 'inpaint_telea',
+                          'inpaint_ns', 'blend', 'encode'}
+        assert instrumentation.summary()['encode']['count'] == 4
+
+    def test_worker_timings_are_merged(self):
+        """Test that pool workers send their timings back to the parent"""
+        instrumentation = Instrumentation()
+        FaceReconstructor(instrumentation=instrumentation).batch_process(
+            self.input_dir, self.output_dir, num_workers=2)
+
+        assert instrumentation.summary()['inpaint_telea']['count'] == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
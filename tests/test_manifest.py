@@ -0,0 +1,76 @@
+"""
+Unit tests for the batch manifest
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import os
+import shutil
+import tempfile
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.manifest import BatchManifest
+
+
+class TestBatchManifest:
+    """Test manifest bookkeeping"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, 'input.png')
+        with open(self.input_path, 'wb') as fh:
+            fh.write(b'image bytes')
+        self.output_dir = os.path.join(self.temp_dir, 'out')
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_record_survives_reload(self):
+        """Test that recorded inputs are current for a new manifest instance"""
+        BatchManifest(self.output_dir, {'threshold': 240}).record(self.input_path)
+
+        assert BatchManifest(self.output_dir, {'threshold': 240}).is_current(self.input_path)
+        assert not BatchManifest(self.output_dir, {'threshold': 200}).is_current(self.input_path)
+
+    def test_changed_content_is_not_current(self):
+        """Test that editing the input invalidates its entry"""
+        BatchManifest(self.output_dir, {}).record(self.input_path)
+        with open(self.input_path, 'wb') as fh:
+            fh.write(b'other bytes')
+
+        assert not BatchManifest(self.output_dir, {}).is_current(self.input_path)
+
+    def test_missing_outputs_are_not_current(self):
+        """Test that deleted outputs force reprocessing"""
+        manifest = BatchManifest(self.output_dir, {})
+        manifest.record(self.input_path)
+
+        missing = os.path.join(self.output_dir, 'input_reconstructed.jpg')
+        assert not manifest.is_current(self.input_path, [missing])
+
+    def test_torn_line_is_ignored(self):
+        """Test that a partially written line from a crash is skipped"""
+        manifest = BatchManifest(self.output_dir, {})
+        manifest.record(self.input_path)
+        with open(manifest.path, 'a') as fh:
+            fh.write('{"input": "/trunc')
+
+        reloaded = BatchManifest(self.output_dir, {})
+        assert reloaded.is_current(self.input_path)
+
+        # The next record must start on its own line
+        other_path = os.path.join(self.temp_dir, 'other.png')
+        shutil.copy(self.input_path, other_path)
+        reloaded.record(other_path)
+        assert BatchManifest(self.output_dir, {}).is_current(other_path)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
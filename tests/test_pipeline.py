@@ -0,0 +1,118 @@
+"""
+Unit tests for the streaming pipeline helpers
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import threading
+import os
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.pipeline import BoundedWriter, prefetch, thread_map
+
+
+class TestPrefetch:
+    """Test the background prefetch iterator"""
+
+    def test_order_and_errors(self):
+        """Test that items arrive in order and failed loads are reported"""
+        def load(item):
+            if item == 2:
+                raise IOError('bad file')
+            return item * 10
+
+        entries = list(prefetch(range(4), load, depth=2))
+
+        assert [item for item, _, _ in entries] == [0, 1, 2, 3]
+        assert [value for _, value, _ in entries] == [0, 10, None, 30]
+        assert isinstance(entries[2][2], IOError)
+
+    def test_bounded_lookahead(self):
+        """Test that the loader never runs more than depth items ahead"""
+        loaded = []
+        stream = prefetch(range(100), lambda item: loaded.append(item) or item, depth=3)
+
+        next(stream)
+        threading.Event().wait(0.3)
+        # One item consumed, depth queued and at most one blocked in put()
+        assert len(loaded) <= 1 + 3 + 1
+        stream.close()
+
+
+class TestThreadMap:
+    """Test the bounded thread pool map"""
+
+    def test_ordered_results(self):
+        """Test that ordered results follow the input order"""
+        assert list(thread_map(lambda x: x * x, range(10), num_threads=3)) == [
+            x * x for x in range(10)]
+
+    def test_unordered_results(self):
+        """Test that unordered mode yields every result once"""
+        results = thread_map(lambda x: x + 1, range(10), num_threads=3, ordered=False)
+        assert sorted(results) == list(range(1, 11))
+
+    def test_bounded_in_flight(self):
+        """Test that at most max_pending calls are submitted ahead of the consumer"""
+        started = []
+        release = threading.Event()
+
+        def work(item):
+            started.append(item)
+            release.wait(5)
+            return item
+
+        results = thread_map(work, range(10), num_threads=2, max_pending=3)
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        assert next(results) == 0
+        assert len(started) <= 3 + 1
+        assert list(results) == list(range(1, 10))
+        timer.cancel()
+
+    def test_errors_propagate(self):
+        """Test that an exception in a worker reaches the consumer"""
+        def work(item):
+            if item == 3:
+                raise ValueError('bad item')
+            return item
+
+        with pytest.raises(ValueError):
+            list(thread_map(work, range(6), num_threads=2))
+
+
+class TestBoundedWriter:
+    """Test the bounded background writer"""
+
+    def test_backpressure_and_errors(self):
+        """Test that pending jobs are capped and errors are returned"""
+        release = threading.Event()
+
+        def write(key):
+            release.wait(1)
+            if key == 'b':
+                raise ValueError('disk full')
+
+        with BoundedWriter(num_threads=1, max_pending=2) as writer:
+            assert writer.submit('a', write, 'a') == []
+            assert writer.submit('b', write, 'b') == []
+            release.set()
+            # The third job exceeds the limit and waits for the oldest
+            finished = writer.submit('c', write, 'c')
+            finished += writer.drain()
+
+        assert finished == [('a', None), ('b', 'disk full'), ('c', None)]
+
+    def test_inline_writes(self):
+        """Test that zero threads runs writes on the caller's thread"""
+        writer = BoundedWriter(num_threads=0)
+        assert writer.submit('a', lambda: None) == [('a', None)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
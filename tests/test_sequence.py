@@ -0,0 +1,151 @@
+"""
+Unit tests for frame sequences with temporal fill reuse
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import numpy as np
+import cv2
+import os
+import shutil
+import tempfile
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor
+from src.sequence import TemporalInpainter, iter_frames
+from src.utils import create_mask_from_white_regions, edge_guided_inpainting, save_image
+
+
+def make_frames(count: int = 4, size: int = 96) -> list:
+    """Static background with two white holes and a patch moving next to the second"""
+    rng = np.random.RandomState(0)
+    background = rng.randint(50, 200, (size, size, 3)).astype(np.uint8)
+    background[10:25, 10:25] = 255
+    background[60:75, 60:75] = 255
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        frame[78:84, 50 + 4 * i:56 + 4 * i] = 20
+        frames.append(frame)
+    return frames
+
+
+class TestTemporalInpainter:
+    """Test region reuse between frames"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.frames = make_frames()
+        self.mask = create_mask_from_white_regions(self.frames[0])
+
+    def test_static_frames_reuse_fill(self):
+        """Test that identical frames inpaint each region only once"""
+        inpainter = TemporalInpainter()
+        results = [inpainter.inpaint(self.frames[0], self.mask) for _ in range(3)]
+
+        assert inpainter.inpainted == 2
+        assert inpainter.reused == 4
+        np.testing.assert_array_equal(results[0], results[2])
+
+    def test_only_changed_region_is_inpainted(self):
+        """Test that motion near one hole re-inpaints that hole only"""
+        inpainter = TemporalInpainter()
+        for frame in self.frames:
+            result = inpainter.inpaint(frame, self.mask)
+
+            expected = edge_guided_inpainting(frame, self.mask, roi=True, compute_edges=False)[0]
+            np.testing.assert_array_equal(result, expected)
+
+        assert inpainter.inpainted == 2 + 3
+        assert inpainter.reused == 3
+
+    def test_negative_tolerance_inpaints_every_frame(self):
+        """Test that a negative tolerance disables reuse"""
+        inpainter = TemporalInpainter(tolerance=-1)
+        for frame in self.frames:
+            inpainter.inpaint(frame, self.mask)
+
+        assert inpainter.inpainted == 2 * len(self.frames)
+        assert inpainter.reused == 0
+
+    def test_mask_change_inpaints_region(self):
+        """Test that a region whose mask changed is not reused"""
+        inpainter = TemporalInpainter()
+        inpainter.inpaint(self.frames[0], self.mask)
+        grown = self.mask.copy()
+        grown[10:25, 25:28] = 255
+        result = inpainter.inpaint(self.frames[0], grown)
+
+        assert inpainter.reused == 1
+        expected = edge_guided_inpainting(self.frames[0], grown, roi=True, compute_edges=False)[0]
+        np.testing.assert_array_equal(result, expected)
+
+
+class TestProcessSequence:
+    """Test reading and reconstructing frame sequences"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.frames_dir = os.path.join(self.temp_dir, 'frames')
+        self.output_dir = os.path.join(self.temp_dir, 'output')
+        self.frames = make_frames()
+        for i, frame in enumerate(self.frames):
+            save_image(frame, os.path.join(self.frames_dir, f'{i:03d}.png'))
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_directory_frames_in_order(self):
+        """Test that directory frames are read in file name order"""
+        frames = list(iter_frames(self.frames_dir))
+
+        assert [name for name, _ in frames] == ['000', '001', '002', '003']
+        np.testing.assert_array_equal(frames[3][1], self.frames[3])
+
+    def test_video_frames(self):
+        """Test reading frames from a video file"""
+        path = os.path.join(self.temp_dir, 'clip.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (96, 96))
+        if not writer.isOpened():
+            pytest.skip('No video encoder available')
+        for frame in self.frames:
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+        writer.release()
+
+        frames = list(iter_frames(path, size=(48, 48)))
+        assert [name for name, _ in frames] == [f'frame_{i:06d}' for i in range(4)]
+        assert frames[0][1].shape == (48, 48, 3)
+
+    def test_missing_video(self):
+        """Test that unreadable sources raise ValueError"""
+        with pytest.raises(ValueError):
+            list(iter_frames(os.path.join(self.temp_dir, 'missing.mp4')))
+
+    def test_process_sequence(self):
+        """Test that sequence mode matches per-frame reconstruction and saves results"""
+        blank = np.full((96, 96, 3), 100, dtype=np.uint8)
+        save_image(blank, os.path.join(self.frames_dir, '004.png'))
+        reconstructor = FaceReconstructor({'roi_inpainting': True,
+                                           'save_artifacts': ('reconstructed',),
+                                           'output_format': 'png'})
+
+        outputs = list(reconstructor.process_sequence(self.frames_dir, self.output_dir))
+
+        assert len(outputs) == 5
+        for (name, results), frame in zip(outputs, self.frames):
+            expected = reconstructor.process_array(frame)
+            np.testing.assert_array_equal(results['result'], expected['result'])
+            assert os.path.exists(os.path.join(self.output_dir, f'{name}_reconstructed.png'))
+        np.testing.assert_array_equal(outputs[-1][1]['result'], blank)
+        assert outputs[0][1]['edges'].shape == (96, 96)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
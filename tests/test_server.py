@@ -0,0 +1,136 @@
+"""
+Unit tests for the HTTP inference service
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import asyncio
+import base64
+import io
+import json
+import os
+import signal
+import time
+import http.client
+import numpy as np
+from PIL import Image
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server import InferenceServer
+
+
+def encode_png(array: np.ndarray) -> bytes:
+    """Encode an array as PNG bytes"""
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def request(port: int, method: str, path: str, body: bytes = b'', headers=None):
+    """Send one blocking HTTP request and return (status, body)"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    payload = response.read()
+    connection.close()
+    return response.status, payload
+
+
+def run_with_server(scenario, **kwargs):
+    """Start a one-worker server, run the blocking scenario and shut down"""
+    async def main():
+        server = InferenceServer(port=0, num_workers=1, **kwargs)
+        await server.start()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, scenario, server.port)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+class TestInferenceServer:
+    """Test the HTTP endpoints"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.image = np.random.randint(50, 200, (64, 64, 3), dtype=np.uint8)
+        self.image[20:40, 20:40] = 255
+
+    def test_ready_and_inpaint(self):
+        """Test readiness and a raw-bytes reconstruction round trip"""
+        def scenario(port):
+            ready = request(port, 'GET', '/ready')
+            result = request(port, 'POST', '/inpaint?format=png', encode_png(self.image))
+            return ready, result
+
+        (ready_status, ready_body), (status, body) = run_with_server(scenario)
+
+        assert ready_status == 200 and json.loads(ready_body)['ready']
+        assert status == 200
+        result = np.array(Image.open(io.BytesIO(body)))
+        assert result.shape == self.image.shape
+        assert result[30, 30].tolist() != [255, 255, 255]
+
+    def test_json_request_with_mask(self):
+        """Test that a supplied mask is used instead of threshold detection"""
+        mask = np.zeros((64, 64), np.uint8)
+        mask[5:10, 5:10] = 255
+        body = json.dumps({'image': base64.b64encode(encode_png(self.image)).decode(),
+                           'mask': base64.b64encode(encode_png(mask)).decode()})
+
+        status, payload = run_with_server(lambda port: request(
+            port, 'POST', '/inpaint', body.encode(), {'Content-Type': 'application/json'}))
+
+        assert status == 200
+        result = np.array(Image.open(io.BytesIO(payload)))
+        # Only the supplied mask is filled; the white square is left alone
+        assert result[30, 30].tolist() == [255, 255, 255]
+
+    def test_errors(self):
+        """Test error statuses for bad input, unknown paths and a full queue"""
+        def scenario(port):
+            return (request(port, 'POST', '/inpaint', b'not an image')[0],
+                    request(port, 'GET', '/missing')[0])
+
+        assert run_with_server(scenario) == (422, 404)
+        bad_threshold = run_with_server(lambda port: request(
+            port, 'POST', '/inpaint?threshold=abc', encode_png(self.image)))
+        assert bad_threshold[0] == 400
+        assert b'Threshold' in bad_threshold[1]
+        full = run_with_server(lambda port: request(port, 'POST', '/inpaint',
+                                                    encode_png(self.image))[0],
+                               max_queue=0)
+        assert full == 503
+
+    def test_dead_worker_restarts_pool(self):
+        """Test that a killed worker fails its request with 503 and the pool recovers"""
+        def scenario(port, pid):
+            os.kill(pid, signal.SIGKILL)
+            time.sleep(0.5)
+            lost = request(port, 'POST', '/inpaint', encode_png(self.image))[0]
+            deadline = time.monotonic() + 30
+            while request(port, 'GET', '/ready')[0] != 200 and time.monotonic() < deadline:
+                time.sleep(0.1)
+            return lost, request(port, 'POST', '/inpaint', encode_png(self.image))[0]
+
+        async def main():
+            server = InferenceServer(port=0, num_workers=1)
+            await server.start()
+            try:
+                pid = server._worker_pids[0]
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, scenario, server.port, pid)
+            finally:
+                await server.close()
+
+        assert asyncio.run(main()) == (503, 200)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,117 @@
+"""
+Unit tests for parameter sweeps
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import numpy as np
+import os
+import shutil
+import tempfile
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor
+from src.sweep import ParameterSweep, expand_grid, masked_psnr
+from src.utils import edge_maps, save_image
+
+from conftest import make_masked_image
+
+
+class TestParameterSweep:
+    """Test that sweeps match single runs while sharing intermediates"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.image = make_masked_image()
+        # A near-white stripe that only the lower thresholds detect
+        self.image[36:42, 8:56] = 235
+        self.image_path = os.path.join(self.temp_dir, 'face.png')
+        save_image(self.image, self.image_path)
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_expand_grid(self):
+        """Test that the grid expands to every combination"""
+        configs = expand_grid({'threshold': [230, 240], 'edge_weight': [0, 0.5, 1]})
+
+        assert len(configs) == 6
+        assert configs[0] == {'threshold': 230, 'edge_weight': 0}
+        assert configs[-1] == {'threshold': 240, 'edge_weight': 1}
+
+    @pytest.mark.parametrize('extra', [{}, {'roi_inpainting': True}, {'inpaint_method': 'ns'},
+                                       {'pyramid_levels': 1, 'pyramid_band': 2}])
+    def test_matches_process_array(self, extra):
+        """Test that every swept configuration matches an independent run"""
+        grid = {'threshold': [230, 240], 'edge_weight': [0, 0.3, 1], 'inpaint_radius': [3, 5]}
+        sweep = ParameterSweep(self.image_path, base_config=extra)
+
+        for overrides, results in sweep.sweep(grid):
+            expected = FaceReconstructor({**extra, **overrides}).process_array(self.image)
+            np.testing.assert_array_equal(results['mask'], expected['mask'])
+            np.testing.assert_array_equal(results['result'], expected['result'])
+
+    def test_inpaint_passes_are_shared(self):
+        """Test that each pass runs once per distinct threshold and radius"""
+        grid = {'threshold': [230, 240], 'edge_weight': [0.1, 0.3, 0.5, 0.7, 0.9],
+                'inpaint_radius': [3, 5], 'edge_sigma': [1, 2]}
+        sweep = ParameterSweep(self.image_path)
+        for _, results in sweep.sweep(grid):
+            results['edges']
+
+        assert sweep.computed['image'] == 1
+        assert sweep.computed['mask'] == 2
+        assert sweep.computed['inpaint_telea'] == 4
+        assert sweep.computed['inpaint_ns'] == 4
+        assert sweep.computed['edges'] == 4
+
+    def test_edges_on_demand(self):
+        """Test that edges are only computed when read and match edge_maps"""
+        sweep = ParameterSweep(self.image)
+        results = sweep.run({'edge_sigma': 1.5})
+        assert sweep.computed['edges'] == 0
+
+        edges, edges_dilated = edge_maps(self.image, results['mask'], 1.5)
+        np.testing.assert_array_equal(results['edges'], edges)
+        np.testing.assert_array_equal(results['edges_dilated'], edges_dilated)
+
+    def test_given_mask_ignores_threshold(self):
+        """Test that an explicit mask makes the threshold irrelevant"""
+        mask = np.zeros(self.image.shape[:2], dtype=np.uint8)
+        mask[5:15, 5:15] = 255
+        sweep = ParameterSweep(self.image, mask=mask)
+        results = list(sweep.sweep({'threshold': [100, 200, 250]}))
+
+        assert sweep.computed['mask'] == 1
+        assert sweep.computed['inpaint_telea'] == 1
+        np.testing.assert_array_equal(results[0][1]['mask'], mask)
+
+    def test_unknown_key(self):
+        """Test that unknown config keys are rejected before any work"""
+        sweep = ParameterSweep(self.image)
+        with pytest.raises(ValueError):
+            next(sweep.sweep({'edge_wieght': [0.1]}))
+        assert sweep.computed['image'] == 0
+
+    def test_masked_psnr(self):
+        """Test PSNR over masked pixels only"""
+        mask = np.zeros((4, 4), dtype=np.uint8)
+        mask[:2] = 255
+        reference = np.zeros((4, 4, 3), dtype=np.uint8)
+        result = reference.copy()
+        result[2:] = 255
+
+        assert masked_psnr(result, reference, mask) == float('inf')
+        result[0, 0] = 255
+        assert masked_psnr(result, reference, mask) == pytest.approx(10 * np.log10(8))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
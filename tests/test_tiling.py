@@ -0,0 +1,159 @@
+"""
+Unit tests for tiled, bounded-memory processing
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import numpy as np
+import cv2
+import os
+import shutil
+import tempfile
+from PIL import Image
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.face_reconstructor import FaceReconstructor
+from src.tiling import RasterFile, tile_grid
+
+
+class TestImageSource:
+    """Test memory-mapped image access"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        # Odd width exercises the padded rows of BMP files
+        self.image = np.random.RandomState(0).randint(0, 255, (30, 41, 3), dtype=np.uint8)
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @pytest.mark.parametrize('extension', ['ppm', 'bmp', 'tif'])
+    def test_uncompressed_files_are_memory_mapped(self, extension):
+        """Test that raw rasters are read in place"""
+        path = os.path.join(self.temp_dir, f'image.{extension}')
+        Image.fromarray(self.image).save(path)
+        source = RasterFile.open(path)
+
+        assert source.memory_mapped
+        np.testing.assert_array_equal(source.rows(0, 30), self.image)
+        np.testing.assert_array_equal(source.read(slice(5, 12), slice(20, 41)),
+                                      self.image[5:12, 20:41])
+
+    def test_compressed_files_are_decoded(self):
+        """Test that other formats fall back to a full decode"""
+        path = os.path.join(self.temp_dir, 'image.png')
+        Image.fromarray(self.image).save(path)
+
+        source = RasterFile.open(path)
+
+        assert not source.memory_mapped
+        np.testing.assert_array_equal(source.rows(0, 30), self.image)
+
+    def test_raw_file_over_pil_pixel_limit(self):
+        """Test that raw rasters larger than PIL's bomb limit are still mapped"""
+        path = os.path.join(self.temp_dir, 'huge.ppm')
+        side = 15000
+        header = f'P6\n{side} {side}\n255\n'.encode('ascii')
+        with open(path, 'wb') as fh:
+            fh.write(header)
+            fh.truncate(len(header) + side * side * 3)  # Sparse pixel data
+        assert side * side > 2 * Image.MAX_IMAGE_PIXELS
+
+        source = RasterFile.open(path)
+
+        assert source.memory_mapped
+        assert source.shape == (side, side, 3)
+        assert not source.read(slice(100, 104), slice(0, 8)).any()
+
+    def test_decode_over_pil_pixel_limit(self, monkeypatch):
+        """Test that full decodes still honour PIL's bomb limit"""
+        path = os.path.join(self.temp_dir, 'image.png')
+        Image.fromarray(self.image).save(path)
+        monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 100)
+
+        with pytest.raises(ValueError):
+            RasterFile.open(path)
+        assert Image.MAX_IMAGE_PIXELS == 100
+
+    def test_mask_source(self):
+        """Test that grayscale PGM masks are memory-mapped"""
+        path = os.path.join(self.temp_dir, 'mask.pgm')
+        Image.fromarray(self.image[:, :, 1]).save(path)
+
+        source = RasterFile.open(path, 'L')
+
+        assert source.memory_mapped
+        np.testing.assert_array_equal(source.rows(3, 9), self.image[3:9, :, 1])
+
+    def test_tile_grid_covers_image(self):
+        """Test that tile cores partition the image"""
+        coverage = np.zeros((70, 45), np.int32)
+        for padded, core, inner in tile_grid(70, 45, 16, 5):
+            coverage[core] += 1
+            assert padded[0].start + inner[0].start == core[0].start
+            assert padded[1].start + inner[1].start == core[1].start
+        assert (coverage == 1).all()
+
+
+class TestProcessTiled:
+    """Test tiled reconstruction"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.RandomState(1)
+        self.image = cv2.GaussianBlur(rng.randint(0, 255, (200, 260, 3), dtype=np.uint8),
+                                      (0, 0), 2)
+        # Holes placed well inside 128px tiles, one tile row left clean
+        self.image[20:30, 20:34] = 255
+        self.image[40:52, 150:160] = 255
+        self.image_path = os.path.join(self.temp_dir, 'scan.npy')
+        np.save(self.image_path, self.image)
+        self.output_path = os.path.join(self.temp_dir, 'out', 'scan_reconstructed.npy')
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_tiled_matches_full_frame(self):
+        """Test that tiling reproduces the full-frame result for holes inside tiles"""
+        reconstructor = FaceReconstructor({'save_intermediate': False})
+        stats = reconstructor.process_tiled(self.image_path, self.output_path, tile_size=128)
+        expected = reconstructor._reconstruct(self.image)['result']
+
+        np.testing.assert_array_equal(np.load(self.output_path), expected)
+        assert stats['tiles'] == 6
+        assert stats['inpainted_tiles'] == 2
+        assert stats['masked_pixels'] == 10 * 14 + 12 * 10
+
+    def test_tiled_with_mask_file(self):
+        """Test that a supplied mask replaces white region detection"""
+        mask = np.zeros(self.image.shape[:2], np.uint8)
+        mask[150:160, 200:210] = 255
+        mask_path = os.path.join(self.temp_dir, 'mask.pgm')
+        Image.fromarray(mask).save(mask_path)
+
+        stats = FaceReconstructor().process_tiled(self.image_path, self.output_path,
+                                                  tile_size=128, mask_path=mask_path)
+        result = np.load(self.output_path)
+
+        assert stats['inpainted_tiles'] == 1
+        np.testing.assert_array_equal(result[mask == 0], self.image[mask == 0])
+        assert (result[mask > 0] != self.image[mask > 0]).any()
+
+    def test_output_must_be_npy(self):
+        """Test that only streamable output files are accepted"""
+        with pytest.raises(ValueError):
+            FaceReconstructor().process_tiled(self.image_path,
+                                              os.path.join(self.temp_dir, 'out.png'))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
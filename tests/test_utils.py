@@ -7,6 +7,7 @@ License: MIT
 
 import pytest
 import numpy as np
+import cv2
 import os
 import tempfile
 from PIL import Image
@@ -16,11 +17,19 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from utils import (
+    RESAMPLE_FILTERS,
     load_image,
+    load_mask,
+    may_have_white_regions,
     save_image,
     create_mask_from_white_regions,
+    detect_white_regions,
+    mask_regions,
     canny_edge_detection,
-    edge_guided_inpainting
+    edge_guided_inpainting,
+    create_masks_from_white_regions_batch,
+    canny_edge_detection_batch,
+    edge_guided_inpainting_batch
 )
 
 
@@ -60,6 +69,27 @@ class TestLoadImage:
         with pytest.raises(FileNotFoundError):
             load_image('nonexistent_file.jpg')
 
+    def test_draft_decode_close_to_full_decode(self):
+        """Test that draft-mode JPEG decoding barely changes the downscaled image"""
+        y, x = np.mgrid[0:800, 0:1200]
+        smooth = np.stack([x % 256, y % 256, (x + y) // 8 % 256], axis=-1).astype(np.uint8)
+        Image.fromarray(smooth).save(self.temp_file.name, quality=95)
+
+        full = load_image(self.temp_file.name, size=(150, 100), draft=False)
+        draft = load_image(self.temp_file.name, size=(150, 100))
+
+        assert draft.shape == full.shape == (100, 150, 3)
+        assert np.abs(draft.astype(np.int16) - full).mean() < 3
+
+    def test_resample_filters(self):
+        """Test every resample filter and rejection of unknown names"""
+        for resample in RESAMPLE_FILTERS:
+            loaded_image = load_image(self.temp_file.name, size=(40, 30), resample=resample)
+            assert loaded_image.shape == (30, 40, 3)
+
+        with pytest.raises(ValueError):
+            load_image(self.temp_file.name, size=(40, 30), resample='cubic')
+
 
 class TestSaveImage:
     """Test image saving functionality"""
@@ -94,6 +124,66 @@ class TestSaveImage:
         save_image(float_image, output_path)
         assert os.path.exists(output_path)
 
+    def test_png_compress_level_with_optimize(self):
+        """Test that the PNG compression level applies with optimize enabled"""
+        smooth = np.tile(np.arange(100, dtype=np.uint8)[:, None, None], (1, 100, 3))
+        sizes = []
+        for level in (0, 9):
+            output_path = os.path.join(self.temp_dir, f'level_{level}.png')
+            save_image(smooth, output_path, optimize=True, compress_level=level)
+            np.testing.assert_array_equal(load_image(output_path), smooth)
+            sizes.append(os.path.getsize(output_path))
+
+        assert sizes[0] > sizes[1]
+
+
+class TestLoadMask:
+    """Test mask file loading and caching"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.mask_path = os.path.join(self.temp_dir, 'mask.png')
+        mask = np.zeros((40, 60), dtype=np.uint8)
+        mask[10:20, 20:30] = 200
+        mask[30:35, 5:10] = 100
+        Image.fromarray(mask).save(self.mask_path)
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_mask_is_binarized(self):
+        """Test that masks are thresholded at half intensity"""
+        mask = load_mask(self.mask_path)
+
+        assert mask.shape == (40, 60)
+        assert mask[15, 25] == 255
+        assert mask[32, 7] == 0
+        assert not mask.flags.writeable
+
+    def test_mask_is_cached_until_modified(self):
+        """Test that repeated loads share one decoded mask until the file changes"""
+        first = load_mask(self.mask_path)
+        assert load_mask(self.mask_path) is first
+
+        Image.fromarray(np.full((40, 60), 255, np.uint8)).save(self.mask_path)
+        os.utime(self.mask_path, ns=(0, os.stat(self.mask_path).st_mtime_ns + 1))
+        assert load_mask(self.mask_path).all()
+
+    def test_mask_resized_to_shape(self):
+        """Test that masks are resized with nearest neighbour to the image shape"""
+        mask = load_mask(self.mask_path, (80, 120))
+
+        assert mask.shape == (80, 120)
+        assert set(np.unique(mask)) == {0, 255}
+
+    def test_missing_mask(self):
+        """Test loading non-existent mask raises FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            load_mask(os.path.join(self.temp_dir, 'missing.png'))
+
 
 class TestMaskDetection:
     """Test mask detection functionality"""
@@ -129,6 +219,33 @@ class TestMaskDetection:
         mask_low = create_mask_from_white_regions(gray_image, threshold=150)
         assert np.sum(mask_low > 0) > 0
 
+    @pytest.mark.parametrize('size', [None, (48, 40)])
+    def test_prescan_is_conservative(self, size):
+        """Test that the prescan never rejects an image with a detectable mask"""
+        rng = np.random.RandomState(0)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            lattice = np.full((96, 96, 3), 30, dtype=np.uint8)
+            lattice[::3, ::3] = 255
+            images = [lattice, np.full((96, 96, 3), 100, dtype=np.uint8)]
+            for _ in range(20):
+                image = cv2.GaussianBlur(rng.randint(0, 256, (96, 96, 3)).astype(np.uint8), (0, 0), 1)
+                image[rng.rand(96, 96) < 0.05] = rng.randint(180, 256, 3)
+                images.append(image)
+
+            for i, image in enumerate(images):
+                path = os.path.join(temp_dir, f'{i}.jpg')
+                Image.fromarray(image).save(path, quality=80)
+                for threshold in (200, 230, 240):
+                    mask = create_mask_from_white_regions(load_image(path, size=size), threshold)
+                    if mask.any():
+                        assert may_have_white_regions(path, threshold, size=size)
+
+            assert not may_have_white_regions(os.path.join(temp_dir, '1.jpg'))
+        finally:
+            import shutil
+            shutil.rmtree(temp_dir)
+
     def test_mask_morphological_operations(self):
         """Test that morphological operations clean up the mask"""
         # Create noisy image
@@ -141,6 +258,41 @@ class TestMaskDetection:
         assert isinstance(mask, np.ndarray)
         assert mask.dtype == np.uint8
 
+    def test_fused_morphology_matches_close_then_open(self):
+        """Test the three-pass morphology against separate CLOSE and OPEN passes"""
+        rng = np.random.RandomState(0)
+        kernel = np.ones((3, 3), np.uint8)
+        for density in (0.1, 0.5, 0.9):
+            image = np.where(rng.rand(61, 67, 1) < density, 255, 100).astype(np.uint8)
+            image = np.repeat(image, 3, axis=2)
+
+            raw = (cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) > 240).astype(np.uint8) * 255
+            expected = cv2.morphologyEx(raw, cv2.MORPH_CLOSE, kernel)
+            expected = cv2.morphologyEx(expected, cv2.MORPH_OPEN, kernel)
+
+            np.testing.assert_array_equal(create_mask_from_white_regions(image), expected)
+
+    def test_detect_white_regions(self):
+        """Test that gray, mask and components match the separate computations"""
+        image = np.full((80, 90, 3), 60, dtype=np.uint8)
+        image[5:15, 10:30] = 255
+        image[50:70, 60:65] = 250
+        regions = detect_white_regions(image)
+
+        np.testing.assert_array_equal(regions.gray, cv2.cvtColor(image, cv2.COLOR_RGB2GRAY))
+        np.testing.assert_array_equal(regions.mask, create_mask_from_white_regions(image))
+        np.testing.assert_array_equal(canny_edge_detection(regions.gray), canny_edge_detection(image))
+        assert regions.components.num_labels == 3
+        assert sorted(regions.components.areas) == [100, 200]
+        assert sorted(map(tuple, regions.components.boxes)) == [(10, 5, 20, 10), (60, 50, 5, 20)]
+
+        labels, regions_list = mask_regions(regions.mask, 4, regions.components)
+        expected_labels, expected_list = mask_regions(regions.mask, 4)
+        np.testing.assert_array_equal(labels, expected_labels)
+        assert regions_list == expected_list
+
+        assert detect_white_regions(image, components=False).components is None
+
 
 class TestEdgeDetection:
     """Test edge detection functionality"""
@@ -252,6 +404,193 @@ class TestEdgeGuidedInpainting:
 
         assert mean_diff < 10  # Small difference threshold
 
+    def test_roi_inpainting_matches_full_frame(self):
+        """Test that ROI inpainting matches the full-frame result inside the mask"""
+        image = cv2.GaussianBlur(
+            np.random.randint(0, 255, (200, 300, 3), dtype=np.uint8), (0, 0), 3)
+        mask = np.zeros((200, 300), dtype=np.uint8)
+        cv2.circle(mask, (60, 60), 15, 255, -1)
+        cv2.circle(mask, (75, 80), 6, 255, -1)
+        cv2.rectangle(mask, (200, 120), (240, 150), 255, -1)
+
+        full, _, _ = edge_guided_inpainting(image, mask, inpaint_radius=5)
+        cropped, edges, _ = edge_guided_inpainting(image, mask, inpaint_radius=5, roi=True)
+
+        np.testing.assert_array_equal(cropped[mask > 0], full[mask > 0])
+        np.testing.assert_array_equal(cropped[mask == 0], image[mask == 0])
+        assert edges.shape == mask.shape
+
+    @pytest.mark.parametrize('method, flag', [('telea', cv2.INPAINT_TELEA),
+                                              ('ns', cv2.INPAINT_NS)])
+    def test_single_pass_methods(self, method, flag):
+        """Test that single-pass methods return the plain cv2.inpaint result"""
+        result, _, _ = edge_guided_inpainting(self.test_image, self.mask, method=method)
+
+        np.testing.assert_array_equal(result, cv2.inpaint(self.test_image, self.mask, 3, flag))
+
+    def test_blend_with_zero_weight_is_telea(self):
+        """Test that a blend without NS contribution skips the NS pass"""
+        blended, _, _ = edge_guided_inpainting(self.test_image, self.mask, edge_weight=0)
+        telea, _, _ = edge_guided_inpainting(self.test_image, self.mask, method='telea')
+
+        np.testing.assert_array_equal(blended, telea)
+
+    def test_blend_matches_weighted_sum(self):
+        """Test that the masked blend rounds the weighted sum of both passes"""
+        result, _, _ = edge_guided_inpainting(self.test_image, self.mask, edge_weight=0.3)
+        telea = cv2.inpaint(self.test_image, self.mask, 3, cv2.INPAINT_TELEA).astype(float)
+        ns = cv2.inpaint(self.test_image, self.mask, 3, cv2.INPAINT_NS).astype(float)
+
+        expected = np.round(0.7 * telea + 0.3 * ns)
+        assert np.abs(result - expected).max() <= 1
+        np.testing.assert_array_equal(result[self.mask == 0], self.test_image[self.mask == 0])
+
+    @pytest.mark.parametrize('roi', [False, True])
+    def test_output_buffer(self, roi):
+        """Test that the result is written into a caller-supplied buffer"""
+        out = np.zeros_like(self.test_image)
+        result, _, _ = edge_guided_inpainting(self.test_image, self.mask, roi=roi, out=out)
+        expected, _, _ = edge_guided_inpainting(self.test_image, self.mask, roi=roi)
+
+        assert result is out
+        np.testing.assert_array_equal(out, expected)
+
+    @pytest.mark.parametrize('method', ['blend', 'telea', 'ns'])
+    @pytest.mark.parametrize('view', ['rows', 'columns', 'channels'])
+    def test_output_buffer_view(self, method, view):
+        """Test that strided views of a larger canvas receive the full result"""
+        height, width = self.test_image.shape[:2]
+        if view == 'rows':
+            canvas = np.zeros((height + 20, width + 20, 3), np.uint8)
+            out = canvas[10:-10, 10:-10]
+        elif view == 'columns':
+            canvas = np.zeros((height, 2 * width, 3), np.uint8)
+            out = canvas[:, ::2]
+        else:
+            canvas = np.zeros((height, width, 4), np.uint8)
+            out = canvas[..., :3]
+        result, _, _ = edge_guided_inpainting(self.test_image, self.mask, method=method, out=out)
+        expected, _, _ = edge_guided_inpainting(self.test_image, self.mask, method=method)
+
+        assert result is out
+        np.testing.assert_array_equal(out, expected)
+        assert canvas.sum() == expected.astype(np.int64).sum()
+
+    @pytest.mark.parametrize('out', [np.zeros((8, 8, 3), np.uint8), np.zeros((100, 100, 3))])
+    def test_invalid_output_buffer(self, out):
+        """Test that an out of the wrong shape or dtype raises ValueError"""
+        with pytest.raises(ValueError):
+            edge_guided_inpainting(self.test_image, self.mask, out=out)
+
+    def test_unknown_method(self):
+        """Test that an unknown inpainting method raises ValueError"""
+        with pytest.raises(ValueError):
+            edge_guided_inpainting(self.test_image, self.mask, method='patchmatch')
+
+    def test_roi_inpainting_empty_mask(self):
+        """Test that ROI inpainting with an empty mask returns the input"""
+        mask = np.zeros((100, 100), dtype=np.uint8)
+        result, _, _ = edge_guided_inpainting(self.test_image, mask, roi=True)
+
+        np.testing.assert_array_equal(result, self.test_image)
+
+    @pytest.mark.parametrize('roi', [False, True])
+    def test_skip_edges(self, roi):
+        """Test that skipping the edge maps leaves the result unchanged"""
+        expected, _, _ = edge_guided_inpainting(self.test_image, self.mask, roi=roi)
+        result, edges, edges_dilated = edge_guided_inpainting(self.test_image, self.mask,
+                                                              roi=roi, compute_edges=False)
+
+        np.testing.assert_array_equal(result, expected)
+        assert edges is None and edges_dilated is None
+
+    def test_pyramid_level_zero_is_single_scale(self):
+        """Test that zero pyramid levels leave the default path unchanged"""
+        single, _, _ = edge_guided_inpainting(self.test_image, self.mask)
+        pyramid, _, _ = edge_guided_inpainting(self.test_image, self.mask, pyramid_levels=0)
+
+        np.testing.assert_array_equal(pyramid, single)
+
+    @pytest.mark.parametrize('roi', [False, True])
+    def test_pyramid_fills_mask_only(self, roi):
+        """Test that pyramid inpainting fills the hole and keeps known pixels"""
+        image = cv2.GaussianBlur(self.test_image, (0, 0), 3)
+        masked = image.copy()
+        masked[self.mask > 0] = 255
+        result, _, _ = edge_guided_inpainting(masked, self.mask, roi=roi,
+                                              pyramid_levels=2, pyramid_band=3)
+
+        np.testing.assert_array_equal(result[self.mask == 0], image[self.mask == 0])
+        assert result[self.mask > 0].max() < 255
+        assert np.abs(result[self.mask > 0].astype(int) - image[self.mask > 0]).mean() < 40
+
+
+class TestBatchAPI:
+    """Test the stacked NHWC batch variants against the per-image functions"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.images = np.random.randint(50, 200, (4, 48, 64, 3), dtype=np.uint8)
+        for i, image in enumerate(self.images):
+            image[10 + i:25 + i, 20:35] = 255
+
+    def test_mask_batch_matches_single(self):
+        """Test batched mask creation, including morphology at image borders"""
+        masks = create_masks_from_white_regions_batch(self.images)
+
+        assert masks.shape == (4, 48, 64)
+        for image, mask in zip(self.images, masks):
+            np.testing.assert_array_equal(mask, create_mask_from_white_regions(image))
+
+    def test_mask_batch_strided_output(self):
+        """Test that a non-contiguous out receives the batch result"""
+        canvas = np.zeros((4, 48, 128), np.uint8)
+        out = canvas[:, :, ::2]
+        masks = create_masks_from_white_regions_batch(self.images, out=out)
+
+        assert masks is out
+        np.testing.assert_array_equal(out, create_masks_from_white_regions_batch(self.images))
+        with pytest.raises(ValueError):
+            create_masks_from_white_regions_batch(self.images, out=np.empty((4, 48, 64)))
+
+    def test_inpainting_batch_strided_output(self):
+        """Test that batched inpainting fills a non-contiguous out"""
+        masks = create_masks_from_white_regions_batch(self.images)
+        canvas = np.zeros((4, 48, 128, 3), np.uint8)
+        out = canvas[:, :, ::2]
+
+        results, _, _ = edge_guided_inpainting_batch(self.images, masks, out=out,
+                                                     compute_edges=False)
+
+        assert results is out
+        expected, _, _ = edge_guided_inpainting_batch(self.images, masks, compute_edges=False)
+        np.testing.assert_array_equal(out, expected)
+
+    def test_canny_batch_matches_single(self):
+        """Test batched Canny edges"""
+        out = np.empty((4, 48, 64), np.uint8)
+        edges = canny_edge_detection_batch(self.images, sigma=1.5, out=out)
+
+        assert edges is out
+        for image, image_edges in zip(self.images, edges):
+            np.testing.assert_array_equal(image_edges, canny_edge_detection(image, sigma=1.5))
+
+    def test_inpainting_batch_matches_single(self):
+        """Test batched inpainting results and edges"""
+        masks = create_masks_from_white_regions_batch(self.images)
+        results, edges, dilated = edge_guided_inpainting_batch(self.images, masks)
+
+        for i in range(len(self.images)):
+            expected = edge_guided_inpainting(self.images[i], masks[i])
+            np.testing.assert_array_equal(results[i], expected[0])
+            np.testing.assert_array_equal(edges[i], expected[1])
+            np.testing.assert_array_equal(dilated[i], expected[2])
+
+    def test_batch_rejects_single_image(self):
+        """Test that a single HxWx3 image is rejected"""
+        with pytest.raises(ValueError):
+            create_masks_from_white_regions_batch(self.images[0])
+
 
 class TestIntegration:
     """Integration tests combining multiple functions"""
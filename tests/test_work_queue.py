@@ -0,0 +1,172 @@
+"""
+Unit tests for the SQLite lease work queue
+
+Author: ABDULLAH AHMAD
+License: MIT
+"""
+
+import pytest
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+# Add the repository root to path so src is importable as a package
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue
+
+
+def drain(path: str, worker_id: str, log_path: str) -> None:
+    """Worker process: claim items until none are left, logging each one"""
+    queue = WorkQueue(path, worker_id=worker_id)
+    with queue.heartbeat():
+        for item in queue.claims():
+            time.sleep(0.01)
+            with open(log_path, 'a') as fh:
+                fh.write(f"{worker_id} {item}\n")
+            queue.complete(item)
+
+
+def claim_and_die(path: str) -> None:
+    """Worker process that exits abruptly while holding a lease"""
+    WorkQueue(path, worker_id='doomed', lease_seconds=0.5).claim()
+    os._exit(0)
+
+
+class TestWorkQueue:
+    """Test claiming, leases and completion in one process"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = WorkQueue(self.temp_dir, worker_id='a')
+        self.queue.add(['x', 'y', 'z'])
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_claims_in_order_once(self):
+        """Test that items are handed out in insertion order and only once"""
+        assert self.queue.add(['y', 'w']) == 1
+        assert [self.queue.claim() for _ in range(5)] == ['x', 'y', 'z', 'w', None]
+        assert self.queue.counts() == {PENDING: 0, LEASED: 4, DONE: 0, FAILED: 0}
+
+    def test_complete_and_fail(self):
+        """Test that finished items are recorded and not claimed again"""
+        assert self.queue.complete(self.queue.claim())
+        assert self.queue.fail(self.queue.claim(), 'broken')
+
+        assert self.queue.claim() == 'z'
+        assert self.queue.counts() == {PENDING: 0, LEASED: 1, DONE: 1, FAILED: 1}
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test that another worker takes over an expired lease"""
+        stale = WorkQueue(self.temp_dir, worker_id='stale', lease_seconds=0.05)
+        assert stale.claim() == 'x'
+        time.sleep(0.1)
+
+        assert self.queue.claim() == 'x'
+        assert not stale.complete('x')
+        assert self.queue.complete('x')
+
+    def test_claims_waits_for_other_leases(self):
+        """Test that draining waits for another worker's lease instead of stopping"""
+        stale = WorkQueue(self.temp_dir, worker_id='stale', lease_seconds=0.3)
+        assert stale.claim() == 'x'
+        start = time.perf_counter()
+
+        assert list(self.queue.claims()) == ['y', 'z', 'x']
+        assert time.perf_counter() - start >= 0.25
+
+    def test_renew_skips_leases_of_earlier_instance(self):
+        """Test that a restarted worker does not keep its predecessor's leases alive"""
+        crashed = WorkQueue(self.temp_dir, worker_id='b', lease_seconds=0.05)
+        assert crashed.claim() == 'x'
+        restarted = WorkQueue(self.temp_dir, worker_id='b', lease_seconds=0.05)
+
+        assert restarted.renew() == 0
+        time.sleep(0.1)
+        assert self.queue.claim() == 'x'
+
+    def test_heartbeat_keeps_lease(self):
+        """Test that renewing keeps a lease from being reclaimed"""
+        worker = WorkQueue(self.temp_dir, worker_id='busy', lease_seconds=0.2)
+        with worker.heartbeat():
+            assert worker.claim() == 'x'
+            time.sleep(0.5)
+            assert self.queue.claim() == 'y'
+        assert worker.complete('x')
+
+    def test_repeatedly_expired_item_fails(self):
+        """Test that an item whose lease keeps expiring is given up on"""
+        worker = WorkQueue(self.temp_dir, worker_id='b', lease_seconds=0.01, max_attempts=2)
+        for _ in range(2):
+            while worker.claim() != 'x':
+                pass
+            time.sleep(0.02)
+
+        assert worker.claim() == 'y'
+        assert worker.counts()[FAILED] == 1
+
+    def test_job_mismatch(self):
+        """Test that a queue cannot be reused for a different job"""
+        WorkQueue(self.temp_dir, job='first')
+        WorkQueue(self.temp_dir, job='first')
+        with pytest.raises(ValueError):
+            WorkQueue(self.temp_dir, job='second')
+
+
+class TestWorkerProcesses:
+    """Test several worker processes sharing one queue"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.temp_dir, 'log.txt')
+        self.items = [f'image_{i:02d}.png' for i in range(40)]
+        WorkQueue(self.temp_dir).add(self.items)
+
+    def teardown_method(self):
+        """Cleanup test fixtures"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_workers(self, count: int) -> list:
+        """Drain the queue with worker processes and return the log lines"""
+        workers = [multiprocessing.Process(target=drain,
+                                           args=(self.temp_dir, f'w{i}', self.log_path))
+                   for i in range(count)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+        with open(self.log_path) as fh:
+            return [line.split() for line in fh]
+
+    def test_workers_share_items(self):
+        """Test that each item is processed exactly once across workers"""
+        lines = self.run_workers(3)
+
+        assert sorted(item for _, item in lines) == self.items
+        assert WorkQueue(self.temp_dir).counts()[DONE] == len(self.items)
+
+    def test_dead_worker_item_is_reclaimed(self):
+        """Test that workers running while another dies mid-lease process its item"""
+        doomed = multiprocessing.Process(target=claim_and_die, args=(self.temp_dir,))
+        doomed.start()
+        doomed.join(60)
+        assert WorkQueue(self.temp_dir).counts()[LEASED] == 1
+
+        # The survivors start while the dead worker's lease is still valid
+        lines = self.run_workers(2)
+
+        assert sorted(item for _, item in lines) == self.items
+        assert WorkQueue(self.temp_dir).counts()[DONE] == len(self.items)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])